@@ -1,16 +1,44 @@
-from flask import Flask, jsonify, render_template, request, send_file, Response
+from flask import Flask, jsonify, render_template, request, send_file, Response, redirect
 from flask_caching import Cache
+import click
+import ctypes
+import ctypes.util
+import fcntl
+import select
+import struct
 import subprocess
 import tempfile
 import os
 import uuid
+import zipfile
 import re
 import threading
 import time
 import json
 import logging
 import hashlib
+import heapq
+import hmac
+import importlib.util
+import io
+import ipaddress
+import platform
+import posixpath
+import random
+import resource
+import shutil
+import signal
+import socket
+import sys
+import urllib.error
+import urllib.request
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field, fields, replace
+from enum import StrEnum
 from functools import lru_cache
+from urllib.parse import quote, unquote, urlencode, urlparse
+from xml.etree import ElementTree
 
 logging.basicConfig(
     level=logging.DEBUG,
@@ -24,8 +52,6 @@ app = Flask(__name__,
             static_folder='templates',
             static_url_path='/static')
 
-cache = Cache(app, config={'CACHE_TYPE': 'SimpleCache', 'CACHE_DEFAULT_TIMEOUT': 300})
-
 DEBUG_MODE = os.environ.get('DEBUG_MODE', 'false').lower() in ['true', '1', 'yes', 'y']
 app.debug = DEBUG_MODE
 app.logger.setLevel(logging.DEBUG if DEBUG_MODE else logging.INFO)
@@ -38,12 +64,901 @@ os.makedirs(TEMP_DIR, exist_ok=True)
 app.logger.info(f"Using temporary directory: {TEMP_DIR}")
 app.logger.info(f"Job cleanup timeout: {JOB_TIMEOUT}s")
 
+CACHE_BACKENDS = {
+    'simple': 'SimpleCache',
+    'filesystem': 'FileSystemCache',
+    'redis': 'RedisCache',
+}
+
+CACHE_TYPE = os.environ.get('CACHE_TYPE', 'simple').lower()
+CACHE_DIR = os.environ.get('CACHE_DIR', os.path.join(TEMP_DIR, 'cache'))
+CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+
+def get_cache_config():
+    """
+    Build the Flask-Caching configuration from the environment.
+    SimpleCache is local to each worker process, the filesystem and Redis
+    backends are shared by all gunicorn workers on the host.
+    
+    Returns:
+        dict: Flask-Caching configuration
+    """
+    if CACHE_TYPE not in CACHE_BACKENDS:
+        app.logger.warning(f"Unknown cache type '{CACHE_TYPE}', falling back to simple")
+    
+    config = {
+        'CACHE_TYPE': CACHE_BACKENDS.get(CACHE_TYPE, 'SimpleCache'),
+        'CACHE_DEFAULT_TIMEOUT': 300,
+        'CACHE_KEY_PREFIX': 'epub_converter_'
+    }
+    
+    if config['CACHE_TYPE'] == 'FileSystemCache':
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        config['CACHE_DIR'] = CACHE_DIR
+    elif config['CACHE_TYPE'] == 'RedisCache':
+        config['CACHE_REDIS_URL'] = CACHE_REDIS_URL
+        
+    return config
+
+cache_config = get_cache_config()
+cache = Cache(app, config=cache_config)
+app.logger.info(f"Using cache backend: {cache_config['CACHE_TYPE']}")
+
+STORAGE_BACKEND = os.environ.get('STORAGE_BACKEND', 'local').lower()
+S3_BUCKET = os.environ.get('S3_BUCKET', '')
+S3_ENDPOINT_URL = os.environ.get('S3_ENDPOINT_URL') or None
+S3_REGION = os.environ.get('S3_REGION') or None
+S3_ACCESS_KEY_ID = os.environ.get('S3_ACCESS_KEY_ID') or None
+S3_SECRET_ACCESS_KEY = os.environ.get('S3_SECRET_ACCESS_KEY') or None
+S3_PREFIX = os.environ.get('S3_PREFIX', 'outputs/')
+S3_PRESIGNED_DOWNLOADS = os.environ.get('S3_PRESIGNED_DOWNLOADS', 'true').lower() in ['true', '1', 'yes', 'y']
+S3_PRESIGNED_EXPIRY = int(os.environ.get('S3_PRESIGNED_EXPIRY', 300))
+S3_MULTIPART_THRESHOLD_MB = int(os.environ.get('S3_MULTIPART_THRESHOLD_MB', 16))
+S3_MULTIPART_CHUNK_MB = int(os.environ.get('S3_MULTIPART_CHUNK_MB', 8))
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+MAX_UPLOAD_SIZE = 100 * 1024 * 1024
+RAW_UPLOAD_MIMETYPE = 'application/epub+zip'
+
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR', '')
+SCRATCH_MAX_MB = int(os.environ.get('SCRATCH_MAX_MB', 0))
+SCRATCH_SIZE_FACTOR = 4
+
+if SCRATCH_DIR:
+    os.makedirs(SCRATCH_DIR, exist_ok=True)
+    app.logger.info(f"Using scratch directory for running conversions: {SCRATCH_DIR}"
+                    + (f" (max {SCRATCH_MAX_MB} MB)" if SCRATCH_MAX_MB else ""))
+
+def get_directory_size(path):
+    """
+    Sum the size of all files below a directory.
+    
+    Args:
+        path (str): Directory to scan
+        
+    Returns:
+        int: Total size in bytes
+    """
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+def get_work_dir(size_hint):
+    """
+    Choose the directory for the files of a new conversion.
+    The scratch tier is used while it has room for the expected working set
+    (SCRATCH_SIZE_FACTOR times the input), otherwise TEMP_DIR.
+    
+    Args:
+        size_hint (int): Expected input size in bytes, None if unknown
+        
+    Returns:
+        str: SCRATCH_DIR or TEMP_DIR
+    """
+    if not SCRATCH_DIR:
+        return TEMP_DIR
+    
+    try:
+        available = shutil.disk_usage(SCRATCH_DIR).free
+        if SCRATCH_MAX_MB:
+            available = min(available, SCRATCH_MAX_MB * 1024 * 1024 - get_directory_size(SCRATCH_DIR))
+    except OSError as e:
+        app.logger.error(f"Error checking scratch directory: {str(e)}")
+        return TEMP_DIR
+    
+    if (size_hint or 0) * SCRATCH_SIZE_FACTOR >= available:
+        app.logger.info(f"Scratch directory full ({available // (1024 * 1024)} MB left), using {TEMP_DIR}")
+        return TEMP_DIR
+    return SCRATCH_DIR
+
+def is_scratch_path(path):
+    """
+    Check whether a file lives on the scratch tier.
+    
+    Args:
+        path (str): File path
+        
+    Returns:
+        bool: True if the path is below SCRATCH_DIR
+    """
+    if not SCRATCH_DIR or not path:
+        return False
+    scratch = os.path.abspath(SCRATCH_DIR)
+    return os.path.commonpath([os.path.abspath(path), scratch]) == scratch
+
+def move_to_disk(path):
+    """
+    Move a file from the scratch tier to TEMP_DIR, keeping its name.
+    
+    Args:
+        path (str): File path on the scratch tier
+        
+    Returns:
+        str: New path of the file
+    """
+    target = os.path.join(TEMP_DIR, os.path.basename(path))
+    if os.path.exists(path):
+        shutil.move(path, target)
+    return target
+
+class LocalStorage:
+    """
+    Output storage on the local disk.
+    Finished files stay where the conversion wrote them unless that is the scratch
+    tier, the storage key is the absolute path.
+    """
+    name = 'local'
+
+    def store(self, job_id, local_path, extension='pdf'):
+        """
+        Take ownership of a finished output file.
+        Files on the scratch tier are moved to TEMP_DIR to free the memory.
+        
+        Args:
+            job_id (str): Job identifier
+            local_path (str): Path of the finished file
+            extension (str): File extension of the output
+            
+        Returns:
+            str: Storage key for the file
+        """
+        if is_scratch_path(local_path):
+            return move_to_disk(local_path)
+        return local_path
+
+    def exists(self, key):
+        """
+        Check whether a stored file exists.
+        
+        Args:
+            key (str): Storage key
+            
+        Returns:
+            bool: True if the file exists
+        """
+        return bool(key) and os.path.exists(key)
+
+    def delete(self, key):
+        """
+        Delete a stored file if it exists.
+        
+        Args:
+            key (str): Storage key
+        """
+        if self.exists(key):
+            os.remove(key)
+            app.logger.debug(f"Deleted stored output file: {key}")
+
+    def send(self, key, download_name, mimetype=None):
+        """
+        Build a download response for a stored file.
+        
+        Args:
+            key (str): Storage key
+            download_name (str): Filename offered to the client
+            mimetype (str, optional): Content type of the file
+            
+        Returns:
+            Response: File download
+        """
+        response = send_file(key, as_attachment=True, download_name=download_name, mimetype=mimetype)
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        response.headers['ETag'] = hashlib.md5(str(os.path.getmtime(key)).encode()).hexdigest()
+        return response
+
+class S3Storage:
+    """
+    Output storage in an S3-compatible object store (AWS S3, MinIO, ...).
+    Finished files are uploaded (multipart above the threshold) and removed from
+    the local disk, so any node can serve the download.
+    """
+    name = 's3'
+
+    def __init__(self):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package") from e
+        
+        if not S3_BUCKET:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET to be set")
+        
+        self.bucket = S3_BUCKET
+        self.client = boto3.client(
+            's3',
+            endpoint_url=S3_ENDPOINT_URL,
+            region_name=S3_REGION,
+            aws_access_key_id=S3_ACCESS_KEY_ID,
+            aws_secret_access_key=S3_SECRET_ACCESS_KEY
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_THRESHOLD_MB * 1024 * 1024,
+            multipart_chunksize=S3_MULTIPART_CHUNK_MB * 1024 * 1024
+        )
+
+    def store(self, job_id, local_path, extension='pdf'):
+        """
+        Upload a finished output file and remove the local copy.
+        
+        Args:
+            job_id (str): Job identifier
+            local_path (str): Path of the finished file
+            extension (str): File extension of the output
+            
+        Returns:
+            str: Object key of the uploaded file
+        """
+        key = f"{S3_PREFIX}{job_id}.{extension}"
+        app.logger.debug(f"Uploading {local_path} to s3://{self.bucket}/{key}")
+        self.client.upload_file(local_path, self.bucket, key, Config=self.transfer_config)
+        os.remove(local_path)
+        return key
+
+    def exists(self, key):
+        """
+        Check whether an object exists in the bucket.
+        
+        Args:
+            key (str): Object key
+            
+        Returns:
+            bool: True if the object exists
+        """
+        if not key:
+            return False
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except Exception:
+            return False
+
+    def delete(self, key):
+        """
+        Delete an object from the bucket.
+        
+        Args:
+            key (str): Object key
+        """
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        app.logger.debug(f"Deleted stored output object: {key}")
+
+    def send(self, key, download_name, mimetype=None):
+        """
+        Build a download response for an object.
+        Redirects to a presigned URL or streams the object in chunks,
+        the web tier never holds the whole file in memory.
+        
+        Args:
+            key (str): Object key
+            download_name (str): Filename offered to the client
+            mimetype (str, optional): Content type of the file
+            
+        Returns:
+            Response: Redirect or streamed file download
+        """
+        content_disposition = f'attachment; filename="{download_name}"'
+        
+        if S3_PRESIGNED_DOWNLOADS:
+            url = self.client.generate_presigned_url(
+                'get_object',
+                Params={
+                    'Bucket': self.bucket,
+                    'Key': key,
+                    'ResponseContentDisposition': content_disposition,
+                    'ResponseContentType': mimetype or 'application/octet-stream'
+                },
+                ExpiresIn=S3_PRESIGNED_EXPIRY
+            )
+            response = redirect(url, code=302)
+            response.headers['Cache-Control'] = 'no-store'
+            return response
+        
+        obj = self.client.get_object(Bucket=self.bucket, Key=key)
+        response = Response(
+            obj['Body'].iter_chunks(chunk_size=STREAM_CHUNK_SIZE),
+            mimetype=mimetype or obj.get('ContentType') or 'application/octet-stream',
+            direct_passthrough=True
+        )
+        response.headers['Content-Disposition'] = content_disposition
+        response.headers['Content-Length'] = str(obj['ContentLength'])
+        response.headers['Cache-Control'] = 'public, max-age=86400'
+        if obj.get('ETag'):
+            response.headers['ETag'] = obj['ETag'].strip('"')
+        return response
+
+def get_storage_backend():
+    """
+    Create the output storage backend selected by STORAGE_BACKEND.
+    
+    Returns:
+        LocalStorage or S3Storage: Storage backend instance
+    """
+    if STORAGE_BACKEND == 's3':
+        return S3Storage()
+    if STORAGE_BACKEND != 'local':
+        app.logger.warning(f"Unknown storage backend '{STORAGE_BACKEND}', falling back to local")
+    return LocalStorage()
+
+storage = get_storage_backend()
+app.logger.info(f"Using output storage backend: {storage.name}")
+
+MAX_CONCURRENT_CONVERSIONS = int(os.environ.get('MAX_CONCURRENT_CONVERSIONS', 2))
+CONVERSION_MAX_MEMORY_MB = int(os.environ.get('CONVERSION_MAX_MEMORY_MB', 0))
+CONVERSION_MAX_RSS_MB = int(os.environ.get('CONVERSION_MAX_RSS_MB', 0))
+CONVERSION_MAX_CPU_SECONDS = int(os.environ.get('CONVERSION_MAX_CPU_SECONDS', 0))
+CONVERSION_MAX_OUTPUT_MB = int(os.environ.get('CONVERSION_MAX_OUTPUT_MB', 0))
+CONVERSION_NICE = int(os.environ.get('CONVERSION_NICE', 10))
+CONVERSION_CPU_AFFINITY = os.environ.get('CONVERSION_CPU_AFFINITY', '')
+CONVERSION_IO_CLASS = os.environ.get('CONVERSION_IO_CLASS', '').lower()
+CONVERSION_IO_PRIORITY = int(os.environ.get('CONVERSION_IO_PRIORITY', 7))
+
+EBOOK_CONVERT_PATH = os.environ.get('EBOOK_CONVERT_PATH', 'ebook-convert')
+EBOOK_META_PATH = os.environ.get('EBOOK_META_PATH', 'ebook-meta')
+CALIBRE_VERBOSITY = int(os.environ.get('CALIBRE_VERBOSITY', 0))
+CALIBRE_DEBUG_ON_FAILURE = os.environ.get('CALIBRE_DEBUG_ON_FAILURE', 'false').lower() in ['true', '1', 'yes', 'y']
+
+CONVERSION_STALL_TIMEOUT = int(os.environ.get('CONVERSION_STALL_TIMEOUT', 180))
+CONVERSION_TIMEOUT_BASE = int(os.environ.get('CONVERSION_TIMEOUT_BASE', 600))
+CONVERSION_TIMEOUT_PER_MB = int(os.environ.get('CONVERSION_TIMEOUT_PER_MB', 60))
+
+PARALLEL_THRESHOLD_MB = float(os.environ.get('PARALLEL_THRESHOLD_MB', 20))
+PARALLEL_CHUNKS = int(os.environ.get('PARALLEL_CHUNKS') or min(4, os.cpu_count() or 1))
+PREVIEW_SPINE_ITEMS = int(os.environ.get('PREVIEW_SPINE_ITEMS', 3))
+PREVIEW_CONCURRENCY = int(os.environ.get('PREVIEW_CONCURRENCY', 1))
+PREVIEW_MIN_ITEM_SIZE = 2 * 1024
+DRAFT_QUEUE_DEPTH = int(os.environ.get('DRAFT_QUEUE_DEPTH', 0))
+QUALITY_TIERS = ['standard', 'draft']
+
+CONTENT_STORE_DIR = os.path.join(TEMP_DIR, 'content')
+CONTENT_STORE_TTL = int(os.environ.get('CONTENT_STORE_TTL', JOB_TIMEOUT))
+CONTENT_STORE_MAX_MB = int(os.environ.get('CONTENT_STORE_MAX_MB', 0))
+SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+if CONTENT_STORE_TTL:
+    os.makedirs(CONTENT_STORE_DIR, exist_ok=True)
+
+if PARALLEL_THRESHOLD_MB and importlib.util.find_spec('pypdf') is None:
+    app.logger.warning("pypdf is not installed, parallel conversion of large books is disabled")
+    PARALLEL_THRESHOLD_MB = 0
+
+OUTPUT_FORMATS = {'pdf': 'application/pdf', 'epub': 'application/epub+zip'}
+EPUB_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+EPUB_JPEG_QUALITY = 85
+IMAGE_DOWNSCALING = importlib.util.find_spec('PIL') is not None
+
+if not IMAGE_DOWNSCALING:
+    app.logger.warning("Pillow is not installed, images of EPUB outputs are not downscaled")
+
+IO_CLASSES = {'realtime': '1', 'best-effort': '2', 'idle': '3'}
+PROGRESS_LINE_PATTERN = re.compile(rb'^[ \t]*(\d{1,3})%.*$', re.MULTILINE)
+OUTPUT_CHUNK_SIZE = 64 * 1024
+OUTPUT_TAIL_SIZE = 64 * 1024
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+def parse_cpu_set(cpu_set):
+    """
+    Parse a CPU list like "0-3,6" into a set of CPU numbers.
+    
+    Args:
+        cpu_set (str): Comma separated CPU numbers and ranges
+        
+    Returns:
+        set: CPU numbers, empty if no affinity is configured
+    """
+    cpus = set()
+    for part in filter(None, (p.strip() for p in cpu_set.split(','))):
+        if '-' in part:
+            start, end = part.split('-', 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
+
+CONVERSION_CPUS = parse_cpu_set(CONVERSION_CPU_AFFINITY)
+
+def apply_resource_limits():
+    """
+    Apply the configured limits to a conversion process.
+    Runs in the child process between fork and exec, so it must not log or take locks.
+    """
+    if CONVERSION_NICE:
+        os.nice(CONVERSION_NICE)
+    if CONVERSION_CPUS:
+        os.sched_setaffinity(0, CONVERSION_CPUS)
+    if CONVERSION_MAX_MEMORY_MB:
+        limit = CONVERSION_MAX_MEMORY_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    if CONVERSION_MAX_CPU_SECONDS:
+        resource.setrlimit(resource.RLIMIT_CPU, (CONVERSION_MAX_CPU_SECONDS, CONVERSION_MAX_CPU_SECONDS + 5))
+    if CONVERSION_MAX_OUTPUT_MB:
+        limit = CONVERSION_MAX_OUTPUT_MB * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_FSIZE, (limit, limit))
+
+def get_io_priority_prefix():
+    """
+    Build the ionice prefix for the configured I/O scheduling class.
+    
+    Returns:
+        list: Command prefix, empty if no I/O class is configured or ionice is missing
+    """
+    if not CONVERSION_IO_CLASS:
+        return []
+    if CONVERSION_IO_CLASS not in IO_CLASSES:
+        app.logger.warning(f"Unknown I/O class '{CONVERSION_IO_CLASS}', ignoring")
+        return []
+    if not shutil.which('ionice'):
+        app.logger.warning("ionice not found, running conversion without I/O priority")
+        return []
+    
+    prefix = ['ionice', '-c', IO_CLASSES[CONVERSION_IO_CLASS]]
+    if CONVERSION_IO_CLASS != 'idle':
+        prefix += ['-n', str(CONVERSION_IO_PRIORITY)]
+    return prefix
+
+def get_process_group_stats(pgid):
+    """
+    Sum resident memory and CPU time of all processes in a process group.
+    Calibre renders in helper processes, so the whole group counts.
+    
+    Args:
+        pgid (int): Process group ID
+        
+    Returns:
+        dict: 'rss' in bytes, 'cpu_seconds' and number of 'processes'
+    """
+    stats = {'rss': 0, 'cpu_seconds': 0.0, 'processes': 0}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue
+        fields = stat[stat.rindex(')') + 2:].split()
+        if int(fields[2]) == pgid:
+            stats['rss'] += int(fields[21]) * PAGE_SIZE
+            stats['cpu_seconds'] += (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+            stats['processes'] += 1
+    return stats
+
+def kill_process_group(process):
+    """
+    Kill a conversion process together with its helper processes.
+    
+    Args:
+        process (subprocess.Popen): Process started in its own session
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+def monitor_conversion(process, output_path, state):
+    """
+    Watchdog for a running conversion.
+    Kills the process group when it stops producing output, runs past its
+    time budget or exceeds the RSS or output size limit.
+    
+    Args:
+        process (subprocess.Popen): Conversion process
+        output_path (str): Path of the file being written
+        state (dict): Shared state with 'started', 'last_output' and 'budget';
+                      'limit_hit' or 'timeout' is set when the process was killed
+    """
+    while process.poll() is None:
+        now = time.time()
+        if CONVERSION_STALL_TIMEOUT and now - state['last_output'] > CONVERSION_STALL_TIMEOUT:
+            state['timeout'] = ('stalled', f"No output from Calibre for {CONVERSION_STALL_TIMEOUT} seconds")
+        elif state['budget'] and now - state['started'] > state['budget']:
+            state['timeout'] = ('timeout', f"Conversion exceeded its time budget of {state['budget']:.0f} seconds")
+        elif CONVERSION_MAX_RSS_MB and get_process_group_stats(process.pid)['rss'] > CONVERSION_MAX_RSS_MB * 1024 * 1024:
+            state['limit_hit'] = f"memory (resident memory above {CONVERSION_MAX_RSS_MB} MB)"
+        elif CONVERSION_MAX_OUTPUT_MB and os.path.exists(output_path) \
+                and os.path.getsize(output_path) > CONVERSION_MAX_OUTPUT_MB * 1024 * 1024:
+            state['limit_hit'] = f"output size (above {CONVERSION_MAX_OUTPUT_MB} MB)"
+        
+        if 'limit_hit' in state or 'timeout' in state:
+            kill_process_group(process)
+            return
+        time.sleep(1)
+
+def get_conversion_budget(file_size, device_profile):
+    """
+    Calculate the maximum runtime of a conversion.
+    The budget grows with the input size and is scaled by the device profile's
+    TIMEOUT_FACTOR, e.g. REMARKABLE_TIMEOUT_FACTOR=1.5.
+    
+    Args:
+        file_size (int): Input file size in bytes
+        device_profile (str): Device profile of the job
+        
+    Returns:
+        float: Budget in seconds, 0 if the hard timeout is disabled
+    """
+    if not CONVERSION_TIMEOUT_BASE:
+        return 0
+    factor = float(get_profile_option(device_profile, 'timeout_factor', 1.0))
+    return (CONVERSION_TIMEOUT_BASE + CONVERSION_TIMEOUT_PER_MB * file_size / (1024 * 1024)) * factor
+
+def get_limit_violation(returncode, output_lines):
+    """
+    Work out which rlimit ended a failed conversion, if any.
+    
+    Args:
+        returncode (int): Return code of the conversion process
+        output_lines (list): Last lines of the process output
+        
+    Returns:
+        str: Description of the exceeded limit or None
+    """
+    if CONVERSION_MAX_OUTPUT_MB and (returncode == -signal.SIGXFSZ
+                                     or any('File too large' in line for line in output_lines)):
+        return f"output size (above {CONVERSION_MAX_OUTPUT_MB} MB)"
+    if CONVERSION_MAX_CPU_SECONDS and returncode in [-signal.SIGXCPU, -signal.SIGKILL]:
+        return f"CPU time (above {CONVERSION_MAX_CPU_SECONDS} seconds)"
+    if CONVERSION_MAX_MEMORY_MB and any('MemoryError' in line or 'bad_alloc' in line for line in output_lines):
+        return f"memory (address space above {CONVERSION_MAX_MEMORY_MB} MB)"
+    return None
+
+QUEUE_WEIGHT_WEB = int(os.environ.get('QUEUE_WEIGHT_WEB', 3))
+QUEUE_WEIGHT_API = int(os.environ.get('QUEUE_WEIGHT_API', 1))
+UPLOAD_RATE_LIMIT = float(os.environ.get('UPLOAD_RATE_LIMIT', 10))
+UPLOAD_RATE_BURST = int(os.environ.get('UPLOAD_RATE_BURST', 5))
+TRUST_PROXY_HEADERS = os.environ.get('TRUST_PROXY_HEADERS', 'false').lower() in ['true', '1', 'yes', 'y']
+
+class FairQueue:
+    """
+    Queue of conversions with weighted fair scheduling.
+    Job classes (web form and API) are served in proportion to their weights and
+    the clients within a class in round robin, so a single client uploading many
+    books cannot keep everybody else waiting.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        self.classes = {job_class: OrderedDict() for job_class in weights}
+        self.passes = {job_class: 0.0 for job_class in weights}
+        self.size = 0
+        self.condition = threading.Condition()
+
+    def put(self, item, client_id, job_class):
+        """
+        Add a conversion to the queue of a client.
+        
+        Args:
+            item: Conversion to run
+            client_id (str): Client that submitted the conversion
+            job_class (str): 'web' or 'api'
+        """
+        with self.condition:
+            clients = self.classes[job_class]
+            if not clients:
+                # A class that was idle must not catch up on the slots it did not use
+                active = [self.passes[other] for other, queued in self.classes.items() if queued]
+                if active:
+                    self.passes[job_class] = max(self.passes[job_class], min(active))
+            clients.setdefault(client_id, deque()).append(item)
+            self.size += 1
+            self.condition.notify()
+
+    def get(self):
+        """
+        Take the next conversion, blocking while the queue is empty.
+        
+        Returns:
+            The conversion of the next client of the class that is furthest behind its share
+        """
+        with self.condition:
+            while not self.size:
+                self.condition.wait()
+            
+            job_class = min((name for name, queued in self.classes.items() if queued),
+                            key=lambda name: self.passes[name])
+            self.passes[job_class] += 1 / self.weights[job_class]
+            
+            client_id, items = self.classes[job_class].popitem(last=False)
+            item = items.popleft()
+            if items:
+                self.classes[job_class][client_id] = items
+            self.size -= 1
+            return item
+
+    def qsize(self):
+        """
+        Get the number of waiting conversions.
+        
+        Returns:
+            int: Number of queued conversions of all clients
+        """
+        return self.size
+
+    def get_share(self, client_id, job_class):
+        """
+        Describe the capacity a waiting client currently gets.
+        
+        Args:
+            client_id (str): Client ID
+            job_class (str): 'web' or 'api'
+            
+        Returns:
+            dict: 'queue_share' (fraction of started conversions going to the client)
+                  and 'client_queued' (conversions of the client waiting)
+        """
+        with self.condition:
+            clients = self.classes[job_class]
+            active_weight = sum(weight for name, weight in self.weights.items()
+                                if self.classes[name] or name == job_class)
+            client_count = len(clients) + (0 if client_id in clients else 1)
+            return {
+                'queue_share': round(self.weights[job_class] / active_weight / client_count, 3),
+                'client_queued': len(clients.get(client_id, ()))
+            }
+
+conversion_queue = FairQueue({'web': QUEUE_WEIGHT_WEB, 'api': QUEUE_WEIGHT_API})
+preview_queue = FairQueue({'preview': 1})
+
+def get_job_queue(job_data):
+    """
+    Get the queue a job waits in.
+    Previews have their own queue and dispatcher threads, so they are not
+    stuck behind full conversions.
+    
+    Args:
+        job_data (Job): Job record
+        
+    Returns:
+        tuple: (FairQueue, job class within the queue)
+    """
+    if job_data.preview:
+        return preview_queue, 'preview'
+    return conversion_queue, job_data.job_class
+
+upload_buckets = {}
+upload_buckets_lock = threading.Lock()
+
+def get_client_id():
+    """
+    Identify the client of the current request.
+    API clients are identified by their X-API-Key header, everybody else by IP address.
+    
+    Returns:
+        str: Client ID
+    """
+    api_key = request.headers.get('X-API-Key')
+    if api_key:
+        return f"key-{hashlib.sha256(api_key.encode()).hexdigest()[:16]}"
+    if TRUST_PROXY_HEADERS and request.access_route:
+        return f"ip-{request.access_route[0]}"
+    return f"ip-{request.remote_addr}"
+
+def take_upload_token(client_id):
+    """
+    Charge an upload to the token bucket of a client.
+    Buckets hold UPLOAD_RATE_BURST tokens and refill at UPLOAD_RATE_LIMIT per minute.
+    
+    Args:
+        client_id (str): Client ID
+        
+    Returns:
+        int: 0 if the upload is allowed, otherwise seconds until the next token
+    """
+    if not UPLOAD_RATE_LIMIT:
+        return 0
+    
+    now = time.time()
+    rate = UPLOAD_RATE_LIMIT / 60
+    with upload_buckets_lock:
+        tokens, updated = upload_buckets.get(client_id, (UPLOAD_RATE_BURST, now))
+        tokens = min(UPLOAD_RATE_BURST, tokens + (now - updated) * rate)
+        
+        if tokens < 1:
+            upload_buckets[client_id] = (tokens, now)
+            return int((1 - tokens) / rate) + 1
+        
+        upload_buckets[client_id] = (tokens - 1, now)
+        
+        if len(upload_buckets) > 10000:
+            for other_id, (other_tokens, other_updated) in list(upload_buckets.items()):
+                if other_tokens + (now - other_updated) * rate >= UPLOAD_RATE_BURST:
+                    del upload_buckets[other_id]
+    return 0
+
+active_processes = {}
+recent_conversions = deque(maxlen=50)
+conversion_slots = threading.Semaphore(MAX_CONCURRENT_CONVERSIONS)
+
+def conversion_dispatcher(queue):
+    """
+    Background thread function that runs queued conversions.
+    Full conversions hold one of the MAX_CONCURRENT_CONVERSIONS conversion_slots while they run,
+    parallel conversions borrow idle slots for their extra parts, so the slots bound the number
+    of Calibre processes. PREVIEW_CONCURRENCY further threads serve the preview queue.
+    
+    Args:
+        queue (FairQueue): Queue to take conversions from
+    """
+    slots = conversion_slots if queue is conversion_queue else None
+    while True:
+        command, job_id, input_path, output_path = queue.get()
+        if slots:
+            slots.acquire()
+        try:
+            run_conversion(command, job_id, input_path, output_path)
+        except Exception as e:
+            app.logger.error(f"Error in conversion_dispatcher: {str(e)}")
+        finally:
+            if slots:
+                slots.release()
+
+class JobStatus(StrEnum):
+    """
+    State of a conversion job.
+    Members are strings, so they compare equal to and serialize as 'queued', 'running', ...
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    @property
+    def finished(self):
+        return self in (JobStatus.COMPLETED, JobStatus.FAILED)
+
+@dataclass(slots=True, eq=False)
+class Job:
+    """
+    Record of a conversion job in conversion_progress.
+    Finished jobs are kept until JOB_TIMEOUT, so the record uses slots instead
+    of a per-job dict and only fields that differ from their default are saved.
+    """
+    status: JobStatus = JobStatus.QUEUED
+    progress: int = 0
+    message: str = ''
+    version: int = 0
+    author: str = None
+    title: str = None
+    client_id: str = 'unknown'
+    batch: str = None
+    job_class: str = 'web'
+    device_profile: str = None
+    params: dict = None
+    preview: bool = False
+    output_format: str = 'pdf'
+    quality: str = 'standard'
+    coalescing_key: str = None
+    coalesced_with: str = None
+    followers: list = field(default_factory=list)
+    input_path: str = None
+    output_path: str = None
+    output_key: str = None
+    input_size: int = None
+    attempts: int = 0
+    worker: str = None
+    started_time: float = None
+    completed_time: float = None
+    estimated_completion: float = None
+    rate: float = None
+    parallel: bool = False
+    detailed_logs: list = field(default_factory=list)
+    error_details: str = None
+    failure_reason: str = None
+    webhook: dict = None
+
+    def to_dict(self, compact=False):
+        """
+        Convert the record to a JSON serializable dict.
+
+        Args:
+            compact (bool): Leave out fields that have their default value
+
+        Returns:
+            dict: Field names mapped to values
+        """
+        if compact:
+            return {name: getattr(self, name) for name, default in JOB_DEFAULTS.items()
+                    if getattr(self, name) != default}
+        return {name: getattr(self, name) for name in JOB_DEFAULTS}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create a record from the output of to_dict(); unknown keys are ignored.
+
+        Args:
+            data (dict): Serialized job
+
+        Returns:
+            Job: Job record
+        """
+        job = cls(**{name: value for name, value in data.items() if name in JOB_DEFAULTS})
+        job.status = JobStatus(job.status)
+        return job
+
+JOB_DEFAULTS = {job_field.name: getattr(Job(), job_field.name) for job_field in fields(Job)}
+
+@dataclass(slots=True)
+class CompletedFile:
+    """
+    Stored output of a completed job in completed_files, kept after the job record expires.
+    """
+    path: str
+    author: str = None
+    title: str = None
+    output_format: str = 'pdf'
+
+    def to_dict(self):
+        return {'path': self.path, 'author': self.author, 'title': self.title, 'output_format': self.output_format}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create an entry from its saved form, older files store only the path.
+
+        Args:
+            data (dict or str): Saved entry
+
+        Returns:
+            CompletedFile: Completed file entry
+        """
+        if isinstance(data, str):
+            return cls(data)
+        return cls(data['path'], data.get('author'), data.get('title'), data.get('output_format', 'pdf'))
+
 JOB_DATA_FILE = os.path.join(TEMP_DIR, 'conversion_jobs.json')
 
 conversion_progress = {}
 completed_files = {}
 
+inflight_conversions = {}
+inflight_lock = threading.Lock()
+INFLIGHT_DIR = os.path.join(TEMP_DIR, 'inflight')
+INFLIGHT_LOCK_FILE = os.path.join(INFLIGHT_DIR, '.lock')
+os.makedirs(INFLIGHT_DIR, exist_ok=True)
+
+JOB_LOCK_FILE = os.path.join(TEMP_DIR, 'conversion_jobs.lock')
+MAX_JOB_ATTEMPTS = int(os.environ.get('MAX_JOB_ATTEMPTS', 3))
+RECOVER_INTERRUPTED_JOBS = os.environ.get('RECOVER_INTERRUPTED_JOBS', 'auto').lower()
+STATUS_MAX_WAIT = int(os.environ.get('STATUS_MAX_WAIT', 30))
+BULK_STATUS_MAX_JOBS = 1000
+EVENT_STREAM_HEARTBEAT = 15
+EVENT_STREAM_IDLE_TIMEOUT = int(os.environ.get('EVENT_STREAM_IDLE_TIMEOUT', 60))
+FINISHED_JOB_LOG_LINES = 100
+
 COMPLETED_FILES_FILE = os.path.join(TEMP_DIR, 'completed_files.json')
+HISTORY_FILE = os.path.join(TEMP_DIR, 'conversion_history.json')
+HISTORY_SIZE = int(os.environ.get('CONVERSION_HISTORY_SIZE', 500))
+HISTORY_NEIGHBOURS = 5
+
+history_lock = threading.Lock()
+job_changed = threading.Condition()
 
 os.makedirs(os.path.dirname(COMPLETED_FILES_FILE), exist_ok=True)
 
@@ -52,17 +967,62 @@ def load_saved_jobs():
     Load previously saved conversion jobs from disk.
     
     Returns:
-        dict: Dictionary of saved jobs or empty dict if none found
+        dict: Job IDs mapped to Job records, empty if none found
     """
     if os.path.exists(JOB_DATA_FILE):
         try:
             with open(JOB_DATA_FILE, 'r') as f:
-                return json.load(f)
+                return {job_id: Job.from_dict(data) for job_id, data in json.load(f).items()}
         except Exception as e:
             app.logger.error(f"Error loading saved jobs: {str(e)}")
     return {}
 
 _last_jobs_hash = None
+_saved_jobs_snapshot = (None, {})
+
+def get_saved_jobs():
+    """
+    Get the jobs of the saved jobs file.
+    The file is only parsed again after it has been written.
+    
+    Returns:
+        dict: Saved job records, must not be modified
+    """
+    global _saved_jobs_snapshot
+    try:
+        mtime = os.stat(JOB_DATA_FILE).st_mtime_ns
+    except OSError:
+        return {}
+    if mtime != _saved_jobs_snapshot[0]:
+        _saved_jobs_snapshot = (mtime, load_saved_jobs())
+    return _saved_jobs_snapshot[1]
+
+def refresh_jobs(job_ids):
+    """
+    Take over the saved records of jobs if they are newer than the ones in memory,
+    e.g. because another worker runs the jobs.
+    
+    Args:
+        job_ids (iterable): Job identifiers
+    """
+    saved_jobs = get_saved_jobs()
+    for job_id in job_ids:
+        disk_job = saved_jobs.get(job_id)
+        if disk_job is None:
+            continue
+        job_data = conversion_progress.get(job_id)
+        if job_data is None or disk_job.version > job_data.version:
+            conversion_progress[job_id] = replace(disk_job)
+
+def serialize_jobs():
+    """
+    Serialize the jobs in the compact form of the saved jobs file.
+    
+    Returns:
+        str: JSON document
+    """
+    return json.dumps({job_id: job.to_dict(compact=True) for job_id, job in list(conversion_progress.items())},
+                      sort_keys=True)
 
 def get_job_cache_key():
     """
@@ -71,7 +1031,7 @@ def get_job_cache_key():
     Returns:
         str: MD5 hash of the jobs state
     """
-    return hashlib.md5(json.dumps(conversion_progress, sort_keys=True).encode()).hexdigest()
+    return hashlib.md5(serialize_jobs().encode()).hexdigest()
 
 def save_jobs():
     """
@@ -81,7 +1041,8 @@ def save_jobs():
     """
     global _last_jobs_hash
     
-    current_hash = get_job_cache_key()
+    serialized = serialize_jobs()
+    current_hash = hashlib.md5(serialized.encode()).hexdigest()
 
     if _last_jobs_hash is None:
         app.logger.debug("First save or important state change, forcing save")
@@ -91,8 +1052,10 @@ def save_jobs():
         
     try:
         app.logger.debug(f"Saving {len(conversion_progress)} jobs to {JOB_DATA_FILE}")
-        with open(JOB_DATA_FILE, 'w') as f:
-            json.dump(conversion_progress, f)
+        temp_file = f"{JOB_DATA_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_file, 'w') as f:
+            f.write(serialized)
+        os.replace(temp_file, JOB_DATA_FILE)
         _last_jobs_hash = current_hash
         app.logger.debug("Jobs saved successfully")
     except Exception as e:
@@ -103,30 +1066,140 @@ def load_completed_files():
     Load previously saved completed files from disk.
     
     Returns:
-        dict: Dictionary of completed files or empty dict if none found
+        dict: Job IDs mapped to CompletedFile entries, empty if none found
     """
     if os.path.exists(COMPLETED_FILES_FILE):
         try:
             with open(COMPLETED_FILES_FILE, 'r') as f:
-                return json.load(f)
+                return {job_id: CompletedFile.from_dict(data) for job_id, data in json.load(f).items()}
         except Exception as e:
             app.logger.error(f"Error loading completed files: {str(e)}")
     return {}
     
 
-def get_epub_metadata(input_path):
+def load_conversion_history():
     """
-    Extract author and title from epub file for better naming.
+    Load the durations of previous successful conversions from disk.
     
-    Args:
-        input_path (str): Path to the EPUB file
-        
+    Returns:
+        list: History entries with device_profile, input_size, duration and finished
+    """
+    if os.path.exists(HISTORY_FILE):
+        try:
+            with open(HISTORY_FILE, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            app.logger.error(f"Error loading conversion history: {str(e)}")
+    return []
+
+def record_conversion_duration(device_profile, input_size, duration, parallel=False, output_format='pdf',
+                               quality='standard'):
+    """
+    Append a successful conversion to the history used for ETA prediction.
+    The file is re-read before writing so entries of other gunicorn workers are kept.
+    
+    Args:
+        device_profile (str): Device profile of the conversion or None
+        input_size (int): Size of the input EPUB in bytes
+        duration (float): Wall clock time of the conversion in seconds
+        parallel (bool): Whether the book was converted in parallel parts
+        output_format (str): 'pdf' or 'epub'
+        quality (str): 'standard' or 'draft'
+    """
+    global conversion_history
+    
+    entry = {
+        'device_profile': device_profile,
+        'input_size': input_size,
+        'parallel': parallel,
+        'output_format': output_format,
+        'quality': quality,
+        'duration': round(duration, 2),
+        'finished': time.time()
+    }
+    
+    with history_lock:
+        history = load_conversion_history()
+        history.append(entry)
+        conversion_history = history[-HISTORY_SIZE:]
+        
+        try:
+            temp_file = f"{HISTORY_FILE}.{os.getpid()}.tmp"
+            with open(temp_file, 'w') as f:
+                json.dump(conversion_history, f)
+            os.replace(temp_file, HISTORY_FILE)
+        except Exception as e:
+            app.logger.error(f"Error saving conversion history: {str(e)}")
+
+def get_expected_duration(device_profile, input_size, parallel=False, output_format='pdf', quality='standard'):
+    """
+    Predict the duration of a conversion from the most similar previous ones.
+    Uses the conversions of the same output format, quality, profile and mode
+    closest in input size, falling back to other modes, then to all profiles and
+    then to other formats and qualities without history.
+    
+    Args:
+        device_profile (str): Device profile or None
+        input_size (int): Size of the input EPUB in bytes
+        parallel (bool): Whether the book is converted in parallel parts
+        output_format (str): 'pdf' or 'epub'
+        quality (str): 'standard' or 'draft'
+        
+    Returns:
+        float: Expected duration in seconds, or None without history
+    """
+    history = [entry for entry in conversion_history
+               if entry.get('output_format', 'pdf') == output_format
+               and entry.get('quality', 'standard') == quality] or conversion_history
+    entries = [entry for entry in history if entry['device_profile'] == device_profile]
+    entries = [entry for entry in entries if entry.get('parallel', False) == parallel] or entries or history
+    if not entries:
+        return None
+    nearest = sorted(entries, key=lambda entry: abs(entry['input_size'] - input_size))[:HISTORY_NEIGHBOURS]
+    return sum(entry['duration'] for entry in nearest) / len(nearest)
+
+def estimate_remaining_time(job_data, progress):
+    """
+    Estimate the remaining conversion time of a running job.
+    Calibre's percentages jump, so the rate observed so far is blended with the
+    historical estimate, trusting the observed rate more as progress grows.
+    
+    Args:
+        job_data (Job): Job record with started_time, input_size and device_profile
+        progress (int): Current progress percentage
+        
+    Returns:
+        float: Remaining seconds, or None if no estimate is possible yet
+    """
+    elapsed = time.time() - job_data.started_time
+    remaining = []
+    
+    expected = get_expected_duration(job_data.device_profile, job_data.input_size, job_data.parallel,
+                                     job_data.output_format, job_data.quality)
+    if expected is not None:
+        remaining.append((max(expected - elapsed, 0), 1 - progress / 100))
+    
+    if progress > 1 and elapsed > 0:
+        remaining.append((elapsed * (100 - progress) / progress, progress / 100))
+    
+    total_weight = sum(weight for _, weight in remaining)
+    if not total_weight:
+        return None
+    return sum(seconds * weight for seconds, weight in remaining) / total_weight
+
+def get_epub_metadata(input_path):
+    """
+    Extract author and title from epub file for better naming.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+        
     Returns:
         tuple: (author, title) strings formatted for filename use
     """
     try:
         metadata = subprocess.check_output(
-            ["ebook-meta", input_path],
+            [EBOOK_META_PATH, input_path],
             text=True, stderr=subprocess.STDOUT
         ).strip()
         
@@ -151,55 +1224,88 @@ def get_epub_metadata(input_path):
         app.logger.error(f"Error extracting metadata: {str(e)}")
         return "unknown", "ebook"
 
-def build_conversion_command(input_path, output_path, params):
+def build_conversion_command(input_path, output_path, params, verbosity=None, output_format='pdf'):
     """
     Build the command for ebook conversion with the given parameters.
+    An EPUB output is only normalized and slimmed: the PDF layout options do
+    not apply, embedded fonts are subset and no cover image is generated.
+    Draft parameters (see get_draft_params()) only skip font embedding and subsetting.
     
     Args:
         input_path (str): Path to input EPUB file
-        output_path (str): Path for output PDF file
+        output_path (str): Path for output file, its extension selects the format
         params (dict): Conversion parameters
+        verbosity (int, optional): Calibre output level, 0 = progress only,
+                                   1 = --verbose, 2 = --verbose --debug.
+                                   Defaults to CALIBRE_VERBOSITY
+        output_format (str): 'pdf' or 'epub'
         
     Returns:
         list: Command list for subprocess execution
     """
-    command = [
-        "ebook-convert",
-        input_path,
-        output_path,
-        "--verbose",
-        "--debug",
-        f"--input-profile={params['input_profile']}",
-        f"--output-profile={params['output_profile']}",
-        f"--base-font-size={params['base_font_size']}",
-        f"--pdf-default-font-size={params['default_font_size']}",
-        f"--pdf-mono-font-size={params['mono_font_size']}",
-        f"--custom-size={params['custom_size']}",
-        f"--unit={params['unit']}",
-        f"--pdf-sans-family={params['pdf_sans_family']}",
-        f"--pdf-serif-family={params['pdf_serif_family']}",
-        f"--pdf-mono-family={params['pdf_mono_family']}",
-        f"--pdf-standard-font={params['pdf_standard_font']}",
-        f"--pdf-page-margin-left={params['pdf_page_margin_left']}",
-        f"--pdf-page-margin-right={params['pdf_page_margin_right']}",
-        f"--pdf-page-margin-top={params['pdf_page_margin_top']}",
-        f"--pdf-page-margin-bottom={params['pdf_page_margin_bottom']}",
-        f"--change-justification={params['change_justification']}"
-    ]
+    if verbosity is None:
+        verbosity = CALIBRE_VERBOSITY
+    
+    if output_format == 'epub':
+        command = [
+            EBOOK_CONVERT_PATH,
+            input_path,
+            output_path,
+            f"--input-profile={params['input_profile']}",
+            f"--output-profile={params['output_profile']}",
+            f"--change-justification={params['change_justification']}",
+            "--no-default-epub-cover"
+        ]
+    else:
+        command = [
+            EBOOK_CONVERT_PATH,
+            input_path,
+            output_path,
+            f"--input-profile={params['input_profile']}",
+            f"--output-profile={params['output_profile']}",
+            f"--base-font-size={params['base_font_size']}",
+            f"--pdf-default-font-size={params['default_font_size']}",
+            f"--pdf-mono-font-size={params['mono_font_size']}",
+            f"--custom-size={params['custom_size']}",
+            f"--unit={params['unit']}",
+            f"--pdf-sans-family={params['pdf_sans_family']}",
+            f"--pdf-serif-family={params['pdf_serif_family']}",
+            f"--pdf-mono-family={params['pdf_mono_family']}",
+            f"--pdf-standard-font={params['pdf_standard_font']}",
+            f"--pdf-page-margin-left={params['pdf_page_margin_left']}",
+            f"--pdf-page-margin-right={params['pdf_page_margin_right']}",
+            f"--pdf-page-margin-top={params['pdf_page_margin_top']}",
+            f"--pdf-page-margin-bottom={params['pdf_page_margin_bottom']}",
+            f"--change-justification={params['change_justification']}"
+        ]
+        if params.get("embed_all_fonts", False):
+            command.append("--embed-all-fonts")
 
-    if params.get("embed_all_fonts", False):
-        command.append("--embed-all-fonts")
-    if params.get("subset_embedded_fonts", False):
+    if params.get("subset_embedded_fonts", False) or (output_format == 'epub' and not params.get("draft", False)):
         command.append("--subset-embedded-fonts")
     if params.get("unsmarten_punctuation", False):
         command.append("--unsmarten-punctuation")
     if params.get("preserve_cover_aspect_ratio", False):
         command.append("--preserve-cover-aspect-ratio")
+    
+    if verbosity >= 1:
+        command.append("--verbose")
+    if verbosity >= 2:
+        command.append("--debug")
         
     return command
 
 _last_completed_files_hash = None
 
+def serialize_completed_files():
+    """
+    Serialize the completed files for the completed files file.
+    
+    Returns:
+        str: JSON document
+    """
+    return json.dumps({job_id: entry.to_dict() for job_id, entry in list(completed_files.items())}, sort_keys=True)
+
 def get_completed_files_cache_key():
     """
     Generate a cache key based on the completed files state to prevent excessive writes.
@@ -207,7 +1313,7 @@ def get_completed_files_cache_key():
     Returns:
         str: MD5 hash of the completed files state
     """
-    return hashlib.md5(json.dumps(completed_files, sort_keys=True).encode()).hexdigest()
+    return hashlib.md5(serialize_completed_files().encode()).hexdigest()
 
 def save_completed_files():
     """
@@ -216,7 +1322,8 @@ def save_completed_files():
     """
     global _last_completed_files_hash
     
-    current_hash = get_completed_files_cache_key()
+    serialized = serialize_completed_files()
+    current_hash = hashlib.md5(serialized.encode()).hexdigest()
     if _last_completed_files_hash == current_hash:
         app.logger.debug("No change in completed files state, skipping save")
         return
@@ -224,12 +1331,113 @@ def save_completed_files():
     try:
         app.logger.debug(f"Saving {len(completed_files)} entries to {COMPLETED_FILES_FILE}")
         with open(COMPLETED_FILES_FILE, 'w') as f:
-            json.dump(completed_files, f)
+            f.write(serialized)
         _last_completed_files_hash = current_hash
         app.logger.debug(f"Saved {len(completed_files)} entries to {COMPLETED_FILES_FILE}")
     except Exception as e:
         app.logger.error(f"Error saving completed files: {str(e)}")
 
+def get_content_path(input_hash, client_id):
+    """
+    Get the path of an input in the content store.
+    Entries are scoped to the client that uploaded the file, so knowing the
+    hash of somebody else's book is not enough to convert and download it.
+    
+    Args:
+        input_hash (str): SHA-256 of the EPUB
+        client_id (str): Client that uploaded the file
+        
+    Returns:
+        str: Path below CONTENT_STORE_DIR
+    """
+    scope = hashlib.sha256((client_id or 'unknown').encode()).hexdigest()[:16]
+    return os.path.join(CONTENT_STORE_DIR, f"{scope}-{input_hash}.epub")
+
+def store_content(input_path, input_hash, client_id):
+    """
+    Keep an uploaded EPUB in the content store under its hash and uploader.
+    The file is hard linked when it is on the same file system and copied otherwise;
+    an input that is already stored only has its last use updated.
+    
+    Args:
+        input_path (str): Path of the uploaded EPUB
+        input_hash (str): SHA-256 of the EPUB
+        client_id (str): Client that uploaded the file
+    """
+    if not CONTENT_STORE_TTL:
+        return
+    
+    content_path = get_content_path(input_hash, client_id)
+    temp_path = f"{content_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        if os.path.exists(content_path):
+            os.utime(content_path)
+            return
+        try:
+            os.link(input_path, temp_path)
+        except OSError:
+            shutil.copyfile(input_path, temp_path)
+        os.replace(temp_path, content_path)
+        app.logger.debug(f"Stored input {input_hash} in the content store")
+    except OSError as e:
+        app.logger.warning(f"Could not add input {input_hash} to the content store: {str(e)}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+def copy_from_content_store(input_hash, client_id, target_path):
+    """
+    Create the input file of a job from the content store.
+    
+    Args:
+        input_hash (str): SHA-256 of the EPUB
+        client_id (str): Client whose uploads are searched
+        target_path (str): Path of the job's input file, replaced if it exists
+        
+    Returns:
+        bool: True if the client's input was in the store
+    """
+    content_path = get_content_path(input_hash, client_id)
+    link_path = f"{target_path}.link"
+    try:
+        os.utime(content_path)
+        try:
+            os.link(content_path, link_path)
+            os.replace(link_path, target_path)
+        except OSError:
+            shutil.copyfile(content_path, target_path)
+        return True
+    except OSError as e:
+        app.logger.info(f"Input {input_hash} is not available from the content store: {str(e)}")
+        return False
+
+def evict_content_store():
+    """
+    Remove inputs that have not been used for CONTENT_STORE_TTL seconds and,
+    while the store is larger than CONTENT_STORE_MAX_MB, the least recently used ones.
+    """
+    if not CONTENT_STORE_TTL:
+        return
+    
+    entries = []
+    for name in os.listdir(CONTENT_STORE_DIR):
+        path = os.path.join(CONTENT_STORE_DIR, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    
+    now = time.time()
+    total = 0
+    for mtime, size, path in sorted(entries, reverse=True):
+        total += size
+        if now - mtime >= CONTENT_STORE_TTL or (CONTENT_STORE_MAX_MB and total > CONTENT_STORE_MAX_MB * 1024 * 1024):
+            try:
+                os.remove(path)
+                app.logger.debug(f"Evicted {os.path.basename(path)} from the content store")
+            except OSError:
+                pass
+
 def job_cleaner():
     """
     Background thread function that cleans up completed/failed jobs after timeout.
@@ -241,49 +1449,278 @@ def job_cleaner():
             jobs_to_cleanup = []
             
             for job_id, job_data in list(conversion_progress.items()):
-                if 'completed_time' in job_data and job_data['status'] in ['completed', 'failed']:
-                    if current_time - job_data['completed_time'] >= JOB_TIMEOUT:
+                if job_data.completed_time is not None and job_data.status.finished:
+                    if current_time - job_data.completed_time >= JOB_TIMEOUT:
                         jobs_to_cleanup.append(job_id)
             
             for job_id in jobs_to_cleanup:
                 app.logger.debug(f"Cleaning up job {job_id} after timeout")
                 try:
-                    input_path = conversion_progress[job_id].get('input_path')
-                    output_path = conversion_progress[job_id].get('output_path')
+                    input_path = conversion_progress[job_id].input_path
+                    output_path = conversion_progress[job_id].output_path
+                    output_key = conversion_progress[job_id].output_key
                     
                     if input_path and os.path.exists(input_path):
                         os.remove(input_path)
                         app.logger.debug(f"Deleted temporary input file: {input_path}")
                     
-                    if output_path and os.path.exists(output_path):
-                        os.remove(output_path)
-                        app.logger.debug(f"Deleted temporary output file: {output_path}")
+                    output_shared = output_key and any(
+                        other_id != job_id and other.output_key == output_key
+                        for other_id, other in conversion_progress.items()
+                    )
+                    
+                    if output_shared:
+                        app.logger.debug(f"Output {output_key} is still used by a coalesced job, keeping it")
+                    else:
+                        if output_path and os.path.exists(output_path):
+                            os.remove(output_path)
+                            app.logger.debug(f"Deleted temporary output file: {output_path}")
+                        
+                        if output_key:
+                            storage.delete(output_key)
 
                 except Exception as e:
                     app.logger.error(f"Error while cleaning up files for job {job_id}: {str(e)}")
                 
                 del conversion_progress[job_id]
                 save_jobs()
-                del completed_files[job_id]
+                completed_files.pop(job_id, None)
                 save_completed_files()
+            
+            evict_content_store()
                 
         except Exception as e:
             app.logger.error(f"Error in job_cleaner: {str(e)}")
 
         time.sleep(30)
 
+WEBHOOK_SECRET = os.environ.get('WEBHOOK_SECRET', '')
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get('WEBHOOK_MAX_ATTEMPTS', 5))
+WEBHOOK_RETRY_DELAY = float(os.environ.get('WEBHOOK_RETRY_DELAY', 5))
+WEBHOOK_TIMEOUT = float(os.environ.get('WEBHOOK_TIMEOUT', 10))
+WEBHOOK_ALLOW_PRIVATE = os.environ.get('WEBHOOK_ALLOW_PRIVATE', 'false').lower() in ['true', '1', 'yes', 'y']
+WEBHOOK_SENDERS = 2
+
+webhook_schedule = []
+webhook_condition = threading.Condition()
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """
+    Report redirects of webhook receivers as errors instead of following them,
+    so a callback cannot be bounced to an address validate_callback_url() rejects.
+    """
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+webhook_opener = urllib.request.build_opener(NoRedirectHandler)
+
+def validate_callback_url(url):
+    """
+    Check that a callback URL can be used for webhooks.
+    Unless WEBHOOK_ALLOW_PRIVATE is set, the host must only resolve to public addresses.
+    
+    Args:
+        url (str): Callback URL
+        
+    Raises:
+        ValueError: If the URL is not an http(s) URL or points to a private address
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ['http', 'https'] or not parsed.hostname:
+        raise ValueError("callback_url must be an absolute http or https URL")
+    if WEBHOOK_ALLOW_PRIVATE:
+        return
+    
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or 443,
+                                                               proto=socket.IPPROTO_TCP)}
+    except socket.gaierror:
+        raise ValueError(f"callback_url host {parsed.hostname} cannot be resolved")
+    for address in addresses:
+        if not ipaddress.ip_address(address.split('%')[0]).is_global:
+            raise ValueError("callback_url must not point to a private or local address")
+
+def new_webhook(callback_url):
+    """
+    Create the delivery state of a job's completion webhook.
+    Must be called while handling the request, the download links are built from its URL.
+    
+    Args:
+        callback_url (str): Validated callback URL
+        
+    Returns:
+        dict: Webhook state stored on the job
+    """
+    return {
+        'url': callback_url,
+        'base_url': request.url_root.rstrip('/'),
+        'state': 'pending',
+        'attempts': 0
+    }
+
+def enqueue_webhook(job_id, due):
+    """
+    Schedule a webhook delivery.
+    
+    Args:
+        job_id (str): Job identifier
+        due (float): Time of the delivery attempt
+    """
+    with webhook_condition:
+        heapq.heappush(webhook_schedule, (due, job_id))
+        webhook_condition.notify()
+
+def schedule_webhooks(job_id):
+    """
+    Queue the completion notifications of a finished job and of the jobs coalesced with it.
+    
+    Args:
+        job_id (str): ID of the finished job
+    """
+    job_data = conversion_progress.get(job_id)
+    for target_id in [job_id] + (job_data.followers if job_data else []):
+        target = conversion_progress.get(target_id)
+        webhook = target.webhook if target else None
+        if webhook and webhook['state'] == 'pending':
+            webhook.update({'state': 'queued', 'worker': get_worker_id()})
+            mark_job_changed(target_id)
+            enqueue_webhook(target_id, time.time())
+
+def build_webhook_payload(job_id, job_data):
+    """
+    Build the notification body for a finished job.
+    
+    Args:
+        job_id (str): Job identifier
+        job_data (Job): Job record
+        
+    Returns:
+        dict: JSON payload
+    """
+    base_url = job_data.webhook['base_url']
+    payload = {
+        'event': f"job.{job_data.status}",
+        'job_id': job_id,
+        'status': job_data.status,
+        'message': job_data.message,
+        'completed_time': job_data.completed_time,
+        'status_url': f"{base_url}/api/v1/jobs/{job_id}/status"
+    }
+    if job_data.status == JobStatus.COMPLETED:
+        payload['download_url'] = f"{base_url}/api/v1/jobs/{job_id}/download"
+        payload['filename'] = get_download_name(job_id, job_data)
+    else:
+        payload['error_details'] = job_data.error_details
+        payload['failure_reason'] = job_data.failure_reason
+    if job_data.preview:
+        payload['preview'] = True
+    return payload
+
+def deliver_webhook(job_id):
+    """
+    Send the completion notification of a job and record the outcome.
+    The body is signed with HMAC-SHA256 over "<timestamp>.<body>" if WEBHOOK_SECRET is set.
+    Network errors, timeouts, 408, 429 and 5xx responses are retried with
+    exponential backoff up to WEBHOOK_MAX_ATTEMPTS times, other responses are final.
+    
+    Args:
+        job_id (str): Job identifier
+    """
+    job_data = conversion_progress.get(job_id)
+    if not job_data or not job_data.webhook or job_data.webhook['state'] != 'queued':
+        return
+    
+    webhook = job_data.webhook
+    body = json.dumps(build_webhook_payload(job_id, job_data)).encode()
+    timestamp = str(int(time.time()))
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'epub-to-pdf-webhook',
+        'X-Webhook-Id': job_id,
+        'X-Webhook-Event': f"job.{job_data.status}",
+        'X-Webhook-Timestamp': timestamp
+    }
+    if WEBHOOK_SECRET:
+        signature = hmac.new(WEBHOOK_SECRET.encode(), timestamp.encode() + b'.' + body, hashlib.sha256)
+        headers['X-Webhook-Signature'] = f"sha256={signature.hexdigest()}"
+    
+    webhook['attempts'] += 1
+    webhook['last_attempt'] = time.time()
+    status_code = None
+    retry = False
+    try:
+        validate_callback_url(webhook['url'])
+        webhook_request = urllib.request.Request(webhook['url'], data=body, headers=headers, method='POST')
+        with webhook_opener.open(webhook_request, timeout=WEBHOOK_TIMEOUT) as response:
+            status_code = response.status
+        error = None
+    except urllib.error.HTTPError as e:
+        status_code = e.code
+        error = f"HTTP {e.code} {e.reason}"
+        retry = e.code in [408, 429] or e.code >= 500
+    except ValueError as e:
+        error = str(e)
+    except OSError as e:
+        error = str(getattr(e, 'reason', e))
+        retry = True
+    
+    webhook['last_status'] = status_code
+    if error is None:
+        app.logger.info(f"Delivered webhook for job {job_id} to {webhook['url']}")
+        webhook.update({'state': 'delivered', 'delivered_time': time.time(), 'last_error': None, 'next_attempt': None})
+    elif retry and webhook['attempts'] < WEBHOOK_MAX_ATTEMPTS:
+        delay = WEBHOOK_RETRY_DELAY * 2 ** (webhook['attempts'] - 1) * random.uniform(1, 1.2)
+        app.logger.warning(f"Webhook for job {job_id} failed ({error}), retrying in {delay:.0f}s")
+        webhook.update({'last_error': error, 'next_attempt': round(time.time() + delay, 1)})
+        enqueue_webhook(job_id, time.time() + delay)
+    else:
+        app.logger.error(f"Giving up on webhook for job {job_id} after {webhook['attempts']} attempts: {error}")
+        webhook.update({'state': 'failed', 'last_error': error, 'next_attempt': None})
+    mark_job_changed(job_id)
+    save_jobs()
+
+def webhook_sender():
+    """
+    Background thread function that delivers scheduled webhooks when they are due.
+    """
+    while True:
+        with webhook_condition:
+            while not webhook_schedule or webhook_schedule[0][0] > time.time():
+                webhook_condition.wait(webhook_schedule[0][0] - time.time() if webhook_schedule else None)
+            _, job_id = heapq.heappop(webhook_schedule)
+        
+        try:
+            deliver_webhook(job_id)
+        except Exception as e:
+            app.logger.error(f"Error in webhook_sender: {str(e)}")
+
 conversion_progress = load_saved_jobs()
 completed_files = load_completed_files()
+conversion_history = load_conversion_history()[-HISTORY_SIZE:]
 
 _last_jobs_hash = get_job_cache_key() if conversion_progress else None
 _last_completed_files_hash = get_completed_files_cache_key() if completed_files else None
-app.logger.debug(f"Initialized with {len(conversion_progress)} jobs and {len(completed_files)} completed files")
+app.logger.debug(f"Initialized with {len(conversion_progress)} jobs, {len(completed_files)} completed files "
+                 f"and {len(conversion_history)} history entries")
 
 cleaner_thread = threading.Thread(target=job_cleaner)
 cleaner_thread.daemon = True
 cleaner_thread.start()
 app.logger.info("Started job cleaner thread")
 
+for queue, count in [(conversion_queue, MAX_CONCURRENT_CONVERSIONS), (preview_queue, PREVIEW_CONCURRENCY)]:
+    for _ in range(count):
+        dispatcher_thread = threading.Thread(target=conversion_dispatcher, args=(queue,))
+        dispatcher_thread.daemon = True
+        dispatcher_thread.start()
+app.logger.info(f"Started {MAX_CONCURRENT_CONVERSIONS} conversion and {PREVIEW_CONCURRENCY} preview dispatcher threads")
+
+for _ in range(WEBHOOK_SENDERS):
+    sender_thread = threading.Thread(target=webhook_sender)
+    sender_thread.daemon = True
+    sender_thread.start()
+
 def get_env_params(prefix, defaults):
     """
     Load parameters from environment variables with fallback to defaults.
@@ -356,20 +1793,217 @@ BOOX_AIR_4C_DEFAULT = {
 
 BOOX_AIR_4C_PARAMS = get_env_params("BOOX_AIR_4C", BOOX_AIR_4C_DEFAULT)
 
-@cache.memoize(timeout=60)
-def get_calibre_version():
+DEVICE_PROFILE_PREFIXES = {
+    "reMarkable": "REMARKABLE",
+    "boox_air_4c": "BOOX_AIR_4C",
+}
+
+def get_profile_option(device_profile, key, default):
     """
-    Get and cache Calibre version to avoid repeated calls.
+    Get a per-profile option that is not a Calibre parameter.
+    Looks up PREFIX_KEY for the device profile, e.g. REMARKABLE_TIMEOUT_FACTOR.
     
+    Args:
+        device_profile (str): Device profile name
+        key (str): Option name
+        default: Value if the option is not set
+        
     Returns:
-        str: Calibre version string or "Unknown" on error
+        str: Option value from the environment or the default
+    """
+    prefix = DEVICE_PROFILE_PREFIXES.get(device_profile)
+    if prefix is None:
+        return default
+    return os.environ.get(f"{prefix}_{key.upper()}", default)
+
+def get_output_format(device_profile, requested=None):
+    """
+    Resolve the output format of a conversion.
+    An explicitly requested format wins over the OUTPUT_FORMAT option of the device profile.
+    
+    Args:
+        device_profile (str): Device profile name
+        requested (str, optional): Format given with the upload, empty for the profile default
+        
+    Returns:
+        str: Key of OUTPUT_FORMATS
+        
+    Raises:
+        ValueError: If the format is not supported
+    """
+    output_format = (requested or get_profile_option(device_profile, 'output_format', 'pdf')).lower()
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"output_format must be one of {', '.join(OUTPUT_FORMATS)}")
+    return output_format
+
+def get_quality(requested):
+    """
+    Validate the quality tier requested with an upload.
+    
+    Args:
+        requested (str): 'standard', 'draft' or empty to decide by queue depth
+        
+    Returns:
+        str: Quality tier, or None to decide by queue depth
+        
+    Raises:
+        ValueError: If the tier is not supported
+    """
+    if not requested:
+        return None
+    quality = requested.lower()
+    if quality not in QUALITY_TIERS:
+        raise ValueError(f"quality must be one of {', '.join(QUALITY_TIERS)}")
+    return quality
+
+def get_draft_params(params):
+    """
+    Derive the parameters of a draft conversion.
+    Fonts are neither embedded nor subset; page size, margins and font
+    sizes stay those of the profile, so the layout matches a standard conversion.
+    
+    Args:
+        params (dict): Conversion parameters
+        
+    Returns:
+        dict: New parameters with the draft flag set
+    """
+    return dict(params, embed_all_fonts=False, subset_embedded_fonts=False, draft=True)
+
+def get_output_mimetype(filename):
+    """
+    Get the content type of a converted file from its extension.
+    
+    Args:
+        filename (str): Name or path of the file
+        
+    Returns:
+        str: MIME type
+    """
+    return OUTPUT_FORMATS.get(os.path.splitext(filename)[1][1:].lower(), 'application/octet-stream')
+
+def get_static_fact(key, compute):
+    """
+    Get a value that never changes while the application runs.
+    The value is computed by the first worker that needs it and shared with
+    the other workers through the cache backend without expiry.
+    
+    Args:
+        key (str): Cache key for the value
+        compute (callable): Function computing the value, returns None on error
+        
+    Returns:
+        The cached or freshly computed value, or None if it could not be computed
+    """
+    try:
+        value = cache.get(key)
+        if value is not None:
+            return value
+    except Exception as e:
+        app.logger.warning(f"Error reading {key} from cache: {str(e)}")
+    
+    value = compute()
+    if value is not None:
+        try:
+            cache.set(key, value, timeout=0)
+        except Exception as e:
+            app.logger.warning(f"Error writing {key} to cache: {str(e)}")
+    return value
+
+def _query_calibre_version():
+    """
+    Ask ebook-convert for its version.
+    
+    Returns:
+        str: Calibre version string or None on error
     """
     try:
-        return subprocess.check_output(["ebook-convert", "--version"], 
+        return subprocess.check_output([EBOOK_CONVERT_PATH, "--version"], 
                                     text=True, stderr=subprocess.STDOUT).strip()
     except Exception as e:
         app.logger.error(f"Error checking Calibre version: {str(e)}")
-        return "Unknown"
+        return None
+
+def _query_installed_fonts():
+    """
+    List the installed font files with fc-list.
+    
+    Returns:
+        list: Font file paths or None on error
+    """
+    try:
+        fonts_output = subprocess.check_output(["fc-list"], text=True).strip()
+        return [line.split(":")[0] for line in fonts_output.split("\n")]
+    except Exception as e:
+        app.logger.error(f"Error listing fonts: {str(e)}")
+        return None
+
+@lru_cache(maxsize=None)
+def get_calibre_version():
+    """
+    Get the Calibre version once per process.
+    
+    Returns:
+        str: Calibre version string or "Unknown" on error
+    """
+    return get_static_fact('calibre_version', _query_calibre_version) or "Unknown"
+
+@lru_cache(maxsize=None)
+def get_installed_fonts():
+    """
+    Get the list of installed font files once per process.
+    
+    Returns:
+        tuple: Font file paths, empty if fc-list is not available
+    """
+    return tuple(get_static_fact('installed_fonts', _query_installed_fonts) or [])
+
+app.logger.info(f"Calibre version: {get_calibre_version()}")
+app.logger.debug(f"Found {len(get_installed_fonts())} installed fonts")
+
+def mark_job_changed(job_id):
+    """
+    Increase the version of a job record and wake up requests waiting for it to change.
+    
+    Args:
+        job_id (str): Job identifier
+    """
+    with job_changed:
+        job_data = conversion_progress.get(job_id)
+        if job_data is not None:
+            job_data.version += 1
+            job_changed.notify_all()
+
+def get_job_version(job_id):
+    """
+    Get the version of a job record.
+    
+    Args:
+        job_id (str): Job identifier
+        
+    Returns:
+        int: Version, or None if the job is not known
+    """
+    job_data = conversion_progress.get(job_id)
+    return job_data.version if job_data is not None else None
+
+def wait_for_job_changes(versions, timeout):
+    """
+    Block until the version of one of the jobs differs from the given one or the timeout elapses.
+    Jobs run by other workers are followed through the saved jobs file.
+    
+    Args:
+        versions (dict): Job IDs mapped to the version the client already has
+        timeout (float): Maximum time to wait in seconds
+    """
+    deadline = time.time() + timeout
+    while True:
+        with job_changed:
+            remaining = deadline - time.time()
+            if remaining <= 0 or any(get_job_version(job_id) != version for job_id, version in versions.items()):
+                return
+            job_changed.wait(min(remaining, 1.0))
+        refresh_jobs(versions)
 
 def update_job_status(job_id, status=None, progress=None, message=None, error_details=None, completed_time=None):
     """
@@ -378,40 +2012,888 @@ def update_job_status(job_id, status=None, progress=None, message=None, error_de
     
     Args:
         job_id (str): ID of the job to update
-        status (str, optional): New job status
+        status (JobStatus, optional): New job status
         progress (int, optional): Progress percentage (0-100)
         message (str, optional): Status message
         error_details (str, optional): Error information
         completed_time (float, optional): Timestamp of job completion
     """
-    if job_id not in conversion_progress:
+    job_data = conversion_progress.get(job_id)
+    if job_data is None:
         return
         
     if status is not None:
-        conversion_progress[job_id]['status'] = status
+        job_data.status = JobStatus(status)
     if progress is not None:
-        conversion_progress[job_id]['progress'] = progress
+        job_data.progress = progress
     if message is not None:
-        conversion_progress[job_id]['message'] = message
+        job_data.message = message
     if error_details is not None:
-        conversion_progress[job_id]['error_details'] = error_details
+        job_data.error_details = error_details
     if completed_time is not None:
-        conversion_progress[job_id]['completed_time'] = completed_time
+        job_data.completed_time = completed_time
     
-    if status in ['completed', 'failed', 'running'] or progress == 100:
+    sync_followers(job_id)
+    if status is not None and job_data.status.finished:
+        schedule_webhooks(job_id)
+    mark_job_changed(job_id)
+    
+    if status is not None or progress == 100:
         save_jobs()
 
-def run_conversion(command, job_id, input_path, output_path):
+FOLLOWER_FIELDS = ['status', 'progress', 'message', 'error_details', 'failure_reason', 'completed_time',
+                   'output_key', 'started_time', 'estimated_completion', 'rate', 'parallel']
+
+def sync_followers(job_id):
     """
-    Run the conversion process for an EPUB file.
-    Executes the conversion command, tracks progress, and updates job status.
+    Mirror the state of a conversion onto the jobs coalesced with it.
+    Completed followers get their own completed_files entry for the shared output.
     
     Args:
-        command (list): Command to execute
-        job_id (str): Job identifier
-        input_path (str): Path to input EPUB file
+        job_id (str): ID of the leading job
+    """
+    job_data = conversion_progress.get(job_id)
+    if not job_data or not job_data.followers:
+        return
+    
+    for follower_id in job_data.followers:
+        follower = conversion_progress.get(follower_id)
+        if follower is None:
+            continue
+        
+        for name in FOLLOWER_FIELDS:
+            setattr(follower, name, getattr(job_data, name))
+        
+        mark_job_changed(follower_id)
+        
+        if follower.status == JobStatus.COMPLETED and follower.output_key:
+            completed_files[follower_id] = CompletedFile(follower.output_key, follower.author or 'unknown',
+                                                         follower.title or 'ebook', follower.output_format)
+    
+    if job_data.status == JobStatus.COMPLETED:
+        save_completed_files()
+
+def release_coalescing_key(job_id):
+    """
+    Stop attaching new uploads to a conversion once it has finished.
+    
+    Args:
+        job_id (str): ID of the leading job
+    """
+    job_data = conversion_progress.get(job_id)
+    key = job_data.coalescing_key if job_data else None
+    with inflight_lock:
+        if key and inflight_conversions.get(key) == job_id:
+            del inflight_conversions[key]
+    if key:
+        with open(INFLIGHT_LOCK_FILE, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if read_inflight_marker(key)[0] == job_id:
+                os.remove(os.path.join(INFLIGHT_DIR, key))
+
+def read_inflight_marker(coalescing_key):
+    """
+    Read the marker a worker leaves in INFLIGHT_DIR while it converts a coalescing key.
+    
+    Args:
+        coalescing_key (str): Key from get_coalescing_key()
+        
+    Returns:
+        tuple: (job ID, worker ID), both None if there is no marker
+    """
+    try:
+        with open(os.path.join(INFLIGHT_DIR, coalescing_key)) as f:
+            job_id, worker = f.read().split()
+        return job_id, worker
+    except (OSError, ValueError):
+        return None, None
+
+def claim_coalescing_key(coalescing_key, job_id):
+    """
+    Register a conversion with all gunicorn workers.
+    The in-memory inflight_conversions only covers the current worker, so the
+    leading job of every key is also recorded in a marker file; markers of
+    workers that no longer run are taken over.
+    
+    Args:
+        coalescing_key (str): Key from get_coalescing_key()
+        job_id (str): ID of the job that converts the key
+        
+    Returns:
+        str: ID of the job another worker is running for the key, None if the key was claimed
+    """
+    with open(INFLIGHT_LOCK_FILE, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        leader_id, worker = read_inflight_marker(coalescing_key)
+        if leader_id and leader_id != job_id and worker != get_worker_id() and is_worker_alive(worker):
+            return leader_id
+        with open(os.path.join(INFLIGHT_DIR, coalescing_key), 'w') as f:
+            f.write(f"{job_id} {get_worker_id()}")
+    return None
+
+def follow_remote_conversion(job_id):
+    """
+    Background thread function that mirrors a conversion running in another worker onto a job.
+    The leading job is followed through the saved jobs file. The job keeps its
+    own upload, so it is converted by this worker if the other worker dies or
+    the leading job does not show up in the file within CONVERSION_STALL_TIMEOUT seconds.
+    
+    Args:
+        job_id (str): ID of the job with coalesced_with set to the leading job
+    """
+    job_data = conversion_progress[job_id]
+    leader_id = job_data.coalesced_with
+    started = time.time()
+    version = None
+    
+    while True:
+        wait_for_job_changes({leader_id: version}, EVENT_STREAM_HEARTBEAT)
+        leader = conversion_progress.get(leader_id)
+        if leader is None:
+            marker_id, marker_worker = read_inflight_marker(job_data.coalescing_key)
+            lost = time.time() - started >= CONVERSION_STALL_TIMEOUT \
+                or (marker_id == leader_id and not is_worker_alive(marker_worker))
+        else:
+            lost = not leader.status.finished and not is_worker_alive(leader.worker)
+        
+        if lost:
+            app.logger.warning(f"Lost running job {leader_id}, converting job {job_id} in this worker")
+            job_data.coalesced_with = None
+            job_data.status = JobStatus.QUEUED
+            job_data.progress = 0
+            job_data.message = 'Waiting for a free conversion slot...'
+            mark_job_changed(job_id)
+            save_jobs()
+            with inflight_lock:
+                inflight_conversions[job_data.coalescing_key] = job_id
+            claim_coalescing_key(job_data.coalescing_key, job_id)
+            enqueue_conversion(job_id)
+            return
+        
+        if leader is None or leader.version == version:
+            continue
+        version = leader.version
+        for name in FOLLOWER_FIELDS:
+            setattr(job_data, name, getattr(leader, name))
+        mark_job_changed(job_id)
+        
+        if leader.status.finished:
+            for path in [job_data.input_path, job_data.output_path]:
+                if path and os.path.exists(path):
+                    os.remove(path)
+            job_data.input_path = job_data.output_path = None
+            if job_data.status == JobStatus.COMPLETED and job_data.output_key:
+                completed_files[job_id] = CompletedFile(job_data.output_key, job_data.author or 'unknown',
+                                                        job_data.title or 'ebook', job_data.output_format)
+                save_completed_files()
+            save_jobs()
+            schedule_webhooks(job_id)
+            return
+
+def execute_conversion(command, output_path, budget=0, on_progress=None, on_line=None, label=None, tmpdir=None):
+    """
+    Run a conversion command with resource limits and the watchdog.
+    The output is read in large chunks; unless on_line is given only the
+    progress lines are decoded and passed on, the rest is kept as a short tail.
+    
+    Args:
+        command (list): Command to execute
+        output_path (str): Path of the file being written
+        budget (float): Maximum runtime in seconds, 0 for no limit
+        on_progress (callable, optional): Called with (percent, line) for each progress line
+        on_line (callable, optional): Called with every output line for full capture
+        label (str, optional): Job ID or file name shown on the system info page
+        tmpdir (str, optional): Working directory for Calibre's temporary files
+        
+    Returns:
+        dict: 'returncode', 'output_tail' (last output lines), 'timeout' ((reason, details) or None)
+              and 'limit_hit' (exceeded resource limit or None)
+    """
+    command = get_io_priority_prefix() + command
+    process = subprocess.Popen(
+        command,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        bufsize=0,
+        start_new_session=True,
+        preexec_fn=apply_resource_limits,
+        env=dict(os.environ, TMPDIR=tmpdir) if tmpdir else None
+    )
+    
+    state = {
+        'started': time.time(),
+        'last_output': time.time(),
+        'budget': budget
+    }
+    monitor_thread = threading.Thread(
+        target=monitor_conversion,
+        args=(process, output_path, state)
+    )
+    monitor_thread.daemon = True
+    monitor_thread.start()
+    active_processes[process.pid] = {'label': label or os.path.basename(output_path), 'started': state['started']}
+    
+    try:
+        tail = read_conversion_output(process, state, on_progress, on_line)
+        returncode = process.wait()
+    finally:
+        active_processes.pop(process.pid, None)
+    app.logger.debug(f"Process completed with return code: {returncode}")
+    
+    output_tail = [line.strip() for line in tail.decode('utf-8', errors='replace').replace('\r', '\n').split('\n')
+                   if line.strip()]
+    
+    limit_hit = state.get('limit_hit')
+    if not limit_hit and 'timeout' not in state:
+        if returncode != 0:
+            limit_hit = get_limit_violation(returncode, output_tail[-50:])
+        elif CONVERSION_MAX_OUTPUT_MB and os.path.exists(output_path) \
+                and os.path.getsize(output_path) > CONVERSION_MAX_OUTPUT_MB * 1024 * 1024:
+            limit_hit = f"output size (above {CONVERSION_MAX_OUTPUT_MB} MB)"
+    
+    return {
+        'returncode': returncode,
+        'output_tail': output_tail,
+        'timeout': state.get('timeout'),
+        'limit_hit': limit_hit
+    }
+
+def read_conversion_output(process, state, on_progress=None, on_line=None):
+    """
+    Read the output of a conversion process until it closes its pipe.
+    
+    Args:
+        process (subprocess.Popen): Conversion process with a binary stdout pipe
+        state (dict): Watchdog state, 'last_output' is updated on every chunk
+        on_progress (callable, optional): Called with (percent, line) for each progress line
+        on_line (callable, optional): Called with every output line
+        
+    Returns:
+        bytes: Last OUTPUT_TAIL_SIZE bytes of the output
+    """
+    fd = process.stdout.fileno()
+    tail = b''
+    pending = b''
+    
+    while True:
+        chunk = os.read(fd, OUTPUT_CHUNK_SIZE)
+        if not chunk:
+            break
+        state['last_output'] = time.time()
+        tail = (tail + chunk)[-OUTPUT_TAIL_SIZE:]
+        
+        data = pending + chunk.replace(b'\r', b'\n')
+        cut = data.rfind(b'\n') + 1
+        lines, pending = data[:cut], data[cut:][-OUTPUT_TAIL_SIZE:]
+        
+        if on_line is not None:
+            for line in lines.decode('utf-8', errors='replace').split('\n'):
+                if line.strip():
+                    on_line(line.strip())
+        if on_progress is not None:
+            for match in PROGRESS_LINE_PATTERN.finditer(lines):
+                on_progress(int(match.group(1)), match.group(0).decode('utf-8', errors='replace').strip())
+    
+    process.stdout.close()
+    return tail
+
+OPF_NS = 'http://www.idpf.org/2007/opf'
+NCX_NS = 'http://www.daisy.org/z3986/2005/ncx/'
+XHTML_NS = 'http://www.w3.org/1999/xhtml'
+OPS_NS = 'http://www.idpf.org/2007/ops'
+CONTAINER_NS = 'urn:oasis:names:tc:opendocument:xmlns:container'
+NCX_MEDIA_TYPE = 'application/x-dtbncx+xml'
+CHUNK_LINK_PREFIX = 'https://epub-chunk.invalid/'
+CHUNK_LABEL_PREFIX = 'epub-chunk:'
+HREF_PATTERN = re.compile(rb"""(\bhref\s*=\s*)(["'])(.*?)\2""", re.IGNORECASE | re.DOTALL)
+
+ElementTree.register_namespace('opf', OPF_NS)
+ElementTree.register_namespace('dc', 'http://purl.org/dc/elements/1.1/')
+ElementTree.register_namespace('ncx', NCX_NS)
+
+def resolve_epub_href(base_path, href):
+    """
+    Resolve a relative link inside an EPUB to a path in the archive.
+    
+    Args:
+        base_path (str): Archive path of the document containing the link
+        href (str): Link target
+        
+    Returns:
+        tuple: (archive path, fragment) or None for external links
+    """
+    path, _, fragment = href.partition('#')
+    if re.match(r'^[a-zA-Z][a-zA-Z0-9+.-]*:', path) or path.startswith('/'):
+        return None
+    if not path:
+        return base_path, fragment
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_path), unquote(path))), fragment
+
+def read_epub_structure(epub):
+    """
+    Read the package document, spine and table of contents of an EPUB.
+    
+    Args:
+        epub (zipfile.ZipFile): Opened EPUB
+        
+    Returns:
+        dict: 'opf_path', 'opf' (ElementTree), 'manifest' (id -> (path, media type)),
+              'spine' (list of archive paths) and 'toc' (list of (depth, title, target))
+    """
+    container = ElementTree.fromstring(epub.read('META-INF/container.xml'))
+    opf_path = container.find(f'.//{{{CONTAINER_NS}}}rootfile').get('full-path')
+    opf = ElementTree.ElementTree(ElementTree.fromstring(epub.read(opf_path)))
+    
+    manifest = {}
+    for item in opf.getroot().iter(f'{{{OPF_NS}}}item'):
+        manifest[item.get('id')] = (resolve_epub_href(opf_path, item.get('href'))[0], item.get('media-type'),
+                                    item.get('properties', ''))
+    
+    spine_element = opf.getroot().find(f'{{{OPF_NS}}}spine')
+    spine = [manifest[itemref.get('idref')][0] for itemref in spine_element.iter(f'{{{OPF_NS}}}itemref')
+             if itemref.get('idref') in manifest]
+    
+    toc = []
+    ncx_id = spine_element.get('toc')
+    nav = next((path for path, _, properties in manifest.values() if 'nav' in properties.split()), None)
+    
+    if ncx_id in manifest:
+        ncx_path = manifest[ncx_id][0]
+        
+        def walk_ncx(element, depth):
+            for nav_point in element.findall(f'{{{NCX_NS}}}navPoint'):
+                title = ''.join(nav_point.find(f'{{{NCX_NS}}}navLabel').itertext()).strip()
+                target = resolve_epub_href(ncx_path, nav_point.find(f'{{{NCX_NS}}}content').get('src'))
+                if target:
+                    toc.append((depth, title, '#'.join(filter(None, target))))
+                walk_ncx(nav_point, depth + 1)
+        
+        walk_ncx(ElementTree.fromstring(epub.read(ncx_path)).find(f'{{{NCX_NS}}}navMap'), 0)
+    elif nav:
+        def walk_nav(element, depth):
+            for entry in element.findall(f'{{{XHTML_NS}}}li'):
+                link = entry.find(f'{{{XHTML_NS}}}a')
+                target = resolve_epub_href(nav, link.get('href', '')) if link is not None else None
+                if target:
+                    toc.append((depth, ''.join(link.itertext()).strip(), '#'.join(filter(None, target))))
+                for sublist in entry.findall(f'{{{XHTML_NS}}}ol'):
+                    walk_nav(sublist, depth + 1)
+        
+        for element in ElementTree.fromstring(epub.read(nav)).iter(f'{{{XHTML_NS}}}nav'):
+            if element.get(f'{{{OPS_NS}}}type') == 'toc':
+                for ordered_list in element.findall(f'{{{XHTML_NS}}}ol'):
+                    walk_nav(ordered_list, 0)
+    
+    return {'opf_path': opf_path, 'opf': opf, 'manifest': manifest, 'spine': spine, 'toc': toc}
+
+def split_spine(epub, spine, chunk_count):
+    """
+    Split the spine into contiguous chunks of similar size.
+    
+    Args:
+        epub (zipfile.ZipFile): Opened EPUB
+        spine (list): Archive paths of the spine documents
+        chunk_count (int): Maximum number of chunks
+        
+    Returns:
+        list: Lists of archive paths, one per chunk
+    """
+    sizes = [epub.getinfo(path).file_size if path in epub.namelist() else 0 for path in spine]
+    target = sum(sizes) / min(chunk_count, len(spine))
+    
+    chunks = [[]]
+    accumulated = 0
+    for index, (path, size) in enumerate(zip(spine, sizes)):
+        remaining_items = len(spine) - index
+        remaining_chunks = chunk_count - len(chunks)
+        if chunks[-1] and remaining_chunks > 0 and (accumulated >= target * len(chunks)
+                                                     or remaining_items <= remaining_chunks):
+            chunks.append([])
+        chunks[-1].append(path)
+        accumulated += size
+    return chunks
+
+def rewrite_chunk_links(data, doc_path, foreign_docs, targets=None):
+    """
+    Replace links to documents of other chunks with CHUNK_LINK_PREFIX URLs.
+    Calibre keeps these as external links, which merge_chunk_pdfs() turns
+    back into internal links once all parts are merged.
+    
+    Args:
+        data (bytes): Content of the document
+        doc_path (str): Archive path of the document
+        foreign_docs (set): Archive paths of the documents in other chunks
+        targets (set, optional): Collects the rewritten targets
+        
+    Returns:
+        bytes: Document with rewritten links
+    """
+    def replace(match):
+        resolved = resolve_epub_href(doc_path, match.group(3).decode('utf-8', errors='replace'))
+        if not resolved or resolved[0] not in foreign_docs:
+            return match.group(0)
+        target = '#'.join(filter(None, resolved))
+        if targets is not None:
+            targets.add(target)
+        return match.group(1) + match.group(2) + (CHUNK_LINK_PREFIX + quote(target)).encode() + match.group(2)
+    
+    return HREF_PATTERN.sub(replace, data)
+
+def build_chunk_ncx(entries, opf_path):
+    """
+    Build the table of contents of a chunk.
+    split_epub() labels every entry with CHUNK_LABEL_PREFIX and a key, so the
+    page Calibre puts it on can be read back from the outline of the chunk's PDF.
+    
+    Args:
+        entries (list): (label, archive path with optional fragment) tuples
+        opf_path (str): Archive path of the package document
+        
+    Returns:
+        bytes: NCX document
+    """
+    ncx = ElementTree.Element(f'{{{NCX_NS}}}ncx', {'version': '2005-1'})
+    ElementTree.SubElement(ncx, f'{{{NCX_NS}}}head')
+    ElementTree.SubElement(ElementTree.SubElement(ncx, f'{{{NCX_NS}}}docTitle'), f'{{{NCX_NS}}}text').text = 'Part'
+    nav_map = ElementTree.SubElement(ncx, f'{{{NCX_NS}}}navMap')
+    
+    for order, (text, target) in enumerate(entries, 1):
+        path, _, fragment = target.partition('#')
+        src = quote(posixpath.relpath(path, posixpath.dirname(opf_path) or '.')) + (f'#{fragment}' if fragment else '')
+        nav_point = ElementTree.SubElement(nav_map, f'{{{NCX_NS}}}navPoint',
+                                           {'id': f'epub-chunk-{order}', 'playOrder': str(order)})
+        label = ElementTree.SubElement(nav_point, f'{{{NCX_NS}}}navLabel')
+        ElementTree.SubElement(label, f'{{{NCX_NS}}}text').text = text
+        ElementTree.SubElement(nav_point, f'{{{NCX_NS}}}content', {'src': src})
+    
+    return ElementTree.tostring(ncx, xml_declaration=True, encoding='utf-8')
+
+def build_chunk_opf(structure, chunk_docs, foreign_docs, is_first):
+    """
+    Build the package document of a chunk.
+    Only the chunk's documents stay in the spine and manifest, the table of
+    contents is replaced and later chunks lose the cover so it is rendered once.
+    
+    Args:
+        structure (dict): Result of read_epub_structure()
+        chunk_docs (list): Archive paths of the chunk's spine documents
+        foreign_docs (set): Archive paths of the documents in other chunks
+        is_first (bool): Whether this is the first chunk
+        
+    Returns:
+        bytes: Package document
+    """
+    root = ElementTree.fromstring(ElementTree.tostring(structure['opf'].getroot()))
+    manifest = root.find(f'{{{OPF_NS}}}manifest')
+    spine = root.find(f'{{{OPF_NS}}}spine')
+    
+    for item in list(manifest):
+        item_path, media_type, properties = structure['manifest'].get(item.get('id'), (None, None, ''))
+        if item_path in foreign_docs or media_type == NCX_MEDIA_TYPE:
+            manifest.remove(item)
+            continue
+        kept = [name for name in properties.split() if name != 'nav' and (is_first or name != 'cover-image')]
+        if kept:
+            item.set('properties', ' '.join(kept))
+        elif 'properties' in item.attrib:
+            del item.attrib['properties']
+    
+    ElementTree.SubElement(manifest, f'{{{OPF_NS}}}item', {
+        'id': 'epub-chunk-toc', 'href': 'epub-chunk-toc.ncx', 'media-type': NCX_MEDIA_TYPE
+    })
+    
+    chunk_doc_set = set(chunk_docs)
+    for itemref in list(spine):
+        if structure['manifest'].get(itemref.get('idref'), (None,))[0] not in chunk_doc_set:
+            spine.remove(itemref)
+    spine.set('toc', 'epub-chunk-toc')
+    
+    if not is_first:
+        metadata = root.find(f'{{{OPF_NS}}}metadata')
+        for meta in list(metadata):
+            if meta.get('name') == 'cover':
+                metadata.remove(meta)
+        guide = root.find(f'{{{OPF_NS}}}guide')
+        if guide is not None:
+            root.remove(guide)
+    
+    return ElementTree.tostring(root, xml_declaration=True, encoding='utf-8')
+
+def split_epub(input_path, work_dir, chunk_count):
+    """
+    Split an EPUB into independent EPUBs along its spine.
+    Each chunk keeps all resources but only its own spine documents.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+        work_dir (str): Directory for the chunk files
+        chunk_count (int): Maximum number of chunks
+        
+    Returns:
+        tuple: (list of chunk paths, original table of contents)
+    """
+    with zipfile.ZipFile(input_path) as epub:
+        structure = read_epub_structure(epub)
+        spine = structure['spine']
+        if len(spine) < 2:
+            return [], structure['toc']
+        
+        chunks = split_spine(epub, spine, chunk_count)
+        chunk_of = {path: index for index, chunk in enumerate(chunks) for path in chunk}
+        
+        contents = {}
+        link_targets = set()
+        for index, chunk in enumerate(chunks):
+            foreign_docs = set(spine) - set(chunk)
+            for path in chunk:
+                if path in epub.namelist():
+                    contents[path] = rewrite_chunk_links(epub.read(path), path, foreign_docs, link_targets)
+        
+        chunk_paths = []
+        for index, chunk in enumerate(chunks):
+            entries = [(f"{CHUNK_LABEL_PREFIX}file:{path}", path) for path in chunk]
+            entries += [(f"{CHUNK_LABEL_PREFIX}toc:{number}", target)
+                        for number, (_, _, target) in enumerate(structure['toc'])
+                        if chunk_of.get(target.partition('#')[0]) == index]
+            entries += [(f"{CHUNK_LABEL_PREFIX}link:{target}", target) for target in sorted(link_targets)
+                        if chunk_of.get(target.partition('#')[0]) == index]
+            
+            chunk_path = os.path.join(work_dir, f"part{index + 1}.epub")
+            write_chunk_epub(epub, structure, chunk_path, chunk, contents, entries, index == 0)
+            chunk_paths.append(chunk_path)
+        
+        return chunk_paths, structure['toc']
+
+def write_chunk_epub(epub, structure, chunk_path, chunk_docs, contents, entries, is_first):
+    """
+    Write an EPUB that contains all resources of a book but only some of its spine documents.
+    
+    Args:
+        epub (zipfile.ZipFile): Opened source EPUB
+        structure (dict): Result of read_epub_structure()
+        chunk_path (str): Path of the EPUB to write
+        chunk_docs (list): Archive paths of the spine documents to keep
+        contents (dict): Archive paths mapped to replaced document content
+        entries (list): (label, target) tuples for the table of contents
+        is_first (bool): Whether the chunk starts the book and keeps the cover
+    """
+    foreign_docs = set(structure['spine']) - set(chunk_docs)
+    with zipfile.ZipFile(chunk_path, 'w', zipfile.ZIP_DEFLATED) as chunk_epub:
+        chunk_epub.writestr('mimetype', 'application/epub+zip', zipfile.ZIP_STORED)
+        for info in epub.infolist():
+            if info.filename in ('mimetype', structure['opf_path']) or info.filename in foreign_docs:
+                continue
+            chunk_epub.writestr(info.filename, contents.get(info.filename) or epub.read(info))
+        chunk_epub.writestr(structure['opf_path'], build_chunk_opf(structure, chunk_docs, foreign_docs, is_first))
+        chunk_epub.writestr(posixpath.join(posixpath.dirname(structure['opf_path']), 'epub-chunk-toc.ncx'),
+                            build_chunk_ncx(entries, structure['opf_path']))
+
+def build_preview_epub(input_path, output_path, item_count):
+    """
+    Write an EPUB with only the beginning of a book for a quick preview.
+    The first item_count spine documents of at least PREVIEW_MIN_ITEM_SIZE are
+    kept, together with the cover and title pages before them.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+        output_path (str): Path of the preview EPUB
+        item_count (int): Number of content documents to keep
+        
+    Returns:
+        int: Number of spine documents in the preview
+    """
+    with zipfile.ZipFile(input_path) as epub:
+        structure = read_epub_structure(epub)
+        spine = structure['spine']
+        names = set(epub.namelist())
+        
+        preview_docs = []
+        content_docs = 0
+        for path in spine:
+            if content_docs >= item_count:
+                break
+            preview_docs.append(path)
+            if path in names and epub.getinfo(path).file_size >= PREVIEW_MIN_ITEM_SIZE:
+                content_docs += 1
+        
+        if len(preview_docs) == len(spine):
+            shutil.copyfile(input_path, output_path)
+            return len(spine)
+        
+        kept = set(preview_docs)
+        entries = [(title, target) for _, title, target in structure['toc'] if target.partition('#')[0] in kept]
+        write_chunk_epub(epub, structure, output_path, preview_docs, {}, entries, True)
+        return len(preview_docs)
+
+def downscale_image(data, width, height):
+    """
+    Shrink an image to fit into the given size, keeping its aspect ratio and format.
+
+    Args:
+        data (bytes): Encoded image
+        width (int): Maximum width in pixels
+        height (int): Maximum height in pixels
+
+    Returns:
+        bytes: Encoded smaller image, or None if the image fits, is animated
+               or would not get smaller
+    """
+    from PIL import Image
+
+    with Image.open(io.BytesIO(data)) as image:
+        if (image.width <= width and image.height <= height) or getattr(image, 'is_animated', False):
+            return None
+        image_format = image.format
+        image.thumbnail((width, height), Image.LANCZOS)
+        output = io.BytesIO()
+        if image_format == 'JPEG':
+            image.save(output, image_format, quality=EPUB_JPEG_QUALITY, optimize=True)
+        else:
+            image.save(output, image_format, optimize=True)
+
+    return output.getvalue() if output.tell() < len(data) else None
+
+def downscale_epub_images(epub_path, custom_size):
+    """
+    Shrink the images of an EPUB that are larger than the screen of the device.
+    The EPUB is rewritten in place; images that cannot be decoded are kept.
+
+    Args:
+        epub_path (str): Path to the EPUB file
+        custom_size (str): Screen size as "<width>x<height>" in pixels
+
+    Returns:
+        int: Number of bytes saved
+    """
+    width, height = (int(value) for value in custom_size.lower().split('x'))
+    slim_path = f"{epub_path}.slim"
+    saved = 0
+
+    try:
+        with zipfile.ZipFile(epub_path) as epub, zipfile.ZipFile(slim_path, 'w') as slim_epub:
+            for info in epub.infolist():
+                data = epub.read(info)
+                if posixpath.splitext(info.filename)[1].lower() in EPUB_IMAGE_EXTENSIONS:
+                    try:
+                        scaled = downscale_image(data, width, height)
+                    except Exception as e:
+                        app.logger.warning(f"Could not downscale {info.filename}: {str(e)}")
+                        scaled = None
+                    if scaled is not None:
+                        saved += len(data) - len(scaled)
+                        data = scaled
+                slim_epub.writestr(info, data)
+        os.replace(slim_path, epub_path)
+    finally:
+        if os.path.exists(slim_path):
+            os.remove(slim_path)
+
+    return saved
+
+def merge_chunk_pdfs(pdf_paths, output_path, toc):
+    """
+    Merge the PDFs of all chunks into one document.
+    The outline is rebuilt from the book's table of contents and links between
+    chunks are pointed at their targets, using the positions Calibre recorded
+    for the labelled entries of each chunk's table of contents.
+    
+    Args:
+        pdf_paths (list): Chunk PDFs in book order
+        output_path (str): Path for the merged PDF
+        toc (list): (depth, title, target) entries of the original table of contents
+    """
+    from pypdf import PdfReader, PdfWriter
+    from pypdf.generic import ArrayObject, FloatObject, NameObject, NullObject, Fit
+    
+    writer = PdfWriter()
+    positions = {}
+    offset = 0
+    
+    for pdf_path in pdf_paths:
+        reader = PdfReader(pdf_path)
+        writer.append(reader, import_outline=False)
+        
+        pending = list(reader.outline)
+        while pending:
+            item = pending.pop()
+            if isinstance(item, list):
+                pending.extend(item)
+            elif item.title.startswith(CHUNK_LABEL_PREFIX):
+                left, top = item.get('/Left'), item.get('/Top')
+                positions.setdefault(item.title[len(CHUNK_LABEL_PREFIX):], (
+                    offset + reader.get_destination_page_number(item),
+                    float(left) if isinstance(left, (int, float)) else None,
+                    float(top) if isinstance(top, (int, float)) else None
+                ))
+        offset += len(reader.pages)
+    
+    def find_position(key, target):
+        return positions.get(key) or positions.get(f"file:{target.partition('#')[0]}")
+    
+    parents = []
+    for number, (depth, title, target) in enumerate(toc):
+        position = find_position(f"toc:{number}", target)
+        if position is None:
+            continue
+        parents = parents[:depth]
+        page, left, top = position
+        parents.append(writer.add_outline_item(
+            title, page, parent=parents[-1] if parents else None,
+            fit=Fit.xyz(left=left, top=top)
+        ))
+    
+    for page in writer.pages:
+        annotations = page.get('/Annots')
+        if not annotations:
+            continue
+        annotations = annotations.get_object()
+        for reference in list(annotations):
+            annotation = reference.get_object()
+            action = annotation.get('/A')
+            uri = str(action.get_object().get('/URI', '')) if action else ''
+            if not uri.startswith(CHUNK_LINK_PREFIX):
+                continue
+            
+            target = unquote(uri[len(CHUNK_LINK_PREFIX):])
+            position = find_position(f"link:{target}", target)
+            del annotation['/A']
+            if position is None:
+                annotations.remove(reference)
+                continue
+            
+            target_page, left, top = position
+            annotation[NameObject('/Dest')] = ArrayObject([
+                writer.pages[target_page].indirect_reference,
+                NameObject('/XYZ'),
+                FloatObject(left) if left is not None else NullObject(),
+                FloatObject(top) if top is not None else NullObject(),
+                NullObject()
+            ])
+    
+    with open(output_path, 'wb') as f:
+        writer.write(f)
+
+def should_convert_in_parallel(file_size, job_data, command):
+    """
+    Decide whether a conversion is split into parallel parts.
+    
+    Args:
+        file_size (int): Size of the input EPUB in bytes
+        job_data (Job): Job record
+        command (list): Single-process conversion command
+        
+    Returns:
+        bool: True if the book is above PARALLEL_THRESHOLD_MB and can be split
+    """
+    return bool(PARALLEL_THRESHOLD_MB) and PARALLEL_CHUNKS >= 2 \
+        and file_size >= PARALLEL_THRESHOLD_MB * 1024 * 1024 and job_data.output_format == 'pdf' \
+        and job_data.params is not None and not job_data.preview and '--debug' not in command
+
+def execute_parallel_conversion(input_path, output_path, params, budget=0, on_progress=None, label=None,
+                                tmpdir=None, verbosity=None, chunk_count=None, slots=None):
+    """
+    Convert an EPUB in up to PARALLEL_CHUNKS concurrent Calibre processes.
+    The spine is split into chunks of similar size, each chunk is converted
+    with the same parameters and the PDFs are merged.
+    With slots, every part after the first needs an idle slot, so the number
+    of parts is capped by the slots that are free when the conversion starts.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+        output_path (str): Path for the PDF file
+        params (dict): Conversion parameters
+        budget (float): Maximum runtime of each part in seconds, 0 for no limit
+        on_progress (callable, optional): Called with (percent, line) for the combined progress
+        label (str, optional): Job ID shown on the system info page
+        tmpdir (str, optional): Working directory for Calibre's temporary files
+        verbosity (int, optional): Calibre output level
+        chunk_count (int, optional): Number of parts, defaults to PARALLEL_CHUNKS
+        slots (threading.Semaphore, optional): Slot pool to borrow the extra parts from
+        
+    Returns:
+        dict: Same as execute_conversion(), or None if the book cannot be split,
+              no slot is free or a part failed
+    """
+    chunk_count = chunk_count or PARALLEL_CHUNKS
+    borrowed = 0
+    if slots:
+        while borrowed < chunk_count - 1 and slots.acquire(blocking=False):
+            borrowed += 1
+        if not borrowed:
+            app.logger.info(f"No free conversion slot for a parallel run of {label}")
+            return None
+        chunk_count = borrowed + 1
+    
+    work_dir = tempfile.mkdtemp(prefix='parallel-', dir=os.path.dirname(output_path))
+    try:
+        chunk_paths, toc = split_epub(input_path, work_dir, chunk_count)
+        if len(chunk_paths) < 2:
+            return None
+        
+        pdf_paths = [f"{os.path.splitext(path)[0]}.pdf" for path in chunk_paths]
+        chunk_progress = [0] * len(chunk_paths)
+        progress_lock = threading.Lock()
+        app.logger.info(f"Converting {label} in {len(chunk_paths)} parallel parts")
+        
+        def convert_chunk(index):
+            def on_chunk_progress(progress, line):
+                with progress_lock:
+                    chunk_progress[index] = progress
+                    if on_progress:
+                        on_progress(max(sum(chunk_progress) * 95 // (100 * len(chunk_paths)), 1),
+                                    f"[{index + 1}/{len(chunk_paths)}] {line}")
+            
+            command = build_conversion_command(chunk_paths[index], pdf_paths[index], params, verbosity)
+            return execute_conversion(command, pdf_paths[index], budget, on_progress=on_chunk_progress,
+                                      label=f"{label}#{index + 1}", tmpdir=tmpdir)
+        
+        with ThreadPoolExecutor(max_workers=len(chunk_paths)) as executor:
+            results = list(executor.map(convert_chunk, range(len(chunk_paths))))
+        
+        for index, result in enumerate(results):
+            if result['returncode'] != 0 or result['timeout'] or result['limit_hit']:
+                app.logger.warning(f"Part {index + 1} of {label} failed")
+                return None
+            if not os.path.exists(pdf_paths[index]) or os.path.getsize(pdf_paths[index]) == 0:
+                app.logger.warning(f"Part {index + 1} of {label} produced no PDF")
+                return None
+        
+        if on_progress:
+            on_progress(96, "Merging parts...")
+        merge_chunk_pdfs(pdf_paths, output_path, toc)
+        
+        return {'returncode': 0, 'output_tail': results[-1]['output_tail'], 'timeout': None, 'limit_hit': None}
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        for _ in range(borrowed):
+            slots.release()
+
+def update_eta(job_data, progress):
+    """
+    Store the estimated completion time and progress rate on a running job.
+    
+    Args:
+        job_data (Job): Job record of the running conversion
+        progress (int): Current progress percentage
+    """
+    elapsed = time.time() - job_data.started_time
+    remaining = estimate_remaining_time(job_data, progress)
+    
+    job_data.estimated_completion = round(time.time() + remaining, 1) if remaining is not None else None
+    job_data.rate = round(progress / elapsed, 2) if progress and elapsed > 0 else None
+
+def run_conversion(command, job_id, input_path, output_path):
+    """
+    Run the conversion process for an EPUB file.
+    Executes the conversion command, tracks progress, and updates job status.
+    
+    Args:
+        command (list): Command to execute
+        job_id (str): Job identifier
+        input_path (str): Path to input EPUB file
         output_path (str): Path for output PDF file
     """
+    calibre_tmp = None
     try:
         app.logger.info(f"Starting conversion job {job_id}")
         app.logger.debug(f"Command: {' '.join(command)}")
@@ -431,123 +2913,639 @@ def run_conversion(command, job_id, input_path, output_path):
         
         author, title = get_epub_metadata(input_path)
         
-        conversion_progress[job_id] = {
-            'status': 'running', 
-            'progress': 1, 
-            'message': 'Running conversion...',
-            'input_path': input_path,
-            'output_path': output_path,
-            'detailed_logs': [],
-            'author': author,
-            'title': title
-        }
+        job_data = conversion_progress.setdefault(job_id, Job())
+        job_data.attempts += 1
+        job_data.worker = get_worker_id()
+        job_data.status = JobStatus.RUNNING
+        job_data.progress = 1
+        job_data.message = 'Running conversion...'
+        job_data.input_path = input_path
+        job_data.output_path = output_path
+        job_data.detailed_logs = []
+        job_data.author = author
+        job_data.title = title
+        sync_followers(job_id)
+        mark_job_changed(job_id)
+        save_jobs()
+        
+        started = time.time()
+        job_data.started_time = started
+        job_data.input_size = file_size
+        job_data.parallel = should_convert_in_parallel(file_size, job_data, command)
+        update_eta(job_data, 0)
+        budget = get_conversion_budget(file_size, job_data.device_profile)
+        save_interval = 2.0
+        last_save_time = time.time()
+        full_capture = '--debug' in command
+        if is_scratch_path(input_path):
+            calibre_tmp = tempfile.mkdtemp(prefix='calibre-', dir=SCRATCH_DIR)
+        
+        def on_progress(progress, line):
+            nonlocal last_save_time
+            if not full_capture:
+                job_data.detailed_logs.append(line)
+            update_eta(job_data, progress)
+            update_job_status(job_id, progress=progress, message=line)
+            
+            if time.time() - last_save_time >= save_interval:
+                save_jobs()
+                last_save_time = time.time()
+        
+        def on_line(line):
+            app.logger.debug(f"Process output: {line}")
+            job_data.detailed_logs.append(line)
+        
+        result = None
+        if job_data.parallel:
+            try:
+                result = execute_parallel_conversion(
+                    input_path, output_path, job_data.params, budget,
+                    on_progress=on_progress,
+                    label=job_id,
+                    tmpdir=calibre_tmp,
+                    verbosity=1 if '--verbose' in command else 0,
+                    slots=conversion_slots
+                )
+            except Exception as e:
+                app.logger.error(f"Parallel conversion of job {job_id} failed, converting in one process: {str(e)}")
+            if result is None:
+                job_data.parallel = False
+        
+        if result is None:
+            result = execute_conversion(
+                command, output_path, budget,
+                on_progress=on_progress,
+                on_line=on_line if full_capture else None,
+                label=job_id,
+                tmpdir=calibre_tmp
+            )
+        
+        if result['returncode'] != 0 and calibre_tmp \
+                and any('No space left on device' in line for line in result['output_tail']):
+            app.logger.warning(f"Scratch directory ran full during job {job_id}, retrying on {TEMP_DIR}")
+            shutil.rmtree(calibre_tmp, ignore_errors=True)
+            calibre_tmp = None
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            disk_input_path = move_to_disk(input_path)
+            disk_output_path = os.path.join(TEMP_DIR, os.path.basename(output_path))
+            command = [disk_input_path if arg == input_path else disk_output_path if arg == output_path else arg
+                       for arg in command]
+            input_path, output_path = disk_input_path, disk_output_path
+            job_data.input_path, job_data.output_path, job_data.detailed_logs = input_path, output_path, []
+            result = execute_conversion(
+                command, output_path, budget,
+                on_progress=on_progress,
+                on_line=on_line if full_capture else None,
+                label=job_id
+            )
+        
+        if result['returncode'] != 0 and not result['timeout'] and not result['limit_hit'] \
+                and not full_capture and CALIBRE_DEBUG_ON_FAILURE:
+            app.logger.info(f"Conversion job {job_id} failed, re-running with debug output")
+            update_job_status(job_id, message='Conversion failed, collecting debug output...')
+            job_data.detailed_logs = []
+            full_capture = True
+            result = execute_conversion(
+                command + ["--verbose", "--debug"], output_path, budget,
+                on_progress=on_progress,
+                on_line=on_line,
+                label=job_id,
+                tmpdir=calibre_tmp
+            )
+        
+        returncode = result['returncode']
+        
+        if result['timeout']:
+            reason, details = result['timeout']
+            app.logger.error(f"Conversion job {job_id} killed by watchdog: {details}")
+            if os.path.exists(output_path):
+                os.remove(output_path)
+            job_data.failure_reason = reason
+            update_job_status(
+                job_id,
+                status=JobStatus.FAILED,
+                message='Conversion failed: Calibre stopped responding!' if reason == 'stalled'
+                        else 'Conversion failed: time limit exceeded!',
+                error_details=details,
+                completed_time=time.time()
+            )
+        elif result['limit_hit']:
+            limit_hit = result['limit_hit']
+            app.logger.error(f"Conversion job {job_id} exceeded resource limit: {limit_hit}")
+            job_data.failure_reason = 'resource_limit'
+            update_job_status(
+                job_id,
+                status=JobStatus.FAILED,
+                message='Conversion failed: resource limit exceeded!',
+                error_details=f"Resource limit exceeded: {limit_hit}",
+                completed_time=time.time()
+            )
+        elif returncode == 0:
+            app.logger.info(f"Conversion job {job_id} completed successfully")
+            
+            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+                app.logger.debug(f"Output file exists: {os.path.exists(output_path)}")
+                app.logger.debug(f"Output file size: {os.path.getsize(output_path)}")
+                
+                if job_data.output_format == 'epub' and IMAGE_DOWNSCALING and job_data.params:
+                    try:
+                        saved = downscale_epub_images(output_path, job_data.params.get('custom_size'))
+                        app.logger.info(f"Downscaling images of job {job_id} saved {saved} bytes")
+                    except Exception as e:
+                        app.logger.warning(f"Could not downscale the images of job {job_id}: {str(e)}")
+                
+                output_key = storage.store(job_id, output_path, job_data.output_format)
+                job_data.output_key = output_key
+                if storage.name == 'local':
+                    job_data.output_path = output_key
+                
+                completed_files[job_id] = CompletedFile(output_key, job_data.author, job_data.title,
+                                                        job_data.output_format)
+                save_completed_files()
+                if job_data.preview:
+                    try:
+                        cache.set(f"preview-{job_data.coalescing_key}", job_id, timeout=JOB_TIMEOUT)
+                    except Exception as e:
+                        app.logger.warning(f"Error writing preview cache: {str(e)}")
+                else:
+                    record_conversion_duration(job_data.device_profile, file_size, time.time() - started,
+                                               job_data.parallel, job_data.output_format, job_data.quality)
+                
+                update_job_status(
+                    job_id, 
+                    status=JobStatus.COMPLETED,
+                    progress=100,
+                    message='Conversion completed successfully!',
+                    completed_time=time.time()
+                )
+            else:
+                app.logger.error(f"Output file does not exist despite successful return code!")
+                update_job_status(
+                    job_id,
+                    status=JobStatus.FAILED,
+                    message='Conversion failed: Output file not created!',
+                    completed_time=time.time()
+                )
+        else:
+            app.logger.error(f"Conversion job {job_id} failed with return code {returncode}")
+            output_tail = result['output_tail']
+            error_details = '\n'.join(output_tail[-10:]) if output_tail else "No output captured"
+            app.logger.error("Error details: " + '\n'.join(output_tail))
+            
+            update_job_status(
+                job_id,
+                status=JobStatus.FAILED,
+                message=f'Conversion failed with code {returncode}! Check logs for details.',
+                error_details=error_details,
+                completed_time=time.time()
+            )
+        
+        job_data.estimated_completion = None
+        del job_data.detailed_logs[:-FINISHED_JOB_LOG_LINES]
+        recent_conversions.append({
+            'job_id': job_id,
+            'device_profile': job_data.device_profile,
+            'input_size': file_size,
+            'parallel': job_data.parallel,
+            'duration': round(time.time() - started, 2),
+            'status': job_data.status,
+            'finished': time.time()
+        })
         save_jobs()
+    
+    except Exception as e:
+        error_msg = f"Error: {str(e)}"
+        app.logger.error(f"Exception in conversion job {job_id}: {str(e)}")
+        import traceback
+        app.logger.error(traceback.format_exc())
         
-        process = subprocess.Popen(
-            command,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            universal_newlines=True
+        update_job_status(
+            job_id,
+            status=JobStatus.FAILED,
+            message=error_msg,
+            error_details=error_msg,
+            completed_time=time.time()
         )
         
-        progress_pattern = re.compile(r'(\d+)%')
-        full_output = []
-        last_save_time = time.time()
-        batch_size = 10
-        lines_since_save = 0
-        save_interval = 2.0
+        save_jobs()
+    
+    finally:
+        release_coalescing_key(job_id)
+        release_scratch(job_id, calibre_tmp)
+
+def release_scratch(job_id, calibre_tmp):
+    """
+    Free the scratch tier once a conversion has finished.
+    The input is no longer needed and a failed conversion's partial output is
+    discarded; completed outputs were already moved by the storage backend.
+    
+    Args:
+        job_id (str): Job identifier
+        calibre_tmp (str): Calibre working directory on the scratch tier or None
+    """
+    if calibre_tmp:
+        shutil.rmtree(calibre_tmp, ignore_errors=True)
+    
+    job_data = conversion_progress.get(job_id)
+    for path in [job_data.input_path, job_data.output_path] if job_data else []:
+        if is_scratch_path(path) and os.path.exists(path):
+            os.remove(path)
+            app.logger.debug(f"Released scratch file {path}")
+
+def hash_file(path):
+    """
+    Calculate the SHA-256 hash of a file.
+    
+    Args:
+        path (str): Path to the file
+        
+    Returns:
+        str: Hex digest of the file content
+    """
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def find_completed_conversion(coalescing_key):
+    """
+    Find a finished conversion with the same input and parameters whose output is still stored.
+    
+    Args:
+        coalescing_key (str): Key from get_coalescing_key()
+        
+    Returns:
+        str: Job ID of the conversion or None
+    """
+    for job_id, job_data in list(conversion_progress.items()):
+        if job_data.coalescing_key == coalescing_key and job_data.status == JobStatus.COMPLETED \
+                and job_data.output_key and storage.exists(job_data.output_key):
+            return job_id
+    return None
+
+def get_coalescing_key(input_hash, params):
+    """
+    Build the key identifying conversions with byte-identical results.
+    
+    Args:
+        input_hash (str): SHA-256 of the input file
+        params (dict): Effective conversion parameters
+        
+    Returns:
+        str: Key combining input and parameters
+    """
+    return hashlib.sha256(f"{input_hash}:{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+def submit_conversion(job_id, input_path, output_path, params, device_profile=None, input_hash=None,
+                      client_id=None, job_class='web', preview=False, callback_url=None, batch=None,
+                      output_format='pdf', quality=None):
+    """
+    Register a conversion job and start it in a background thread.
+    If an identical conversion (same input and parameters) is already running,
+    the job is attached to it as a follower instead of starting another process;
+    a conversion in another worker is followed by follow_remote_conversion().
+    A preview that was already rendered with the same input and parameters is
+    answered with the existing job. A full conversion whose output is still
+    stored is answered with a completed job sharing that output, which expires
+    together with it. Every input is kept in the content store for
+    api_preflight(). Without a requested quality, full
+    conversions are made in draft quality while at least DRAFT_QUEUE_DEPTH
+    jobs are waiting.
+    
+    Args:
+        job_id (str): Job identifier
+        input_path (str): Path to the uploaded EPUB file
+        output_path (str): Path for output PDF file
+        params (dict): Conversion parameters
+        device_profile (str, optional): Device profile the parameters came from
+        input_hash (str, optional): SHA-256 of the input if already computed during upload
+        client_id (str, optional): Client that uploaded the file, used for fair scheduling
+        job_class (str): 'web' for the upload form, 'api' for the REST API
+        preview (bool): Convert only the first PREVIEW_SPINE_ITEMS chapters
+        callback_url (str, optional): Validated URL notified when the job has finished,
+            not used for a preview that is answered from the cache
+        batch (str, optional): Tag for querying the client's jobs together
+        output_format (str): 'pdf' or 'epub', from get_output_format()
+        quality (str, optional): 'standard' or 'draft', None to decide by queue depth
+        
+    Returns:
+        str: ID of the job the client should follow
+    """
+    if quality is None:
+        waiting = conversion_queue.qsize()
+        quality = 'draft' if DRAFT_QUEUE_DEPTH and not preview and waiting >= DRAFT_QUEUE_DEPTH else 'standard'
+        if quality == 'draft':
+            app.logger.info(f"{waiting} jobs waiting, converting job {job_id} in draft quality")
+    if quality == 'draft':
+        params = get_draft_params(params)
+    
+    author, title = get_epub_metadata(input_path)
+    input_hash = input_hash or hash_file(input_path)
+    store_content(input_path, input_hash, client_id)
+    key_params = dict(params, preview=PREVIEW_SPINE_ITEMS) if preview else params
+    if output_format != 'pdf':
+        key_params = dict(key_params, output_format=output_format)
+        format_path = f"{os.path.splitext(output_path)[0]}.{output_format}"
+        if os.path.exists(output_path):
+            os.replace(output_path, format_path)
+        output_path = format_path
+    coalescing_key = get_coalescing_key(input_hash, key_params)
+    
+    completed_id = None if preview else find_completed_conversion(coalescing_key)
+    if completed_id:
+        app.logger.info(f"Job {job_id} was already converted by job {completed_id}, sharing its output")
+        for path in [input_path, output_path]:
+            if os.path.exists(path):
+                os.remove(path)
+        
+        completed = conversion_progress[completed_id]
+        conversion_progress[job_id] = Job(
+            status=JobStatus.COMPLETED,
+            progress=100,
+            message=completed.message,
+            author=author,
+            title=title,
+            client_id=client_id or 'unknown',
+            batch=batch,
+            job_class=job_class,
+            device_profile=device_profile or 'custom',
+            output_format=output_format,
+            quality=quality,
+            coalesced_with=completed_id,
+            output_path=completed.output_path,
+            output_key=completed.output_key,
+            started_time=completed.started_time,
+            completed_time=completed.completed_time,
+            webhook=new_webhook(callback_url) if callback_url else None
+        )
+        completed_files[job_id] = CompletedFile(completed.output_key, author or 'unknown', title or 'ebook',
+                                                output_format)
+        save_jobs()
+        save_completed_files()
+        schedule_webhooks(job_id)
+        return job_id
+    
+    if preview:
+        cached_job_id = get_cached_preview(coalescing_key)
+        if cached_job_id:
+            app.logger.info(f"Preview {job_id} was already rendered by job {cached_job_id}")
+            for path in [input_path, output_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            return cached_job_id
+        
+        preview_path = f"{input_path}.preview"
+        try:
+            item_count = build_preview_epub(input_path, preview_path, PREVIEW_SPINE_ITEMS)
+            os.replace(preview_path, input_path)
+            app.logger.info(f"Preview {job_id} contains the first {item_count} spine documents")
+        except Exception as e:
+            app.logger.warning(f"Could not shorten the book for preview {job_id}, converting all of it: {str(e)}")
+            if os.path.exists(preview_path):
+                os.remove(preview_path)
+    
+    with inflight_lock:
+        leader_id = inflight_conversions.get(coalescing_key)
+        leader = conversion_progress.get(leader_id) if leader_id else None
+        
+        if leader is not None and not leader.status.finished:
+            app.logger.info(f"Job {job_id} is identical to running job {leader_id}, attaching as follower")
+            
+            for path in [input_path, output_path]:
+                if os.path.exists(path):
+                    os.remove(path)
+            
+            conversion_progress[job_id] = Job(
+                status=leader.status,
+                progress=leader.progress,
+                message=leader.message,
+                author=author,
+                title=title,
+                client_id=client_id or 'unknown',
+                batch=batch,
+                coalesced_with=leader_id,
+                output_format=output_format,
+                quality=quality,
+                webhook=new_webhook(callback_url) if callback_url else None
+            )
+            leader.followers.append(job_id)
+            save_jobs()
+            return job_id
+        
+        remote_leader_id = claim_coalescing_key(coalescing_key, job_id)
+        conversion_progress[job_id] = Job(
+            status=JobStatus.QUEUED,
+            progress=0,
+            message='Waiting for a free conversion slot...',
+            input_path=input_path,
+            output_path=output_path,
+            author=author,
+            title=title,
+            device_profile=device_profile or 'custom',
+            params=params,
+            client_id=client_id or 'unknown',
+            batch=batch,
+            job_class=job_class,
+            coalescing_key=coalescing_key,
+            preview=preview,
+            output_format=output_format,
+            quality=quality,
+            worker=get_worker_id(),
+            webhook=new_webhook(callback_url) if callback_url else None
+        )
+        if remote_leader_id is None:
+            inflight_conversions[coalescing_key] = job_id
+        else:
+            conversion_progress[job_id].coalesced_with = remote_leader_id
+            conversion_progress[job_id].message = 'Waiting for an identical conversion...'
+    
+    if remote_leader_id is not None:
+        app.logger.info(f"Job {job_id} is identical to job {remote_leader_id} of another worker, following it")
+        save_jobs()
+        follower_thread = threading.Thread(target=follow_remote_conversion, args=(job_id,))
+        follower_thread.daemon = True
+        follower_thread.start()
+        return job_id
+    
+    save_jobs()
+    enqueue_conversion(job_id)
+    return job_id
+
+def get_cached_preview(coalescing_key):
+    """
+    Find a finished preview with the same input and parameters.
+    The lookup goes through the cache backend, so with a shared backend the
+    previews of all workers are found.
+    
+    Args:
+        coalescing_key (str): Key from get_coalescing_key()
+        
+    Returns:
+        str: Job ID of the preview or None if there is no usable one
+    """
+    try:
+        job_id = cache.get(f"preview-{coalescing_key}")
+    except Exception as e:
+        app.logger.warning(f"Error reading preview cache: {str(e)}")
+        return None
+    
+    if job_id and get_job_output(job_id)[0]:
+        return job_id
+    return None
+
+def enqueue_conversion(job_id):
+    """
+    Build the Calibre command from a job record and hand it to the dispatchers.
+    
+    Args:
+        job_id (str): Job identifier
+    """
+    job_data = conversion_progress[job_id]
+    device_profile = job_data.device_profile
+    input_path = job_data.input_path
+    output_path = job_data.output_path
+    
+    verbosity = int(get_profile_option(device_profile, 'calibre_verbosity', CALIBRE_VERBOSITY))
+    command = build_conversion_command(input_path, output_path, job_data.params, verbosity,
+                                       output_format=job_data.output_format)
+    app.logger.debug(f"Final command: {' '.join(command)}")
+    queue, job_class = get_job_queue(job_data)
+    app.logger.info(f"Queueing {job_class} job {job_id} ({queue.qsize()} jobs waiting)")
+    queue.put((command, job_id, input_path, output_path), job_data.client_id, job_class)
+
+def get_worker_id(pid=None):
+    """
+    Identify a process by PID and start time, so reused PIDs are not mistaken for it.
+    
+    Args:
+        pid (int, optional): Process ID, defaults to the current process
+        
+    Returns:
+        str: "<pid>:<start time in clock ticks>" or None if the process does not exist
+    """
+    pid = pid or os.getpid()
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            stat = f.read()
+    except OSError:
+        return None
+    return f"{pid}:{stat[stat.rindex(')') + 2:].split()[19]}"
+
+def is_worker_alive(worker_id):
+    """
+    Check whether the process that owns a job is still running.
+    
+    Args:
+        worker_id (str): ID from get_worker_id()
+        
+    Returns:
+        bool: True if the process exists and is the same process
+    """
+    if not worker_id:
+        return False
+    return get_worker_id(int(worker_id.split(':')[0])) == worker_id
+
+def recover_interrupted_jobs():
+    """
+    Requeue jobs whose worker process died while they were queued or running,
+    e.g. after a restart. Runs under a file lock so only one gunicorn worker
+    picks up each job. Jobs that already used MAX_JOB_ATTEMPTS attempts or whose
+    input is gone are marked as failed instead.
+    """
+    with open(JOB_LOCK_FILE, 'w') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        conversion_progress.update(load_saved_jobs())
         
-        for line in iter(process.stdout.readline, ''):
-            line = line.strip()
-            app.logger.debug(f"Process output: {line}")
-            full_output.append(line)
-            conversion_progress[job_id]['detailed_logs'].append(line)
-            lines_since_save += 1
+        recovered = 0
+        for job_id, job_data in list(conversion_progress.items()):
+            webhook = job_data.webhook
+            if webhook and webhook['state'] == 'queued' and not is_worker_alive(webhook.get('worker')):
+                app.logger.info(f"Resuming webhook delivery for job {job_id}")
+                webhook['worker'] = get_worker_id()
+                enqueue_webhook(job_id, time.time())
             
-            match = progress_pattern.search(line)
-            if match:
-                progress = int(match.group(1))
-                update_job_status(job_id, progress=progress, message=line)
-            else:
-                conversion_progress[job_id]['message'] = line
+            if job_data.status.finished or is_worker_alive(job_data.worker):
+                continue
             
-            current_time = time.time()
-            if lines_since_save >= batch_size and current_time - last_save_time >= save_interval:
-                save_jobs()
-                last_save_time = current_time
-                lines_since_save = 0
-        
-        app.logger.debug("Waiting for process to complete...")
-        process.wait()
-        returncode = process.returncode
-        app.logger.debug(f"Process completed with return code: {returncode}")
-        
-        if returncode == 0:
-            app.logger.info(f"Conversion job {job_id} completed successfully")
+            if job_data.coalesced_with is not None and job_data.params is None:
+                leader = conversion_progress.get(job_data.coalesced_with)
+                if leader is None or job_id not in leader.followers:
+                    job_data.status = JobStatus.FAILED
+                    job_data.message = 'Conversion was interrupted by a server restart!'
+                    job_data.error_details = 'The job this upload was attached to no longer exists.'
+                    job_data.failure_reason = 'interrupted'
+                    job_data.completed_time = time.time()
+                    mark_job_changed(job_id)
+                continue
             
-            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                app.logger.debug(f"Output file exists: {os.path.exists(output_path)}")
-                app.logger.debug(f"Output file size: {os.path.getsize(output_path)}")
-                
-                if 'author' in conversion_progress[job_id] and 'title' in conversion_progress[job_id]:
-                    author = conversion_progress[job_id]['author']
-                    title = conversion_progress[job_id]['title']
-                    completed_files[job_id] = {
-                        'path': output_path,
-                        'author': author,
-                        'title': title
-                    }
-                else:
-                    completed_files[job_id] = {'path': output_path}
-                save_completed_files()
-                
+            if job_data.attempts >= MAX_JOB_ATTEMPTS:
+                app.logger.warning(f"Job {job_id} was interrupted after {job_data.attempts} attempts, giving up")
+                job_data.failure_reason = 'max_attempts'
                 update_job_status(
-                    job_id, 
-                    status='completed',
-                    progress=100,
-                    message='Conversion completed successfully!',
+                    job_id,
+                    status=JobStatus.FAILED,
+                    message='Conversion failed: interrupted too often!',
+                    error_details=f"The conversion was interrupted {job_data.attempts} times.",
                     completed_time=time.time()
                 )
-            else:
-                app.logger.error(f"Output file does not exist despite successful return code!")
+            elif job_data.params is None or not os.path.exists(job_data.input_path or ''):
+                app.logger.warning(f"Job {job_id} was interrupted and cannot be resumed")
+                job_data.failure_reason = 'interrupted'
                 update_job_status(
                     job_id,
-                    status='failed',
-                    message='Conversion failed: Output file not created!',
+                    status=JobStatus.FAILED,
+                    message='Conversion was interrupted by a server restart!',
+                    error_details='The uploaded file is no longer available, please upload it again.',
                     completed_time=time.time()
                 )
-        else:
-            app.logger.error(f"Conversion job {job_id} failed with return code {returncode}")
-            error_details = '\n'.join(full_output[-10:]) if full_output else "No output captured"
-            app.logger.error(f"Error details: {'\n'.join(full_output)}")
-            
-            update_job_status(
-                job_id,
-                status='failed',
-                message=f'Conversion failed with code {returncode}! Check logs for details.',
-                error_details=error_details,
-                completed_time=time.time()
-            )
+            else:
+                app.logger.info(f"Requeueing interrupted job {job_id} (attempt {job_data.attempts + 1})")
+                job_data.status = JobStatus.QUEUED
+                job_data.progress = 0
+                job_data.message = 'Resuming after a server restart...'
+                job_data.worker = get_worker_id()
+                job_data.coalesced_with = None
+                mark_job_changed(job_id)
+                if job_data.coalescing_key:
+                    with inflight_lock:
+                        inflight_conversions[job_data.coalescing_key] = job_id
+                    claim_coalescing_key(job_data.coalescing_key, job_id)
+                sync_followers(job_id)
+                try:
+                    enqueue_conversion(job_id)
+                    recovered += 1
+                except Exception as e:
+                    app.logger.error(f"Error requeueing job {job_id}: {str(e)}")
+                    update_job_status(
+                        job_id,
+                        status=JobStatus.FAILED,
+                        message='Conversion was interrupted by a server restart!',
+                        error_details=str(e),
+                        completed_time=time.time()
+                    )
         
         save_jobs()
     
-    except Exception as e:
-        error_msg = f"Error: {str(e)}"
-        app.logger.error(f"Exception in conversion job {job_id}: {str(e)}")
-        import traceback
-        app.logger.error(traceback.format_exc())
-        
-        update_job_status(
-            job_id,
-            status='failed',
-            message=error_msg,
-            error_details=error_msg,
-            completed_time=time.time()
-        )
-        
-        save_jobs()
+    if recovered:
+        app.logger.info(f"Requeued {recovered} interrupted jobs")
+
+def should_recover_jobs():
+    """
+    Decide whether this process takes over interrupted jobs.
+    With RECOVER_INTERRUPTED_JOBS=auto only the web server does, so CLI commands
+    and tools importing the module do not requeue the jobs of a running server.
+    
+    Returns:
+        bool: True if recover_interrupted_jobs() should run at startup
+    """
+    if RECOVER_INTERRUPTED_JOBS == 'auto':
+        return 'gunicorn' in sys.modules or __name__ == '__main__'
+    return RECOVER_INTERRUPTED_JOBS in ['true', '1', 'yes', 'y']
+
+if should_recover_jobs():
+    recover_interrupted_jobs()
 
 @app.route("/", methods=["GET", "POST"])
 def index():
@@ -574,17 +3572,31 @@ def index():
             app.logger.error(f"Invalid file extension: {epub_file.filename}")
             return "Only EPUB files are supported", 400
             
-        if request.content_length > 100 * 1024 * 1024:
+        if request.content_length > MAX_UPLOAD_SIZE:
             app.logger.error(f"File too large: {request.content_length / (1024*1024):.2f}MB")
             return "File size exceeds the 100MB limit", 400
         
+        try:
+            output_format = get_output_format(request.form.get("device_profile"), request.form.get("output_format"))
+            quality = get_quality(request.form.get("quality"))
+        except ValueError as e:
+            app.logger.error(f"Invalid conversion option: {str(e)}")
+            return str(e), 400
+        
+        client_id = get_client_id()
+        retry_after = take_upload_token(client_id)
+        if retry_after:
+            app.logger.warning(f"Upload rate limit exceeded by {client_id}")
+            return f"Too many uploads, please try again in {retry_after} seconds", 429, {'Retry-After': str(retry_after)}
+        
         app.logger.info(f"File uploaded: {epub_file.filename}")
         
         job_id = str(uuid.uuid4())
         app.logger.info(f"Created job ID: {job_id}")
         
-        with tempfile.NamedTemporaryFile(suffix=".epub", dir=TEMP_DIR, delete=False) as input_tmp_file, \
-             tempfile.NamedTemporaryFile(suffix=".pdf", dir=TEMP_DIR, delete=False) as output_tmp_file:
+        work_dir = get_work_dir(request.content_length)
+        with tempfile.NamedTemporaryFile(suffix=".epub", dir=work_dir, delete=False) as input_tmp_file, \
+             tempfile.NamedTemporaryFile(suffix=".pdf", dir=work_dir, delete=False) as output_tmp_file:
 
             input_path = input_tmp_file.name
             output_path = output_tmp_file.name
@@ -628,32 +3640,10 @@ def index():
                 
                 app.logger.debug(f"Parameters: {params}")
 
-            command = build_conversion_command(input_path, output_path, params)
-                
-            app.logger.debug(f"Final command: {' '.join(command)}")
-
-            app.logger.info(f"Starting conversion thread for job {job_id}")
-
-            author, title = get_epub_metadata(input_path)
-            
-            conversion_progress[job_id] = {
-                'status': 'starting', 
-                'progress': 0, 
-                'message': 'Starting conversion...',
-                'input_path': input_path,
-                'output_path': output_path,
-                'detailed_logs': [],
-                'author': author,
-                'title': title
-            }
-            save_jobs()
-
-            thread = threading.Thread(
-                target=run_conversion, 
-                args=(command, job_id, input_path, output_path)
-            )
-            thread.daemon = True
-            thread.start()
+            preview = request.form.get("preview") == "1"
+            job_id = submit_conversion(job_id, input_path, output_path, params, device_profile,
+                                       client_id=client_id, job_class='web', preview=preview,
+                                       output_format=output_format, quality=quality)
             
             time.sleep(0.2)  
             
@@ -699,21 +3689,20 @@ def progress(job_id):
         
         if job_id in completed_files and job_id not in conversion_progress:
             file_info = completed_files[job_id]
-            output_path = file_info['path'] if isinstance(file_info, dict) else file_info
             
-            if os.path.exists(output_path):
+            if storage.exists(file_info.path):
                 app.logger.info(f"Found completed job {job_id} in completed_files")
                 
                 completed_data = {
                     'status': 'completed',
                     'progress': 100,
                     'message': 'Conversion completed successfully!',
+                    'output_format': file_info.output_format,
                 }
                 
-                if isinstance(file_info, dict):
-                    if 'author' in file_info and 'title' in file_info:
-                        completed_data['author'] = file_info['author']
-                        completed_data['title'] = file_info['title']
+                if file_info.author and file_info.title:
+                    completed_data['author'] = file_info.author
+                    completed_data['title'] = file_info.title
                 
                 yield f"data: {json.dumps(completed_data)}\n\n"
                 return
@@ -726,36 +3715,32 @@ def progress(job_id):
             if job_id in conversion_progress:
                 connection_lost = False
                 retry_count = 0
-                data = conversion_progress[job_id]
-                app.logger.debug(f"Sending progress update for job {job_id}: {data['status']}, {data['progress']}%")
+                job_data = conversion_progress[job_id]
+                app.logger.debug(f"Sending progress update for job {job_id}: {job_data.status}, {job_data.progress}%")
                 
-                if 'detailed_logs' in data and len(data['detailed_logs']) > 100:
-                    trimmed_data = data.copy()
-                    trimmed_data['detailed_logs'] = data['detailed_logs'][-100:]
-                    yield f"data: {json.dumps(trimmed_data)}\n\n"
-                else:
-                    yield f"data: {json.dumps(data)}\n\n"
+                data = job_data.to_dict()
+                data['detailed_logs'] = job_data.detailed_logs[-100:]
+                yield f"data: {json.dumps(data)}\n\n"
                 
-                if data['status'] in ['completed', 'failed']:
-                    app.logger.info(f"Job {job_id} {data['status']}")
+                if job_data.status.finished:
+                    app.logger.info(f"Job {job_id} {job_data.status}")
                     break
             elif job_id in completed_files:
                 file_info = completed_files[job_id]
-                output_path = file_info['path'] if isinstance(file_info, dict) else file_info
                 
-                if os.path.exists(output_path):
+                if storage.exists(file_info.path):
                     app.logger.info(f"Job {job_id} completed and found in completed_files")
                     
                     completed_data = {
                         'status': 'completed',
                         'progress': 100,
                         'message': 'Conversion completed successfully!',
+                        'output_format': file_info.output_format,
                     }
                     
-                    if isinstance(file_info, dict):
-                        if 'author' in file_info and 'title' in file_info:
-                            completed_data['author'] = file_info['author']
-                            completed_data['title'] = file_info['title']
+                    if file_info.author and file_info.title:
+                        completed_data['author'] = file_info.author
+                        completed_data['title'] = file_info.title
                     
                     yield f"data: {json.dumps(completed_data)}\n\n"
                     break
@@ -784,18 +3769,32 @@ def progress(job_id):
     response.headers['Expires'] = '0'
     return response
 
-@app.route("/download/<job_id>")
-def download(job_id):
+def get_download_name(job_id, file_info):
     """
-    File download endpoint for completed conversions.
+    Build the download filename for a job from its metadata.
     
     Args:
         job_id (str): Job identifier
+        file_info (Job or CompletedFile): Job record or completed file entry
         
     Returns:
-        Response: File download or error message
+        str: Filename in the form author-title.pdf, or .epub for EPUB output
+    """
+    if file_info.author and file_info.title:
+        return f"{file_info.author}-{file_info.title}.{file_info.output_format}"
+    return f"converted_{job_id[:8]}.{file_info.output_format}"
+
+def get_job_output(job_id):
+    """
+    Look up the stored output of a completed job.
+    Reloads the saved jobs from disk when the job is not known to this worker.
+    
+    Args:
+        job_id (str): Job identifier
+        
+    Returns:
+        tuple: (storage key, download filename) or (None, None) if not available
     """
-    app.logger.info(f"Download requested for job {job_id}")
     global conversion_progress, completed_files
     
     app.logger.debug(f"Job ID {job_id} in conversion_progress: {job_id in conversion_progress}")
@@ -815,119 +3814,178 @@ def download(job_id):
     
     if job_id in conversion_progress:
         job_data = conversion_progress[job_id]
-        app.logger.debug(f"Job data in conversion_progress: {job_data}")
+        output_key = job_data.output_key
+        app.logger.debug(f"Job status: {job_data.status}, output key: {output_key}")
         
-        if 'status' in job_data:
-            app.logger.debug(f"Job status: {job_data['status']}")
-        
-        if 'output_path' in job_data:
-            output_path = job_data['output_path']
-            app.logger.debug(f"Output path from conversion_progress: {output_path}")
-            app.logger.debug(f"File exists: {os.path.exists(output_path)}")
-            
-            if job_data.get('status') == 'completed' and os.path.exists(output_path):
-                app.logger.info(f"Sending file {output_path} for job {job_id} (from conversion_progress)")
-                try:
-                    if 'author' in job_data and 'title' in job_data:
-                        author = job_data['author']
-                        title = job_data['title']
-                        filename = f"{author}-{title}.pdf"
-                    else:
-                        filename = f"converted_{job_id[:8]}.pdf"
-                    
-                    completed_files[job_id] = {
-                        'path': output_path,
-                        'author': job_data.get('author', 'unknown'),
-                        'title': job_data.get('title', 'ebook')
-                    }
-                    save_completed_files()
-                        
-                    response = send_file(output_path, as_attachment=True, download_name=filename)
-                    response.headers['Cache-Control'] = 'public, max-age=86400'
-                    response.headers['ETag'] = hashlib.md5(str(os.path.getmtime(output_path)).encode()).hexdigest()
-                    return response
-                except Exception as e:
-                    app.logger.error(f"Error sending file from conversion_progress: {str(e)}")
+        if job_data.status == JobStatus.COMPLETED and storage.exists(output_key):
+            completed_files[job_id] = CompletedFile(output_key, job_data.author or 'unknown',
+                                                    job_data.title or 'ebook', job_data.output_format)
+            save_completed_files()
+            return output_key, get_download_name(job_id, job_data)
     
     if job_id in completed_files:
         file_info = completed_files[job_id]
-        app.logger.debug(f"File info in completed_files: {file_info}")
+        output_key = file_info.path
+        app.logger.debug(f"Output key from completed_files: {output_key}")
         
-        output_path = file_info['path'] if isinstance(file_info, dict) else file_info
-        app.logger.debug(f"Output path from completed_files: {output_path}")
-        app.logger.debug(f"File exists: {os.path.exists(output_path)}")
+        if storage.exists(output_key):
+            return output_key, get_download_name(job_id, file_info)
+        app.logger.warning(f"Stored output {output_key} doesn't exist for job {job_id}")
+    
+    return None, None
+
+@app.route("/download/<job_id>")
+def download(job_id):
+    """
+    File download endpoint for completed conversions.
+    
+    Args:
+        job_id (str): Job identifier
         
-        if os.path.exists(output_path):
-            app.logger.info(f"Sending file {output_path} for job {job_id} (from completed_files)")
-            try:
-                if isinstance(file_info, dict) and 'author' in file_info and 'title' in file_info:
-                    author = file_info['author']
-                    title = file_info['title']
-                    filename = f"{author}-{title}.pdf"
-                else:
-                    filename = f"converted_{job_id[:8]}.pdf"
-                    
-                response = send_file(output_path, as_attachment=True, download_name=filename)
-                response.headers['Cache-Control'] = 'public, max-age=86400'
-                response.headers['ETag'] = hashlib.md5(str(os.path.getmtime(output_path)).encode()).hexdigest()
-                return response
-            except Exception as e:
-                app.logger.error(f"Error sending file from completed_files: {str(e)}")
+    Returns:
+        Response: File download or error message
+    """
+    app.logger.info(f"Download requested for job {job_id}")
+    
+    output_key, filename = get_job_output(job_id)
+    if output_key:
+        app.logger.info(f"Sending file {output_key} for job {job_id}")
+        try:
+            return storage.send(output_key, filename, mimetype=get_output_mimetype(filename))
+        except Exception as e:
+            app.logger.error(f"Error sending file: {str(e)}")
     
     app.logger.error("All download attempts failed")
     return "File not found or job expired", 404
 
-@app.route("/system-info")
-@cache.cached(timeout=60)
-def system_info():
+@lru_cache(maxsize=None)
+def get_static_system_info():
     """
-    System information endpoint for debugging.
-    Only available in debug mode.
+    Collect the system facts that cannot change while the application runs.
     
     Returns:
-        Response: Rendered template with system information or 404
+        dict: Python, Calibre and font information
     """
-    app.logger.info("System info requested")
-    if not app.debug:
-        return "Not Found", 404
-    
-    info = {
-        "calibre_version": "Unknown",
-        "fonts": [],
+    fonts = list(get_installed_fonts())
+    return {
+        "python_version": platform.python_version(),
+        "platform": platform.platform(),
+        "calibre_version": get_calibre_version(),
+        "fonts": fonts,
+        "ibm_plex_installed": any("IBMPlex" in font for font in fonts),
         "temp_directory": TEMP_DIR,
-        "temp_directory_writable": os.access(TEMP_DIR, os.W_OK),
-        "python_version": os.popen("python --version").read().strip(),
-        "environment": dict(os.environ),
-        "disk_space": os.popen("df -h").read(),
-        "active_jobs": len(conversion_progress),
-        "completed_files": len(completed_files),
+        "scratch_directory": SCRATCH_DIR or None,
+        "scratch_max_mb": SCRATCH_MAX_MB or None,
+        "cache_type": cache_config['CACHE_TYPE'],
+        "storage_backend": storage.name,
+        "max_concurrent_conversions": MAX_CONCURRENT_CONVERSIONS,
         "job_timeout": JOB_TIMEOUT,
     }
+
+def get_worker_rss():
+    """
+    Get the resident memory of this worker process.
     
+    Returns:
+        int: Resident set size in bytes
+    """
     try:
-        info["calibre_version"] = subprocess.check_output(
-            ["ebook-convert", "--version"], 
-            text=True, 
-            stderr=subprocess.STDOUT
-        ).strip()
-    except Exception as e:
-        info["calibre_error"] = str(e)
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+def get_live_system_info():
+    """
+    Collect performance statistics of this worker process.
+    Only reads /proc and in-memory state, no subprocesses are started.
     
-    try:
-        fonts_output = subprocess.check_output(
-            ["fc-list"], 
-            text=True
-        ).strip()
-        info["fonts"] = [line.split(":")[0] for line in fonts_output.split("\n")]
-    except Exception as e:
-        info["fonts_error"] = str(e)
+    Returns:
+        dict: Worker, conversion, queue and persistence statistics
+    """
+    now = time.time()
+    
+    conversions = []
+    for pid, process_info in list(active_processes.items()):
+        stats = get_process_group_stats(pid)
+        conversions.append({
+            "pid": pid,
+            "label": process_info['label'],
+            "runtime": round(now - process_info['started'], 1),
+            "processes": stats['processes'],
+            "cpu_seconds": round(stats['cpu_seconds'], 1),
+            "rss_mb": round(stats['rss'] / (1024 * 1024), 1),
+        })
+    
+    job_states = {}
+    for job_data in list(conversion_progress.values()):
+        job_states[job_data.status] = job_states.get(job_data.status, 0) + 1
+    
+    persistence_files = {}
+    for path in [JOB_DATA_FILE, COMPLETED_FILES_FILE]:
+        persistence_files[os.path.basename(path)] = os.path.getsize(path) if os.path.exists(path) else 0
+    
+    recent = list(recent_conversions)
+    durations = [entry['duration'] for entry in recent if entry['status'] == 'completed']
+    disk = shutil.disk_usage(TEMP_DIR)
+    
+    return {
+        "worker_pid": os.getpid(),
+        "worker_rss_mb": round(get_worker_rss() / (1024 * 1024), 1),
+        "threads": threading.active_count(),
+        "queue_depth": conversion_queue.qsize() + preview_queue.qsize(),
+        "active_conversions": conversions,
+        "jobs_by_status": job_states,
+        "completed_files": len(completed_files),
+        "persistence_files": persistence_files,
+        "temp_directory_writable": os.access(TEMP_DIR, os.W_OK),
+        "scratch_used_mb": round(get_directory_size(SCRATCH_DIR) / (1024 * 1024), 1) if SCRATCH_DIR else None,
+        "disk_free_mb": round(disk.free / (1024 * 1024)),
+        "disk_total_mb": round(disk.total / (1024 * 1024)),
+        "recent_conversions": recent[::-1],
+        "mean_duration": round(sum(durations) / len(durations), 1) if durations else None,
+    }
+
+@app.route("/system-info")
+def system_info():
+    """
+    Performance dashboard for debugging.
+    Only available in debug mode. Statistics are for the worker serving the request.
+    
+    Returns:
+        Response: Rendered template with system information or 404
+    """
+    app.logger.info("System info requested")
+    if not app.debug:
+        return "Not Found", 404
     
     return render_template(
         "system_info.html", 
-        info=info,
-        ibm_plex_installed=any("IBMPlex" in font for font in info["fonts"])
+        static=get_static_system_info(),
+        live=get_live_system_info()
     )
 
+@app.route("/api/v1/system_info", methods=["GET"])
+def api_system_info():
+    """
+    API endpoint for the performance dashboard data.
+    Only available in debug mode.
+    
+    Returns:
+        Response: JSON with static and live system information or 404
+    """
+    app.logger.info("API system info requested")
+    if not app.debug:
+        return jsonify({"error": "Not found"}), 404
+    
+    return jsonify({
+        "static": get_static_system_info(),
+        "live": get_live_system_info()
+    })
+
 @app.route("/api/v1/health", methods=["GET"])
 @cache.cached(timeout=60)
 def api_health():
@@ -988,14 +4046,42 @@ def api_device_profiles():
     return jsonify(profiles)
 
 @app.route("/api/v1/convert", methods=["POST"])
-def api_convert():
+@app.route("/api/v1/preview", methods=["POST"], defaults={'preview': True})
+def api_convert(preview=False):
     """
     API endpoint for EPUB conversion.
+    Accepts the EPUB either as multipart form data or as the raw request body
+    with Content-Type application/epub+zip, see api_convert_raw().
+    /api/v1/preview takes the same input and converts only the first chapters.
+    
+    Args:
+        preview (bool): Whether a preview was requested
     
     Returns:
         Response: JSON with job information or error
     """
-    app.logger.info("API conversion requested")
+    app.logger.info(f"API {'preview' if preview else 'conversion'} requested")
+    
+    client_id = get_client_id()
+    if request.mimetype == RAW_UPLOAD_MIMETYPE:
+        return api_convert_raw(client_id, preview)
+    
+    callback_url = request.form.get("callback_url") or request.args.get("callback_url") \
+        or request.headers.get("X-Callback-Url")
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            app.logger.error(f"API: Invalid callback URL {callback_url}: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+    
+    try:
+        output_format = get_output_format(request.form.get("device_profile", "reMarkable"),
+                                          request.form.get("output_format"))
+        quality = get_quality(request.form.get("quality"))
+    except ValueError as e:
+        app.logger.error(f"API: Invalid conversion option: {str(e)}")
+        return jsonify({"error": str(e)}), 400
     
     if 'epub_file' not in request.files:
         app.logger.error("API: No file part in the request")
@@ -1010,89 +4096,299 @@ def api_convert():
         app.logger.error(f"API: Invalid file extension: {epub_file.filename}")
         return jsonify({"error": "Only EPUB files are supported"}), 400
         
-    if request.content_length > 100 * 1024 * 1024:
+    if request.content_length > MAX_UPLOAD_SIZE:
         app.logger.error(f"API: File too large: {request.content_length / (1024*1024):.2f}MB")
         return jsonify({"error": "File size exceeds the 100MB limit"}), 400
     
+    retry_after = take_upload_token(client_id)
+    if retry_after:
+        app.logger.warning(f"API: Upload rate limit exceeded by {client_id}")
+        return jsonify({"error": "Rate limit exceeded", "retry_after": retry_after}), 429, {'Retry-After': str(retry_after)}
+    
     app.logger.info(f"API: File uploaded: {epub_file.filename}")
     
-    job_id = str(uuid.uuid4())
-    app.logger.info(f"API: Created job ID: {job_id}")
+    job_id = str(uuid.uuid4())
+    app.logger.info(f"API: Created job ID: {job_id}")
+    
+    work_dir = get_work_dir(request.content_length)
+    with tempfile.NamedTemporaryFile(suffix=".epub", dir=work_dir, delete=False) as input_tmp_file, \
+         tempfile.NamedTemporaryFile(suffix=".pdf", dir=work_dir, delete=False) as output_tmp_file:
+
+        input_path = input_tmp_file.name
+        output_path = output_tmp_file.name
+        
+        app.logger.debug(f"API: Created temporary files: input={input_path}, output={output_path}")
+
+        epub_file.save(input_path)
+        app.logger.debug(f"API: Saved uploaded file to {input_path}")
+
+        device_profile = request.form.get("device_profile", "reMarkable")
+        app.logger.info(f"API: Selected device profile: {device_profile}")
+
+        params = get_api_params(device_profile, request.form)
+        app.logger.debug(f"API: Parameters: {params}")
+
+        job_id = submit_conversion(job_id, input_path, output_path, params, device_profile,
+                                   client_id=client_id, job_class='api', preview=preview, callback_url=callback_url,
+                                   batch=request.form.get("batch"), output_format=output_format, quality=quality)
+
+        return get_api_convert_response(job_id)
+
+def api_convert_raw(client_id, preview=False):
+    """
+    Handle an API conversion with the EPUB as the raw request body.
+    The body is streamed straight into the input file and hashed on the way,
+    so the upload is written once and never held in memory. Parameters are
+    taken from the query string or from X-<Parameter-Name> headers,
+    e.g. X-Device-Profile.
+    
+    Args:
+        client_id (str): Client that uploaded the file
+        preview (bool): Whether a preview was requested
+    
+    Returns:
+        Response: JSON with job information or error
+    """
+    options = get_raw_upload_options()
+    
+    callback_url = options.get("callback_url")
+    if callback_url:
+        try:
+            validate_callback_url(callback_url)
+        except ValueError as e:
+            app.logger.error(f"API: Invalid callback URL {callback_url}: {str(e)}")
+            return jsonify({"error": str(e)}), 400
+    
+    try:
+        output_format = get_output_format(options.get("device_profile", "reMarkable"), options.get("output_format"))
+        quality = get_quality(options.get("quality"))
+    except ValueError as e:
+        app.logger.error(f"API: Invalid conversion option: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+    
+    if request.content_length is not None and request.content_length > MAX_UPLOAD_SIZE:
+        app.logger.error(f"API: File too large: {request.content_length / (1024*1024):.2f}MB")
+        return jsonify({"error": "File size exceeds the 100MB limit"}), 400
+    
+    job_id = str(uuid.uuid4())
+    app.logger.info(f"API: Created job ID: {job_id} for raw upload")
+    
+    work_dir = get_work_dir(request.content_length or MAX_UPLOAD_SIZE)
+    with tempfile.NamedTemporaryFile(suffix=".epub", dir=work_dir, delete=False) as input_tmp_file, \
+         tempfile.NamedTemporaryFile(suffix=".pdf", dir=work_dir, delete=False) as output_tmp_file:
+        input_path = input_tmp_file.name
+        output_path = output_tmp_file.name
+        
+        try:
+            size, input_hash = stream_upload(request.stream, input_tmp_file)
+            if options.get("sha256") and options["sha256"].lower() != input_hash:
+                raise ValueError("Request body does not match sha256")
+        except ValueError as e:
+            app.logger.error(f"API: Rejected raw upload: {str(e)}")
+            input_tmp_file.close()
+            output_tmp_file.close()
+            for path in [input_path, output_path]:
+                os.remove(path)
+            return jsonify({"error": str(e)}), 400
+    
+    app.logger.info(f"API: Streamed {size} bytes to {input_path}")
+    
+    retry_after = take_upload_token(client_id)
+    if retry_after:
+        app.logger.warning(f"API: Upload rate limit exceeded by {client_id}")
+        for path in [input_path, output_path]:
+            os.remove(path)
+        return jsonify({"error": "Rate limit exceeded", "retry_after": retry_after}), 429, {'Retry-After': str(retry_after)}
+    
+    device_profile = options.get("device_profile", "reMarkable")
+    app.logger.info(f"API: Selected device profile: {device_profile}")
+    
+    params = get_api_params(device_profile, options)
+    app.logger.debug(f"API: Parameters: {params}")
+    
+    job_id = submit_conversion(job_id, input_path, output_path, params, device_profile, input_hash=input_hash,
+                               client_id=client_id, job_class='api', preview=preview, callback_url=callback_url,
+                               batch=options.get("batch"), output_format=output_format, quality=quality)
+    
+    return get_api_convert_response(job_id)
+
+@app.route("/api/v1/preflight", methods=["POST"])
+def api_preflight():
+    """
+    API endpoint for hash-first uploads.
+    The client sends the SHA-256 of the EPUB with the options of the conversion as
+    JSON. If the client uploaded the input before and it is still in the content
+    store, the job is created without an upload, otherwise the response names the URL to send the EPUB to as raw body.
+    
+    Returns:
+        Response: JSON with job information, or with upload_url if the file is needed
+    """
+    options = request.get_json(silent=True)
+    if not isinstance(options, dict):
+        return jsonify({"error": "A JSON body is required"}), 400
+    options = {key: str(value) for key, value in options.items() if value is not None}
+    
+    input_hash = options.get("sha256", "").lower()
+    if not SHA256_PATTERN.match(input_hash):
+        return jsonify({"error": "sha256 must be the hex SHA-256 digest of the EPUB"}), 400
+    preview = options.pop("preview", "") in ["true", "True", "1"]
+    device_profile = options.get("device_profile", "reMarkable")
+    app.logger.info(f"API: Preflight for {input_hash}")
+    
+    callback_url = options.get("callback_url")
+    try:
+        if callback_url:
+            validate_callback_url(callback_url)
+        output_format = get_output_format(device_profile, options.get("output_format"))
+        quality = get_quality(options.get("quality"))
+    except ValueError as e:
+        app.logger.error(f"API: Invalid conversion option: {str(e)}")
+        return jsonify({"error": str(e)}), 400
+    
+    def upload_required():
+        base_url = request.url_root.rstrip('/')
+        query = urlencode(dict(options, sha256=input_hash))
+        return jsonify({
+            "upload_required": True,
+            "upload_url": f"{base_url}/api/v1/{'preview' if preview else 'convert'}?{query}",
+            "content_type": RAW_UPLOAD_MIMETYPE
+        })
+    
+    client_id = get_client_id()
+    content_path = get_content_path(input_hash, client_id)
+    if not CONTENT_STORE_TTL or not os.path.exists(content_path):
+        return upload_required()
+    
+    retry_after = take_upload_token(client_id)
+    if retry_after:
+        app.logger.warning(f"API: Upload rate limit exceeded by {client_id}")
+        return jsonify({"error": "Rate limit exceeded", "retry_after": retry_after}), 429, {'Retry-After': str(retry_after)}
+    
+    job_id = str(uuid.uuid4())
+    work_dir = get_work_dir(os.path.getsize(content_path))
+    with tempfile.NamedTemporaryFile(suffix=".epub", dir=work_dir, delete=False) as input_tmp_file, \
+         tempfile.NamedTemporaryFile(suffix=".pdf", dir=work_dir, delete=False) as output_tmp_file:
+        input_path = input_tmp_file.name
+        output_path = output_tmp_file.name
+    
+    if not copy_from_content_store(input_hash, client_id, input_path):
+        for path in [input_path, output_path]:
+            os.remove(path)
+        return upload_required()
+    app.logger.info(f"API: Created job ID: {job_id} from the content store")
+    
+    params = get_api_params(device_profile, options)
+    job_id = submit_conversion(job_id, input_path, output_path, params, device_profile, input_hash=input_hash,
+                               client_id=client_id, job_class='api', preview=preview, callback_url=callback_url,
+                               batch=options.get("batch"), output_format=output_format, quality=quality)
+    
+    return get_api_convert_response(job_id)
+
+def get_raw_upload_options():
+    """
+    Collect conversion options of a raw-body upload.
+    Query string values take precedence over X-<Parameter-Name> headers.
+    
+    Returns:
+        dict: Option names mapped to their string values
+    """
+    options = {}
+    for key in ["device_profile", "callback_url", "batch", "output_format", "quality", "sha256"] + list(DEFAULT_PARAMS.keys()):
+        header = "X-" + key.replace("_", "-").title()
+        if key in request.args:
+            options[key] = request.args[key]
+        elif header in request.headers:
+            options[key] = request.headers[header]
+    return options
+
+def stream_upload(stream, target):
+    """
+    Copy an uploaded EPUB from the request stream into a file while hashing it.
+    
+    Args:
+        stream: Readable request body stream
+        target: Binary file object to write to
+        
+    Returns:
+        tuple: (size in bytes, SHA-256 hex digest)
+        
+    Raises:
+        ValueError: If the body is empty, not a ZIP archive or too large
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    
+    for chunk in iter(lambda: stream.read(STREAM_CHUNK_SIZE), b''):
+        if size == 0 and not chunk.startswith(b'PK'):
+            raise ValueError("Request body is not an EPUB file")
+        size += len(chunk)
+        if size > MAX_UPLOAD_SIZE:
+            raise ValueError("File size exceeds the 100MB limit")
+        sha256.update(chunk)
+        target.write(chunk)
     
-    with tempfile.NamedTemporaryFile(suffix=".epub", dir=TEMP_DIR, delete=False) as input_tmp_file, \
-         tempfile.NamedTemporaryFile(suffix=".pdf", dir=TEMP_DIR, delete=False) as output_tmp_file:
+    if size == 0:
+        raise ValueError("Request body is empty")
+    return size, sha256.hexdigest()
 
-        input_path = input_tmp_file.name
-        output_path = output_tmp_file.name
+def get_api_params(device_profile, options):
+    """
+    Resolve the conversion parameters of an API request.
+    
+    Args:
+        device_profile (str): Requested device profile
+        options: Mapping with the custom parameters of the request
         
-        app.logger.debug(f"API: Created temporary files: input={input_path}, output={output_path}")
-
-        epub_file.save(input_path)
-        app.logger.debug(f"API: Saved uploaded file to {input_path}")
-
-        device_profile = request.form.get("device_profile", "reMarkable")
-        app.logger.info(f"API: Selected device profile: {device_profile}")
-
-        if device_profile == "reMarkable":
-            params = REMARKABLE_PARAMS
-        elif device_profile == "boox_air_4c":
-            params = BOOX_AIR_4C_PARAMS
+    Returns:
+        dict: Conversion parameters
+    """
+    if device_profile == "reMarkable":
+        return REMARKABLE_PARAMS
+    elif device_profile == "boox_air_4c":
+        return BOOX_AIR_4C_PARAMS
+    
+    params = {}
+    for key in DEFAULT_PARAMS.keys():
+        if key in options:
+            if key in ["embed_all_fonts", "subset_embedded_fonts", "unsmarten_punctuation", "preserve_cover_aspect_ratio"]:
+                params[key] = options.get(key) in ["true", "True", "1", "on"]
+            else:
+                params[key] = options.get(key)
         else:
-            params = {}
-            for key in DEFAULT_PARAMS.keys():
-                if key in request.form:
-                    if key in ["embed_all_fonts", "subset_embedded_fonts", "unsmarten_punctuation", "preserve_cover_aspect_ratio"]:
-                        params[key] = key in request.form and request.form.get(key) in ["true", "True", "1", "on"]
-                    else:
-                        params[key] = request.form.get(key)
-                else:
-                    params[key] = DEFAULT_PARAMS[key]
-        
-        app.logger.debug(f"API: Parameters: {params}")
-
-        command = build_conversion_command(input_path, output_path, params)
-            
-        app.logger.debug(f"API: Final command: {' '.join(command)}")
-
-        app.logger.info(f"API: Starting conversion thread for job {job_id}")
+            params[key] = DEFAULT_PARAMS[key]
+    return params
 
-        author, title = get_epub_metadata(input_path)
+def get_api_convert_response(job_id):
+    """
+    Build the response of the convert endpoint for a submitted job.
+    
+    Args:
+        job_id (str): Job identifier
         
-        conversion_progress[job_id] = {
-            'status': 'starting', 
-            'progress': 0, 
-            'message': 'Starting conversion...',
-            'input_path': input_path,
-            'output_path': output_path,
-            'detailed_logs': [],
-            'author': author,
-            'title': title
-        }
-        save_jobs()
-
-        thread = threading.Thread(
-            target=run_conversion, 
-            args=(command, job_id, input_path, output_path)
-        )
-        thread.daemon = True
-        thread.start()
-
-        time.sleep(0.2)
+    Returns:
+        tuple: JSON response and 202 status code, 200 if a cached preview is already complete
+    """
+    time.sleep(0.2)
 
-        base_url = request.url_root.rstrip('/')
-        response = {
-            "job_id": job_id,
-            "status_url": f"{base_url}/api/v1/jobs/{job_id}/status",
-            "download_url": f"{base_url}/api/v1/jobs/{job_id}/download",
-            "status": "processing"
-        }
-        
-        return jsonify(response), 202
+    job_data = conversion_progress.get(job_id)
+    completed = job_data is not None and job_data.status == JobStatus.COMPLETED
+    base_url = request.url_root.rstrip('/')
+    response = {
+        "job_id": job_id,
+        "status_url": f"{base_url}/api/v1/jobs/{job_id}/status",
+        "download_url": f"{base_url}/api/v1/jobs/{job_id}/download",
+        "status": "completed" if completed else "processing"
+    }
+    
+    return jsonify(response), 200 if completed else 202
 
 @app.route("/api/v1/jobs/<job_id>/status", methods=["GET"])
 def api_job_status(job_id):
     """
     API endpoint for job status.
+    The ETag is the version of the job record, which increases with every change.
+    With If-None-Match the response is 304 while the job is unchanged, and
+    ?wait=<seconds> holds the request until the job changes (at most STATUS_MAX_WAIT).
     
     Args:
         job_id (str): Job identifier
@@ -1102,35 +4398,45 @@ def api_job_status(job_id):
     """
     app.logger.info(f"API: Status requested for job {job_id}")
     
-    global conversion_progress
-    if job_id not in conversion_progress:
-        app.logger.debug(f"API: Job {job_id} not in memory, trying to load from disk")
-        disk_jobs = load_saved_jobs()
-        if job_id in disk_jobs:
-            app.logger.info(f"API: Found job {job_id} in saved jobs file, reloading")
-            conversion_progress.update(disk_jobs)
+    wait = min(max(request.args.get('wait', 0, type=float), 0), STATUS_MAX_WAIT)
+    refresh_jobs([job_id])
+    
+    if job_id in conversion_progress:
+        version = get_job_version(job_id)
+        if wait and request.if_none_match.contains(str(version)):
+            wait_for_job_changes({job_id: version}, wait)
+            version = get_job_version(job_id)
+        
+        if request.if_none_match.contains(str(version)):
+            response = Response(status=304)
+            response.set_etag(str(version))
+            return response
     
     if job_id in conversion_progress:
-        job_data = conversion_progress[job_id].copy()
+        job_data = conversion_progress[job_id]
+        response_data = job_data.to_dict()
+        response_data['logs'] = response_data.pop('detailed_logs')[-10:]
         
-        if 'detailed_logs' in job_data:
-            job_data['logs'] = job_data['detailed_logs'][-10:]
-            del job_data['detailed_logs']
+        if job_data.status == JobStatus.QUEUED:
+            queue, job_class = get_job_queue(job_data)
+            response_data.update(queue.get_share(job_data.client_id, job_class))
             
-        if job_data['status'] == 'completed':
+        if job_data.status == JobStatus.COMPLETED:
             base_url = request.url_root.rstrip('/')
-            job_data['download_url'] = f"{base_url}/api/v1/jobs/{job_id}/download"
-            
-            if 'author' in job_data and 'title' in job_data:
-                job_data['filename'] = f"{job_data['author']}-{job_data['title']}.pdf"
+            response_data['download_url'] = f"{base_url}/api/v1/jobs/{job_id}/download"
             
-        return jsonify(job_data)
+            if job_data.author and job_data.title:
+                response_data['filename'] = get_download_name(job_id, job_data)
+        
+        response = jsonify(response_data)
+        response.set_etag(str(job_data.version))
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
     
     elif job_id in completed_files:
         file_info = completed_files[job_id]
-        output_path = file_info['path'] if isinstance(file_info, dict) else file_info
         
-        if os.path.exists(output_path):
+        if storage.exists(file_info.path):
             base_url = request.url_root.rstrip('/')
             response_data = {
                 "status": "completed",
@@ -1139,12 +4445,10 @@ def api_job_status(job_id):
                 "download_url": f"{base_url}/api/v1/jobs/{job_id}/download"
             }
             
-            if isinstance(file_info, dict) and 'author' in file_info and 'title' in file_info:
-                author = file_info['author']
-                title = file_info['title']
-                response_data["filename"] = f"{author}-{title}.pdf"
-                response_data["author"] = author
-                response_data["title"] = title
+            if file_info.author and file_info.title:
+                response_data["filename"] = get_download_name(job_id, file_info)
+                response_data["author"] = file_info.author
+                response_data["title"] = file_info.title
                 
             return jsonify(response_data)
 
@@ -1153,6 +4457,245 @@ def api_job_status(job_id):
         "error": "Job not found or expired"
     }), 404
 
+def get_compact_status(job_id, job_data, base_url):
+    """
+    Reduce a job record to the fields a client needs to follow it.
+    
+    Args:
+        job_id (str): Job identifier
+        job_data (Job): Job record
+        base_url (str): Base URL for the download link
+        
+    Returns:
+        dict: Compact status record
+    """
+    compact = {
+        'status': job_data.status,
+        'progress': job_data.progress,
+        'message': job_data.message,
+        'version': job_data.version
+    }
+    if job_data.status == JobStatus.RUNNING:
+        compact['estimated_completion'] = job_data.estimated_completion
+    elif job_data.status == JobStatus.COMPLETED:
+        compact['download_url'] = f"{base_url}/api/v1/jobs/{job_id}/download"
+    elif job_data.status == JobStatus.FAILED:
+        compact['error_details'] = job_data.error_details
+        compact['failure_reason'] = job_data.failure_reason
+    return compact
+
+def get_job_status_record(job_id, base_url):
+    """
+    Get the compact status record of any job, including completed files and unknown jobs.
+    
+    Args:
+        job_id (str): Job identifier
+        base_url (str): Base URL for the download link
+        
+    Returns:
+        dict: Compact status record
+    """
+    job_data = conversion_progress.get(job_id)
+    if job_data is not None:
+        return get_compact_status(job_id, job_data, base_url)
+    if job_id in completed_files:
+        return {'status': 'completed', 'progress': 100, 'version': None,
+                'download_url': f"{base_url}/api/v1/jobs/{job_id}/download"}
+    return {'status': 'not_found'}
+
+def get_batch_job_ids(batch, client_id):
+    """
+    Find the jobs a client tagged with a batch on upload, in all workers.
+    
+    Args:
+        batch (str): Batch tag
+        client_id (str): Client that uploaded the jobs
+        
+    Returns:
+        list: Sorted job IDs
+    """
+    return sorted({job_id for jobs in [get_saved_jobs(), conversion_progress]
+                   for job_id, job_data in list(jobs.items())
+                   if job_data.batch == batch and job_data.client_id == client_id})
+
+def get_versions_etag(versions):
+    """
+    Build the ETag of a set of jobs from their versions.
+    
+    Args:
+        versions (dict): Job IDs mapped to versions
+        
+    Returns:
+        str: ETag value
+    """
+    return hashlib.sha256(json.dumps(sorted(versions.items(), key=lambda item: item[0])).encode()).hexdigest()[:32]
+
+@app.route("/api/v1/jobs/status", methods=["GET", "POST"])
+def api_jobs_status():
+    """
+    API endpoint for the status of many jobs in one request.
+    Jobs are selected by ID (?ids=<id>,<id> or a JSON body {"job_ids": [...]}) or by
+    the batch tag the requesting client gave them on upload (?batch= or {"batch": ...}).
+    ETag, If-None-Match and ?wait= work like for api_job_status(), over all selected jobs.
+    
+    Returns:
+        Response: JSON with a compact status record per job
+    """
+    body = request.get_json(silent=True) if request.method == "POST" else None
+    body = body if isinstance(body, dict) else {}
+    job_ids = body.get('job_ids') or [job_id for job_id in request.args.get('ids', '').split(',') if job_id]
+    batch = body.get('batch') or request.args.get('batch')
+    
+    if not isinstance(job_ids, list) or not all(isinstance(job_id, str) for job_id in job_ids):
+        return jsonify({"error": "job_ids must be a list of job IDs"}), 400
+    if not job_ids and not batch:
+        return jsonify({"error": "Either job IDs or a batch is required"}), 400
+    
+    if batch:
+        job_ids = get_batch_job_ids(batch, get_client_id())
+    
+    if len(job_ids) > BULK_STATUS_MAX_JOBS:
+        return jsonify({"error": f"At most {BULK_STATUS_MAX_JOBS} jobs per request"}), 400
+    app.logger.info(f"API: Status requested for {len(job_ids)} jobs")
+    
+    wait = min(max(request.args.get('wait', 0, type=float), 0), STATUS_MAX_WAIT)
+    refresh_jobs(job_ids)
+    
+    versions = {job_id: get_job_version(job_id) for job_id in job_ids}
+    etag = get_versions_etag(versions)
+    if wait and request.if_none_match.contains(etag):
+        wait_for_job_changes(versions, wait)
+        versions = {job_id: get_job_version(job_id) for job_id in job_ids}
+        etag = get_versions_etag(versions)
+    
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    
+    base_url = request.url_root.rstrip('/')
+    jobs = {job_id: get_job_status_record(job_id, base_url) for job_id in job_ids}
+    
+    response = jsonify({'jobs': jobs})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route("/api/v1/jobs/events", methods=["GET"])
+def api_jobs_events():
+    """
+    Server-sent events stream for many jobs on one connection.
+    Jobs are selected like for api_jobs_status() with ?ids=<id>,<id> or ?batch=<tag>;
+    jobs the client adds to the batch later are picked up while the stream is open.
+    Every change of a job is sent as a "job" event with its compact status record,
+    a "done" event follows once all jobs have finished. A batch can still grow,
+    so its stream only ends after all jobs have been finished, or the batch has
+    been empty, for EVENT_STREAM_IDLE_TIMEOUT seconds without a change.
+    
+    Returns:
+        Response: Server-sent events stream
+    """
+    job_ids = [job_id for job_id in request.args.get('ids', '').split(',') if job_id]
+    batch = request.args.get('batch')
+    if not job_ids and not batch:
+        return jsonify({"error": "Either job IDs or a batch is required"}), 400
+    if len(job_ids) > BULK_STATUS_MAX_JOBS:
+        return jsonify({"error": f"At most {BULK_STATUS_MAX_JOBS} jobs per request"}), 400
+    
+    client_id = get_client_id()
+    base_url = request.url_root.rstrip('/')
+    app.logger.info(f"Event stream opened for {f'batch {batch}' if batch else f'{len(job_ids)} jobs'}")
+    
+    def generate():
+        selected = job_ids
+        sent = {}
+        last_sent = last_change = time.time()
+        
+        while True:
+            if batch:
+                selected = get_batch_job_ids(batch, client_id)[:BULK_STATUS_MAX_JOBS]
+            refresh_jobs(selected)
+            
+            finished = True
+            for job_id in selected:
+                record = get_job_status_record(job_id, base_url)
+                finished = finished and record['status'] in ['completed', 'failed', 'not_found']
+                if job_id in sent and sent[job_id] == record.get('version', 'not_found'):
+                    continue
+                sent[job_id] = record.get('version', 'not_found')
+                record['job_id'] = job_id
+                yield f"event: job\ndata: {json.dumps(record)}\n\n"
+                last_sent = last_change = time.time()
+            
+            if finished and (not batch or time.time() - last_change >= EVENT_STREAM_IDLE_TIMEOUT):
+                yield f"event: done\ndata: {json.dumps({'jobs': len(selected)})}\n\n"
+                return
+            
+            if time.time() - last_sent >= EVENT_STREAM_HEARTBEAT:
+                yield ": keep-alive\n\n"
+                last_sent = time.time()
+            
+            versions = {job_id: get_job_version(job_id) for job_id in selected}
+            wait_for_job_changes(versions, 1.0 if batch else EVENT_STREAM_HEARTBEAT)
+    
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    response.headers['Pragma'] = 'no-cache'
+    response.headers['Expires'] = '0'
+    return response
+
+@app.route("/api/v1/stats", methods=["GET"])
+def api_stats():
+    """
+    API endpoint for aggregate conversion statistics.
+    Based on the conversion history shared by all workers.
+    
+    Returns:
+        Response: JSON with conversion durations and speed per device profile
+    """
+    app.logger.info("API: Stats requested")
+    
+    history = load_conversion_history()
+    profiles = {}
+    for entry in history:
+        profiles.setdefault(entry['device_profile'] or 'custom', []).append(entry)
+    
+    def summarize(entries):
+        durations = sorted(entry['duration'] for entry in entries)
+        total_size = sum(entry['input_size'] for entry in entries)
+        return {
+            "conversions": len(entries),
+            "mean_duration": round(sum(durations) / len(durations), 1),
+            "median_duration": durations[len(durations) // 2],
+            "p90_duration": durations[min(int(len(durations) * 0.9), len(durations) - 1)],
+            "seconds_per_mb": round(sum(durations) / (total_size / (1024 * 1024)), 2) if total_size else None
+        }
+    
+    pdf_history = [entry for entry in history if entry.get('output_format', 'pdf') == 'pdf']
+    standard_history = [entry for entry in pdf_history if entry.get('quality', 'standard') == 'standard']
+    modes = {
+        mode: summarize(entries) for mode, entries in [
+            ("single", [entry for entry in standard_history if not entry.get('parallel')]),
+            ("parallel", [entry for entry in standard_history if entry.get('parallel')]),
+            ("draft", [entry for entry in pdf_history if entry.get('quality') == 'draft']),
+            ("epub", [entry for entry in history if entry.get('output_format') == 'epub'])
+        ] if entries
+    }
+    
+    draft_speedup = None
+    if 'single' in modes and 'draft' in modes and modes['single']['seconds_per_mb'] and modes['draft']['seconds_per_mb']:
+        draft_speedup = round(modes['single']['seconds_per_mb'] / modes['draft']['seconds_per_mb'], 2)
+    
+    hour_ago = time.time() - 3600
+    return jsonify({
+        "history_size": len(history),
+        "conversions_last_hour": sum(1 for entry in history if entry['finished'] >= hour_ago),
+        "overall": summarize(history) if history else None,
+        "modes": modes,
+        "draft_speedup": draft_speedup,
+        "device_profiles": {profile: summarize(entries) for profile, entries in profiles.items()}
+    })
+
 @app.route("/api/v1/jobs/<job_id>/download", methods=["GET"])
 def api_job_download(job_id):
     """
@@ -1165,91 +4708,393 @@ def api_job_download(job_id):
         Response: File download or error JSON
     """
     app.logger.info(f"API: Download requested for job {job_id}")
-    global conversion_progress, completed_files
     
-    app.logger.debug(f"API: Job ID {job_id} in conversion_progress: {job_id in conversion_progress}")
-    app.logger.debug(f"API: Job ID {job_id} in completed_files: {job_id in completed_files}")
-    if job_id not in conversion_progress and job_id not in completed_files:
-        app.logger.debug(f"API: Job {job_id} not in memory, trying to load from disk")
-        disk_jobs = load_saved_jobs()
-        disk_completed = load_completed_files()
+    output_key, filename = get_job_output(job_id)
+    if output_key:
+        app.logger.info(f"API: Sending file {output_key} for job {job_id}")
+        try:
+            return storage.send(output_key, filename, mimetype=get_output_mimetype(filename))
+        except Exception as e:
+            app.logger.error(f"API: Error sending file: {str(e)}")
+
+    return jsonify({"error": "File not found or job expired"}), 404
+
+DEVICE_PROFILES = {
+    "reMarkable": REMARKABLE_PARAMS,
+    "boox_air_4c": BOOX_AIR_4C_PARAMS,
+}
+
+MANIFEST_FILENAME = '.conversion_manifest.json'
+
+def convert_book(input_path, output_dir, params, device_profile=None):
+    """
+    Convert a single EPUB outside of the job system.
+    The book is converted to the OUTPUT_FORMAT of the device profile, written
+    to a temporary file in output_dir and linked to author-title.<format> once
+    the conversion succeeded, existing files get a numbered name instead of
+    being overwritten.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+        output_dir (str): Directory for the converted book
+        params (dict): Conversion parameters
+        device_profile (str, optional): Device profile the parameters came from
         
-        if job_id in disk_jobs:
-            app.logger.info(f"API: Found job {job_id} in saved jobs file, reloading")
-            conversion_progress.update(disk_jobs)
+    Returns:
+        str: Path of the converted book
         
-        if job_id in disk_completed:
-            app.logger.info(f"API: Found job {job_id} in completed files, reloading")
-            completed_files.update(disk_completed)
+    Raises:
+        RuntimeError: If the conversion failed
+    """
+    author, title = get_epub_metadata(input_path)
+    output_format = get_output_format(device_profile)
+    os.makedirs(output_dir, exist_ok=True)
     
-    if job_id in conversion_progress:
-        job_data = conversion_progress[job_id]
-        app.logger.debug(f"API: Job data in conversion_progress: {job_data}")
+    with tempfile.NamedTemporaryFile(prefix=".", suffix=f".part.{output_format}", dir=output_dir,
+                                     delete=False) as output_tmp_file:
+        tmp_path = output_tmp_file.name
+    
+    calibre_tmp = None
+    try:
+        if get_work_dir(os.path.getsize(input_path)) == SCRATCH_DIR:
+            calibre_tmp = tempfile.mkdtemp(prefix='calibre-', dir=SCRATCH_DIR)
+        
+        verbosity = int(get_profile_option(device_profile, 'calibre_verbosity', CALIBRE_VERBOSITY))
+        command = build_conversion_command(input_path, tmp_path, params, verbosity, output_format=output_format)
+        budget = get_conversion_budget(os.path.getsize(input_path), device_profile)
+        result = execute_conversion(command, tmp_path, budget, tmpdir=calibre_tmp)
         
-        if 'status' in job_data:
-            app.logger.debug(f"API: Job status: {job_data['status']}")
+        if result['timeout']:
+            raise RuntimeError(result['timeout'][1])
+        if result['limit_hit']:
+            raise RuntimeError(f"Resource limit exceeded: {result['limit_hit']}")
+        if result['returncode'] != 0:
+            raise RuntimeError(f"ebook-convert failed with code {result['returncode']}: "
+                               + ' | '.join(result['output_tail'][-3:]))
+        if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) == 0:
+            raise RuntimeError("Output file not created")
+        
+        if output_format == 'epub' and IMAGE_DOWNSCALING:
+            try:
+                downscale_epub_images(tmp_path, params.get('custom_size'))
+            except Exception as e:
+                app.logger.warning(f"Could not downscale the images of {input_path}: {str(e)}")
+        
+        base_path = os.path.join(output_dir, f"{author}-{title}")
+        output_path = f"{base_path}.{output_format}"
+        counter = 1
+        while True:
+            try:
+                os.link(tmp_path, output_path)
+                return output_path
+            except FileExistsError:
+                counter += 1
+                output_path = f"{base_path}-{counter}.{output_format}"
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        if calibre_tmp:
+            shutil.rmtree(calibre_tmp, ignore_errors=True)
+
+def load_manifest(path):
+    """
+    Load the manifest of a previous batch run.
+    
+    Args:
+        path (str): Path to the manifest file
         
-        if 'output_path' in job_data:
-            output_path = job_data['output_path']
-            app.logger.debug(f"API: Output path from conversion_progress: {output_path}")
-            app.logger.debug(f"API: File exists: {os.path.exists(output_path)}")
+    Returns:
+        dict: Manifest entries by relative input path, empty if none found
+    """
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            app.logger.error(f"Error loading manifest {path}: {str(e)}")
+    return {}
+
+def save_manifest(path, manifest):
+    """
+    Atomically write the batch manifest.
+    
+    Args:
+        path (str): Path to the manifest file
+        manifest (dict): Manifest entries by relative input path
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+@app.cli.command("batch-convert")
+@click.argument("source", type=click.Path(exists=True, file_okay=False))
+@click.argument("destination", type=click.Path(file_okay=False))
+@click.option("--profile", "device_profile", type=click.Choice(list(DEVICE_PROFILES)), default="reMarkable",
+              show_default=True, help="Device profile to convert for.")
+@click.option("--workers", type=int, default=os.cpu_count() or 1, show_default=True,
+              help="Number of parallel ebook-convert processes.")
+@click.option("--force", is_flag=True, help="Convert all files, ignoring the manifest.")
+def batch_convert_command(source, destination, device_profile, workers, force):
+    """
+    Convert all EPUB files below SOURCE into DESTINATION.
+    The directory structure is mirrored. Files whose content and parameters
+    did not change since the last run are skipped.
+    """
+    params = DEVICE_PROFILES[device_profile]
+    output_format = get_output_format(device_profile)
+    key_params = params if output_format == 'pdf' else dict(params, output_format=output_format)
+    params_hash = hashlib.sha256(json.dumps(key_params, sort_keys=True).encode()).hexdigest()
+    manifest_path = os.path.join(destination, MANIFEST_FILENAME)
+    os.makedirs(destination, exist_ok=True)
+    manifest = {} if force else load_manifest(manifest_path)
+    manifest_lock = threading.Lock()
+    
+    pending = []
+    skipped = 0
+    for root, _, files in os.walk(source):
+        for name in sorted(files):
+            if not name.lower().endswith('.epub'):
+                continue
+            input_path = os.path.join(root, name)
+            rel_path = os.path.relpath(input_path, source)
+            stat = os.stat(input_path)
+            entry = manifest.get(rel_path)
             
-            if job_data.get('status') == 'completed' and os.path.exists(output_path):
-                app.logger.info(f"API: Sending file {output_path} for job {job_id} (from conversion_progress)")
-                try:
-                    if 'author' in job_data and 'title' in job_data:
-                        author = job_data['author']
-                        title = job_data['title']
-                        filename = f"{author}-{title}.pdf"
-                    else:
-                        filename = f"converted_{job_id[:8]}.pdf"
-                    
-                    completed_files[job_id] = {
-                        'path': output_path,
-                        'author': job_data.get('author', 'unknown'),
-                        'title': job_data.get('title', 'ebook')
-                    }
-                    save_completed_files()
-                                        
-                    response = send_file(output_path, as_attachment=True, 
-                                    download_name=filename,
-                                    mimetype="application/pdf")
-                    response.headers['Cache-Control'] = 'public, max-age=86400'
-                    response.headers['ETag'] = hashlib.md5(str(os.path.getmtime(output_path)).encode()).hexdigest()
-                    return response
-                except Exception as e:
-                    app.logger.error(f"API: Error sending file from conversion_progress: {str(e)}")
+            if entry and entry.get('params') == params_hash \
+                    and os.path.exists(os.path.join(destination, entry.get('output', ''))):
+                if entry.get('size') == stat.st_size and entry.get('mtime') == stat.st_mtime:
+                    skipped += 1
+                    continue
+                content_hash = hash_file(input_path)
+                if entry.get('sha256') == content_hash:
+                    entry.update({'size': stat.st_size, 'mtime': stat.st_mtime})
+                    skipped += 1
+                    continue
+            
+            pending.append((input_path, rel_path, stat))
     
-    if job_id in completed_files:
-        file_info = completed_files[job_id]
-        app.logger.debug(f"API: File info in completed_files: {file_info}")
+    click.echo(f"{len(pending)} files to convert, {skipped} unchanged, {workers} workers")
+    
+    def convert_entry(input_path, rel_path, stat):
+        content_hash = hash_file(input_path)
+        output_dir = os.path.join(destination, os.path.dirname(rel_path))
         
-        output_path = file_info['path'] if isinstance(file_info, dict) else file_info
-        app.logger.debug(f"API: Output path from completed_files: {output_path}")
-        app.logger.debug(f"API: File exists: {os.path.exists(output_path)}")
+        with manifest_lock:
+            previous = manifest.pop(rel_path, None)
+        if previous and os.path.exists(os.path.join(destination, previous.get('output', ''))):
+            os.remove(os.path.join(destination, previous['output']))
         
-        if os.path.exists(output_path):
-            app.logger.info(f"API: Sending file {output_path} for job {job_id} (from completed_files)")
+        started = time.time()
+        output_path = convert_book(input_path, output_dir, params, device_profile)
+        duration = time.time() - started
+        
+        with manifest_lock:
+            manifest[rel_path] = {
+                'sha256': content_hash,
+                'params': params_hash,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime,
+                'output': os.path.relpath(output_path, destination),
+                'duration': round(duration, 2)
+            }
+            save_manifest(manifest_path, manifest)
+        return duration
+    
+    started = time.time()
+    converted = 0
+    failed = 0
+    input_bytes = 0
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        futures = {executor.submit(convert_entry, *item): item for item in pending}
+        for future in as_completed(futures):
+            input_path, rel_path, stat = futures[future]
             try:
-                if isinstance(file_info, dict) and 'author' in file_info and 'title' in file_info:
-                    author = file_info['author']
-                    title = file_info['title']
-                    filename = f"{author}-{title}.pdf"
-                else:
-                    filename = f"converted_{job_id[:8]}.pdf"
-                
-                response = send_file(output_path, as_attachment=True, 
-                                download_name=filename,
-                                mimetype="application/pdf")
-                response.headers['Cache-Control'] = 'public, max-age=86400'
-                response.headers['ETag'] = hashlib.md5(str(os.path.getmtime(output_path)).encode()).hexdigest()
-                return response
+                duration = future.result()
+                converted += 1
+                input_bytes += stat.st_size
+                click.echo(f"[{converted + failed}/{len(pending)}] {rel_path} ({duration:.1f}s)")
             except Exception as e:
-                app.logger.error(f"API: Error sending file from completed_files: {str(e)}")
-        else:
-            app.logger.warning(f"API: File {output_path} from completed_files doesn't exist for job {job_id}")
+                failed += 1
+                click.echo(f"[{converted + failed}/{len(pending)}] {rel_path} FAILED: {str(e)}", err=True)
+    
+    with manifest_lock:
+        save_manifest(manifest_path, manifest)
+    
+    elapsed = time.time() - started
+    click.echo(f"Converted {converted}, skipped {skipped}, failed {failed} in {elapsed:.1f}s")
+    if converted and elapsed > 0:
+        click.echo(f"Throughput: {converted / elapsed * 60:.1f} books/min, "
+                   f"{input_bytes / (1024 * 1024) / elapsed:.2f} MB/s of input")
+    
+    if failed:
+        raise SystemExit(1)
 
-    return jsonify({"error": "File not found or job expired"}), 404
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+INOTIFY_EVENT = struct.Struct('iIII')
+PARTIAL_SUFFIXES = ('.part', '.tmp', '.crdownload', '.partial')
+
+def open_inotify(path):
+    """
+    Watch a directory for written and moved-in files with inotify.
+    
+    Args:
+        path (str): Directory to watch
+        
+    Returns:
+        int: inotify file descriptor, None if inotify is not available
+    """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+        if libc.inotify_add_watch(fd, os.fsencode(path), mask) < 0:
+            os.close(fd)
+            raise OSError(ctypes.get_errno(), "inotify_add_watch failed")
+        return fd
+    except (OSError, AttributeError) as e:
+        app.logger.warning(f"inotify not available ({str(e)}), falling back to polling")
+        return None
+
+def read_inotify_names(fd):
+    """
+    Read the file names of all pending inotify events.
+    
+    Args:
+        fd (int): inotify file descriptor
+        
+    Returns:
+        set: Names of the files that changed
+    """
+    names = set()
+    try:
+        data = os.read(fd, 64 * 1024)
+    except BlockingIOError:
+        return names
+    
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+        if name:
+            names.add(os.fsdecode(name))
+    return names
+
+def is_inbox_candidate(name):
+    """
+    Check whether a file in the inbox should be converted.
+    
+    Args:
+        name (str): File name
+        
+    Returns:
+        bool: True for finished EPUB files
+    """
+    return not name.startswith('.') and name.lower().endswith('.epub') and not name.lower().endswith(PARTIAL_SUFFIXES)
+
+@app.cli.command("watch-folder")
+@click.argument("inbox", type=click.Path(exists=True, file_okay=False))
+@click.argument("outbox", type=click.Path(file_okay=False))
+@click.option("--profile", "device_profile", type=click.Choice(list(DEVICE_PROFILES)), default="reMarkable",
+              show_default=True, help="Device profile to convert for.")
+@click.option("--workers", type=int, default=MAX_CONCURRENT_CONVERSIONS, show_default=True,
+              help="Maximum number of parallel conversions.")
+@click.option("--settle", type=float, default=2.0, show_default=True,
+              help="Seconds a file must stay unchanged before it is converted.")
+@click.option("--poll", is_flag=True, help="Poll the inbox instead of using inotify.")
+def watch_folder_command(inbox, outbox, device_profile, workers, settle, poll):
+    """
+    Convert EPUB files dropped into INBOX and move the results to OUTBOX.
+    Converted inputs are moved to INBOX/.processed, failed ones to INBOX/.failed.
+    """
+    params = DEVICE_PROFILES[device_profile]
+    processed_dir = os.path.join(inbox, '.processed')
+    failed_dir = os.path.join(inbox, '.failed')
+    for directory in [outbox, processed_dir, failed_dir]:
+        os.makedirs(directory, exist_ok=True)
+    
+    inotify_fd = None if poll else open_inotify(inbox)
+    click.echo(f"Watching {inbox} ({'inotify' if inotify_fd is not None else 'polling'}), "
+               f"writing to {outbox} with {workers} workers")
+    
+    candidates = {}
+    in_flight = set()
+    in_flight_lock = threading.Lock()
+    
+    def convert_inbox_file(name):
+        input_path = os.path.join(inbox, name)
+        started = time.time()
+        try:
+            output_path = convert_book(input_path, outbox, params, device_profile)
+            os.replace(input_path, os.path.join(processed_dir, name))
+            click.echo(f"{name} -> {os.path.basename(output_path)} ({time.time() - started:.1f}s)")
+        except Exception as e:
+            click.echo(f"{name} FAILED: {str(e)}", err=True)
+            if os.path.exists(input_path):
+                os.replace(input_path, os.path.join(failed_dir, name))
+            with open(os.path.join(failed_dir, f"{name}.error.txt"), 'w') as f:
+                f.write(str(e))
+        finally:
+            with in_flight_lock:
+                in_flight.discard(name)
+    
+    def note_change(name):
+        if not is_inbox_candidate(name):
+            return
+        with in_flight_lock:
+            if name in in_flight:
+                candidates.pop(name, None)
+                return
+        try:
+            stat = os.stat(os.path.join(inbox, name))
+        except FileNotFoundError:
+            candidates.pop(name, None)
+            return
+        signature = (stat.st_size, stat.st_mtime)
+        if candidates.get(name, (None, 0))[0] != signature:
+            candidates[name] = (signature, time.time())
+    
+    for name in os.listdir(inbox):
+        note_change(name)
+    
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        try:
+            while True:
+                if inotify_fd is not None:
+                    readable, _, _ = select.select([inotify_fd], [], [], min(settle, 1.0))
+                    if readable:
+                        for name in read_inotify_names(inotify_fd):
+                            note_change(name)
+                    for name in list(candidates):
+                        note_change(name)
+                else:
+                    time.sleep(min(settle, 1.0))
+                    for name in set(os.listdir(inbox)) | set(candidates):
+                        note_change(name)
+                
+                now = time.time()
+                for name, (signature, changed) in list(candidates.items()):
+                    if now - changed < settle or signature[0] == 0:
+                        continue
+                    del candidates[name]
+                    with in_flight_lock:
+                        if name in in_flight:
+                            continue
+                        in_flight.add(name)
+                    executor.submit(convert_inbox_file, name)
+        except KeyboardInterrupt:
+            click.echo("Stopping, waiting for running conversions...")
+        finally:
+            if inotify_fd is not None:
+                os.close(inotify_fd)
 
 if __name__ == "__main__":
     app.logger.info("Starting application")
@@ -48,6 +48,17 @@ const translations = {
         preserveCoverAspectRatio: "Seitenverhältnis des Covers beibehalten",
         justification: "Ausrichtung:",
         convertToPDF: "Zu PDF konvertieren",
+        previewFirstPages: "Vorschau der ersten Seiten",
+        downloadPreview: "Vorschau herunterladen",
+        outputFormat: "Ausgabeformat:",
+        profileDefault: "Standard des Geräteprofils",
+        formatPdf: "PDF",
+        formatEpub: "EPUB (verkleinert, für Geräte mit EPUB-Unterstützung)",
+        downloadEPUB: "EPUB herunterladen",
+        quality: "Qualität:",
+        qualityAuto: "Automatisch (Entwurf bei hoher Auslastung)",
+        qualityStandard: "Standard",
+        qualityDraft: "Entwurf (schneller, ohne eingebettete Schriften)",
         selectFile: "Durchsuchen...",
         noFileSelected: "Keine Datei ausgewählt",
         byUsingService: "Durch die Nutzung dieses Dienstes akzeptieren Sie unsere",
@@ -71,6 +82,7 @@ const translations = {
         conversionInProgress: "Die Konvertierung scheint noch im Gange zu sein oder ist fehlgeschlagen. Bitte versuchen Sie es später erneut.",
         errorOccurred: "Es ist ein Fehler aufgetreten. Bitte versuchen Sie es später erneut.",
         connectionLost: "Die Server-Verbindung wurde unterbrochen. Die Konvertierung läuft aber möglicherweise noch im Hintergrund. Bitte verwenden Sie den \"Verbindung wiederherstellen\"-Button, um die Verbindung erneut herzustellen.",
+        remainingTime: "noch ca.",
         attention: "Achtung",
         statusInconsistency: "Die Statusanzeige ist widersprüchlich. Bitte klicken Sie auf \"Verbindung wiederherstellen\", um den tatsächlichen Status zu prüfen.",
         jobNotFoundError: "Der Konvertierungsauftrag wurde nicht gefunden. Dies kann passieren, wenn:\n- Die Seite neu geladen wurde\n- Der Server neu gestartet wurde\n- Der Auftrag bereits abgeschlossen oder abgelaufen ist\n\nBitte versuchen Sie es erneut mit einer neuen Konvertierung.",
@@ -90,7 +102,25 @@ const translations = {
         errorRetrievingFonts: "Fehler beim Abrufen der Schriftarten:",
         noFontsFound: "Keine Schriftarten gefunden",
         diskSpace: "Speicherplatz",
-        environmentVariables: "Umgebungsvariablen",
+        worker: "Worker",
+        workerMemory: "Speicher (RSS):",
+        threads: "Threads:",
+        queueDepth: "Warteschlange:",
+        activeConversions: "Laufende Konvertierungen",
+        noActiveConversions: "Keine laufenden Konvertierungen",
+        runtime: "Laufzeit (s)",
+        processes: "Prozesse",
+        cpuSeconds: "CPU (s)",
+        memory: "Speicher (MB)",
+        recentConversions: "Letzte Konvertierungen",
+        noRecentConversions: "Noch keine Konvertierungen",
+        meanDuration: "Mittlere Dauer (s):",
+        profile: "Profil",
+        inputSize: "Größe (Bytes)",
+        duration: "Dauer (s)",
+        persistence: "Persistenz",
+        diskFree: "Frei (MB):",
+        scratchUsed: "Scratch belegt (MB):",
         backToHomepage: "Zurück zur Startseite"
     },
     en: {
@@ -142,6 +172,17 @@ const translations = {
         preserveCoverAspectRatio: "Preserve Cover Aspect Ratio",
         justification: "Justification:",
         convertToPDF: "Convert to PDF",
+        previewFirstPages: "Preview first pages",
+        downloadPreview: "Download preview",
+        outputFormat: "Output format:",
+        profileDefault: "Device profile default",
+        formatPdf: "PDF",
+        formatEpub: "EPUB (slimmed, for devices that read EPUB)",
+        downloadEPUB: "Download EPUB",
+        quality: "Quality:",
+        qualityAuto: "Automatic (draft under high load)",
+        qualityStandard: "Standard",
+        qualityDraft: "Draft (faster, no embedded fonts)",
         selectFile: "Browse...",
         noFileSelected: "No file selected",
         byUsingService: "By using this service, you accept our",
@@ -165,6 +206,7 @@ const translations = {
         conversionInProgress: "The conversion appears to be still in progress or has failed. Please try again later.",
         errorOccurred: "An error occurred. Please try again later.",
         connectionLost: "The server connection was interrupted. The conversion may still be running in the background. Please use the \"Reconnect\" button to re-establish the connection.",
+        remainingTime: "remaining approx.",
         attention: "Attention",
         statusInconsistency: "The status display is inconsistent. Please click on \"Reconnect\" to check the actual status.",
         jobNotFoundError: "The conversion job was not found. This can happen if:\n- The page was reloaded\n- The server was restarted\n- The job has already completed or expired\n\nPlease try again with a new conversion.",
@@ -184,7 +226,25 @@ const translations = {
         errorRetrievingFonts: "Error retrieving fonts:",
         noFontsFound: "No fonts found",
         diskSpace: "Disk Space",
-        environmentVariables: "Environment Variables",
+        worker: "Worker",
+        workerMemory: "Memory (RSS):",
+        threads: "Threads:",
+        queueDepth: "Queue depth:",
+        activeConversions: "Running Conversions",
+        noActiveConversions: "No running conversions",
+        runtime: "Runtime (s)",
+        processes: "Processes",
+        cpuSeconds: "CPU (s)",
+        memory: "Memory (MB)",
+        recentConversions: "Recent Conversions",
+        noRecentConversions: "No conversions yet",
+        meanDuration: "Mean duration (s):",
+        profile: "Profile",
+        inputSize: "Size (bytes)",
+        duration: "Duration (s)",
+        persistence: "Persistence",
+        diskFree: "Free (MB):",
+        scratchUsed: "Scratch used (MB):",
         backToHomepage: "Back to Homepage"
     }
 };
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Measure the memory footprint of retained job records.
+
+Builds the given number of finished jobs once as free-form dicts (the record
+format before the Job type) and once as Job records, with the fields a
+completed conversion has, and reports the allocated memory per job and the
+size of the saved jobs file in both forms. Job records keep only the last
+FINISHED_JOB_LOG_LINES output lines, like run_conversion() does. Finished jobs are kept until
+JOB_TIMEOUT, so this is what a busy worker holds between two cleanups.
+
+Usage:
+    python tools/benchmark_job_memory.py
+    python tools/benchmark_job_memory.py --jobs 20000 --log-lines 300
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+
+def make_fields(index, log_lines):
+    """
+    Create the fields of a completed job.
+
+    Args:
+        index (int): Number of the job, makes the values unique
+        log_lines (int): Number of retained Calibre output lines
+
+    Returns:
+        tuple: (job ID, dict of fields)
+    """
+    job_id = str(uuid.uuid4())
+    output_key = f"/tmp/tmp{index:08d}.pdf"
+    now = time.time()
+    return job_id, {
+        'status': 'completed',
+        'progress': 100,
+        'message': 'Conversion completed successfully!',
+        'version': 14,
+        'author': f"Author {index}",
+        'title': f"Title {index}",
+        'client_id': f"10.0.{index // 256 % 256}.{index % 256}",
+        'job_class': 'web',
+        'device_profile': 'reMarkable',
+        'params': {'output_profile': 'tablet', 'base_font_size': 12},
+        'coalescing_key': uuid.uuid4().hex + uuid.uuid4().hex,
+        'input_path': f"/tmp/tmp{index:08d}.epub",
+        'output_path': output_key,
+        'output_key': output_key,
+        'input_size': 1048576 + index,
+        'attempts': 1,
+        'worker': f"{1000 + index % 4}:123456",
+        'started_time': now - 30,
+        'completed_time': now,
+        'rate': 3.33,
+        'detailed_logs': [f"{percent}% Rendering chapter {percent} of job {index}"
+                          for percent in range(log_lines)],
+    }
+
+def measure(build, count):
+    """
+    Measure the memory allocated while building records.
+
+    Args:
+        build (callable): Returns (job ID, record) for an index
+        count (int): Number of records
+
+    Returns:
+        tuple: (dict of records, allocated bytes)
+    """
+    gc.collect()
+    tracemalloc.start()
+    records = dict(build(index) for index in range(count))
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return records, allocated
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--jobs', type=int, default=100000, help="Number of retained jobs")
+    parser.add_argument('--log-lines', type=int, default=0, help="Calibre output lines kept per job")
+    args = parser.parse_args()
+
+    os.environ.setdefault('TEMP_DIR', tempfile.mkdtemp(prefix='epub_benchmark_'))
+    sys.path.insert(0, REPO_DIR)
+    import app as app_module
+
+    def build_dict(index):
+        return make_fields(index, args.log_lines)
+
+    def build_job(index):
+        job_id, data = make_fields(index, args.log_lines)
+        job = app_module.Job.from_dict(data)
+        del job.detailed_logs[:-app_module.FINISHED_JOB_LOG_LINES]
+        return job_id, job
+
+    dicts, dict_bytes = measure(build_dict, args.jobs)
+    dict_file = len(json.dumps(dicts))
+    del dicts
+
+    jobs, job_bytes = measure(build_job, args.jobs)
+    job_file = len(json.dumps({job_id: job.to_dict(compact=True) for job_id, job in jobs.items()}))
+    del jobs
+
+    print(f"{args.jobs} finished jobs, {args.log_lines} log lines each")
+    print(f"  {'':>6}  {'memory':>10}  {'per job':>9}  {'jobs file':>10}")
+    for name, allocated, file_size in [('dict', dict_bytes, dict_file), ('Job', job_bytes, job_file)]:
+        print(f"  {name:>6}  {allocated / 1024 / 1024:>7.1f} MB  {allocated / args.jobs:>7.0f} B"
+              f"  {file_size / 1024 / 1024:>7.1f} MB")
+    print(f"  Job records use {job_bytes / dict_bytes:.0%} of the memory of dicts")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark chapter-parallel and draft conversion against a single Calibre process.
+
+Converts each EPUB once with execute_conversion() and once per chunk count
+with execute_parallel_conversion(), using the parameters of a device profile,
+and reports wall time, speedup and page count of the resulting PDFs. With
+--draft the book is also converted by a single process with the draft
+parameters, which shows the speedup of the draft quality per book. Run it
+on the machine (and with the CPU limits) the service is deployed on; the
+chunk count that pays off depends on the number of cores and the books.
+
+Usage:
+    python tools/benchmark_parallel.py book1.epub book2.epub --chunks 2 4 --runs 3
+    python tools/benchmark_parallel.py big.epub --profile boox_air_4c --output results.json
+    python tools/benchmark_parallel.py book.epub --chunks --draft
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+
+def count_pages(pdf_path):
+    """
+    Count the pages of a PDF.
+
+    Args:
+        pdf_path (str): Path to the PDF file
+
+    Returns:
+        int: Number of pages, or None if the file cannot be read
+    """
+    try:
+        from pypdf import PdfReader
+        return len(PdfReader(pdf_path).pages)
+    except Exception:
+        return None
+
+def run_once(app_module, input_path, params, chunk_count, work_dir):
+    """
+    Convert a book once and time it.
+
+    Args:
+        app_module: The imported app module
+        input_path (str): Path to the EPUB file
+        params (dict): Conversion parameters
+        chunk_count (int): Number of parallel parts, 1 for a single process
+        work_dir (str): Directory for the output
+
+    Returns:
+        dict: 'seconds', 'ok' and 'pages'
+    """
+    output_path = os.path.join(work_dir, f"output-{chunk_count}{'-draft' if params.get('draft') else ''}.pdf")
+    if os.path.exists(output_path):
+        os.remove(output_path)
+
+    started = time.perf_counter()
+    if chunk_count == 1:
+        command = app_module.build_conversion_command(input_path, output_path, params)
+        result = app_module.execute_conversion(command, output_path, label='benchmark')
+    else:
+        result = app_module.execute_parallel_conversion(input_path, output_path, params, label='benchmark',
+                                                        chunk_count=chunk_count)
+    seconds = time.perf_counter() - started
+
+    ok = bool(result) and result['returncode'] == 0 and os.path.exists(output_path)
+    return {'seconds': seconds, 'ok': ok, 'pages': count_pages(output_path) if ok else None}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('books', nargs='+', help="EPUB files to convert")
+    parser.add_argument('--chunks', type=int, nargs='*', default=[2, 4], help="Chunk counts to compare")
+    parser.add_argument('--draft', action='store_true', help="Also convert with the draft parameters")
+    parser.add_argument('--runs', type=int, default=1, help="Conversions per book and mode, the median is reported")
+    parser.add_argument('--profile', default='reMarkable', help="Device profile whose parameters are used")
+    parser.add_argument('--output', help="Write the raw timings to this JSON file")
+    args = parser.parse_args()
+
+    sys.path.insert(0, REPO_DIR)
+    import app as app_module
+
+    if args.profile not in app_module.DEVICE_PROFILES:
+        parser.error(f"unknown profile {args.profile}, choose from {', '.join(app_module.DEVICE_PROFILES)}")
+    params = app_module.DEVICE_PROFILES[args.profile]
+    modes = {'single': (1, params)}
+    modes.update({f"{count} chunks": (count, params) for count in args.chunks if count > 1})
+    if args.draft:
+        modes['draft'] = (1, app_module.get_draft_params(params))
+
+    report = []
+    for book in args.books:
+        size_mb = os.path.getsize(book) / (1024 * 1024)
+        work_dir = tempfile.mkdtemp(prefix='epub_benchmark_')
+        try:
+            runs = {name: [run_once(app_module, book, mode_params, chunk_count, work_dir) for _ in range(args.runs)]
+                    for name, (chunk_count, mode_params) in modes.items()}
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+        print(f"{os.path.basename(book)} ({size_mb:.1f} MB)")
+        baseline = None
+        for name in modes:
+            successful = [run['seconds'] for run in runs[name] if run['ok']]
+            median = statistics.median(successful) if successful else None
+            pages = next((run['pages'] for run in runs[name] if run['ok']), None)
+            if name == 'single':
+                baseline = median
+            if median is None:
+                print(f"  {name:>10}: failed ({len(runs[name])} runs)")
+                continue
+            speedup = f", speedup {baseline / median:.2f}x" if baseline and name != 'single' else ""
+            print(f"  {name:>10}: {median:.1f}s median of {len(successful)}, {pages} pages{speedup}")
+
+        report.append({'book': book, 'size_mb': round(size_mb, 2),
+                       'runs': runs})
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'profile': args.profile, 'cpu_count': os.cpu_count(), 'books': report}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
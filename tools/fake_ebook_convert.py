@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Stand-in for Calibre's ebook-convert and ebook-meta for load tests.
+
+Prints progress lines in the format of ebook-convert at a configurable rate
+and writes a small valid PDF (or a copy of the input for EPUB output), so
+the web and job layer can be exercised without the cost of real conversions.
+Like ebook-convert, it picks the output format from the file extension and
+fails for extensions other than .pdf and .epub.
+
+Usage:
+    EBOOK_CONVERT_PATH=tools/fake_ebook_convert.py \\
+    EBOOK_META_PATH=tools/fake_ebook_convert.py gunicorn app:app
+
+Environment variables:
+    FAKE_CONVERT_DURATION   Total runtime of a conversion in seconds (default 2.0)
+    FAKE_CONVERT_PAGES      Number of "rendered page" lines to print (default 20)
+    FAKE_CONVERT_FAIL_RATE  Fraction of conversions that fail with code 1 (default 0)
+"""
+import os
+import random
+import shutil
+import sys
+import time
+
+PHASES = [
+    (1, "Converting input to HTML..."),
+    (10, "Running transforms on e-book..."),
+    (34, "Running transforms on e-book..."),
+    (58, "Creating PDF Output..."),
+]
+
+OUTPUT_FORMATS = ['pdf', 'epub']
+
+PDF_TEMPLATE = (
+    "%PDF-1.4\n"
+    "1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n"
+    "2 0 obj << /Type /Pages /Kids [3 0 R] /Count 1 >> endobj\n"
+    "3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 1620 2160] >> endobj\n"
+    "trailer << /Root 1 0 R >>\n"
+    "%%EOF\n"
+)
+
+def print_metadata(input_path):
+    """
+    Behave like ebook-meta.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+    """
+    name = os.path.splitext(os.path.basename(input_path))[0]
+    print(f"Title               : Load Test Book {name}")
+    print("Author(s)           : Load Tester")
+    print("Languages           : eng")
+
+def convert(input_path, output_path):
+    """
+    Behave like ebook-convert.
+    
+    Args:
+        input_path (str): Path to the EPUB file
+        output_path (str): Path for the PDF or EPUB file
+        
+    Returns:
+        int: Process exit code
+    """
+    duration = float(os.environ.get('FAKE_CONVERT_DURATION', 2.0))
+    pages = int(os.environ.get('FAKE_CONVERT_PAGES', 20))
+    fail_rate = float(os.environ.get('FAKE_CONVERT_FAIL_RATE', 0))
+    
+    if not os.path.exists(input_path):
+        print(f"ValueError: Cannot read from {input_path}", flush=True)
+        return 1
+    
+    output_format = os.path.splitext(output_path)[1][1:].lower()
+    if output_format not in OUTPUT_FORMATS:
+        print(f"ValueError: No plugin to handle output format: {output_format}", flush=True)
+        return 1
+    
+    steps = len(PHASES) + pages
+    delay = duration / steps if steps else 0
+    
+    for percent, message in PHASES:
+        print(f"{percent}% {message}", flush=True)
+        time.sleep(delay)
+    
+    if random.random() < fail_rate:
+        print("Traceback (most recent call last):", flush=True)
+        print("RuntimeError: Simulated conversion failure", flush=True)
+        return 1
+    
+    for page in range(1, pages + 1):
+        percent = 58 + int(41 * page / pages)
+        print(f"{percent}% Rendered {page} of {pages} pages", flush=True)
+        time.sleep(delay)
+    
+    if output_format == 'epub':
+        shutil.copyfile(input_path, output_path)
+    else:
+        with open(output_path, 'w') as f:
+            f.write(PDF_TEMPLATE)
+    print(f"100% Output saved to   {output_path}", flush=True)
+    return 0
+
+def main(argv):
+    """
+    Dispatch between ebook-convert and ebook-meta behaviour.
+    
+    Args:
+        argv (list): Command line arguments without the program name
+        
+    Returns:
+        int: Process exit code
+    """
+    if '--version' in argv:
+        print("ebook-convert.py (calibre 0.0.0 fake)")
+        return 0
+    
+    positional = [arg for arg in argv if not arg.startswith('--')]
+    if len(positional) == 1:
+        print_metadata(positional[0])
+        return 0
+    if len(positional) >= 2:
+        return convert(positional[0], positional[1])
+    
+    print("Usage: fake_ebook_convert.py input_file output_file [options]", file=sys.stderr)
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Load test for the job pipeline (api_convert, progress, save_jobs, job_cleaner).
+
+Submits many conversions concurrently, follows each one through its
+/progress/<job_id> event stream and reports request latencies, SSE fan-out
+cost and persistence overhead. Conversions are done by the fake converter
+in tools/fake_ebook_convert.py, so the numbers describe the web/job layer
+rather than Calibre.
+
+By default the app is loaded in-process with the fake converter, which also
+allows timing save_jobs() directly. With --url a running server is tested
+instead; start it with EBOOK_CONVERT_PATH and EBOOK_META_PATH pointing to the
+fake converter and with UPLOAD_RATE_LIMIT=0, all uploads come from one client.
+
+Usage:
+    python tools/load_test.py --jobs 2000 --concurrency 200 --duration 2
+    python tools/load_test.py --url http://localhost:8000 --jobs 500
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+TOOLS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(TOOLS_DIR)
+FAKE_CONVERTER = os.path.join(TOOLS_DIR, 'fake_ebook_convert.py')
+
+def make_epub():
+    """
+    Build a small EPUB with unique content, so uploads are not coalesced.
+    
+    Returns:
+        bytes: EPUB file content
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as epub:
+        epub.writestr('mimetype', 'application/epub+zip')
+        epub.writestr('OEBPS/chapter.xhtml', f"<html><body><p>{uuid.uuid4()}</p></body></html>")
+    return buffer.getvalue()
+
+def percentiles(values):
+    """
+    Summarize a list of durations.
+    
+    Args:
+        values (list): Durations in seconds
+        
+    Returns:
+        str: p50/p95/p99/max in milliseconds
+    """
+    if not values:
+        return "n/a"
+    values = sorted(values)
+    pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+    return f"p50 {pick(0.5):.1f} ms, p95 {pick(0.95):.1f} ms, p99 {pick(0.99):.1f} ms, max {values[-1] * 1000:.1f} ms"
+
+class InProcessClient:
+    """
+    Drives the app through Flask's test client in this process.
+    """
+
+    def __init__(self, args):
+        os.environ['EBOOK_CONVERT_PATH'] = FAKE_CONVERTER
+        os.environ['EBOOK_META_PATH'] = FAKE_CONVERTER
+        os.environ['FAKE_CONVERT_DURATION'] = str(args.duration)
+        os.environ.setdefault('TEMP_DIR', tempfile.mkdtemp(prefix='epub_load_test_'))
+        os.environ.setdefault('MAX_CONCURRENT_CONVERSIONS', str(args.slots))
+        os.environ.setdefault('UPLOAD_RATE_LIMIT', '0')
+        sys.path.insert(0, REPO_DIR)
+        
+        import logging
+        import app as app_module
+        logging.getLogger().setLevel(logging.WARNING)
+        app_module.app.logger.setLevel(logging.WARNING)
+        
+        self.app_module = app_module
+        self.persistence = {'calls': 0, 'seconds': 0.0, 'max': 0.0}
+        self.persistence_lock = threading.Lock()
+        
+        for name in ['save_jobs', 'save_completed_files']:
+            setattr(app_module, name, self.timed(getattr(app_module, name)))
+
+    def timed(self, function):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                with self.persistence_lock:
+                    self.persistence['calls'] += 1
+                    self.persistence['seconds'] += elapsed
+                    self.persistence['max'] = max(self.persistence['max'], elapsed)
+        return wrapper
+
+    def convert(self, epub, device_profile):
+        response = self.app_module.app.test_client().post('/api/v1/convert', data={
+            'epub_file': (io.BytesIO(epub), 'load_test.epub'),
+            'device_profile': device_profile
+        })
+        if response.status_code != 202:
+            raise RuntimeError(f"Convert returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response.get_json()['job_id']
+
+    def status(self, job_id):
+        return self.app_module.app.test_client().get(f'/api/v1/jobs/{job_id}/status').get_json()
+
+    def events(self, job_id):
+        response = self.app_module.app.test_client().get(f'/progress/{job_id}', buffered=False)
+        try:
+            for chunk in response.response:
+                for line in chunk.decode().splitlines():
+                    if line.startswith('data: '):
+                        yield json.loads(line[6:])
+        finally:
+            response.close()
+
+    def persistence_report(self):
+        temp_dir = self.app_module.TEMP_DIR
+        sizes = {name: os.path.getsize(os.path.join(temp_dir, name))
+                 for name in ['conversion_jobs.json', 'completed_files.json']
+                 if os.path.exists(os.path.join(temp_dir, name))}
+        return self.persistence, sizes
+
+class HttpClient:
+    """
+    Drives a running server over HTTP.
+    """
+
+    def __init__(self, args):
+        self.url = args.url.rstrip('/')
+
+    def convert(self, epub, device_profile):
+        boundary = uuid.uuid4().hex
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"device_profile\"\r\n\r\n{device_profile}\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"epub_file\"; filename=\"load_test.epub\"\r\n"
+            f"Content-Type: application/epub+zip\r\n\r\n"
+        ).encode() + epub + f"\r\n--{boundary}--\r\n".encode()
+        request = urllib.request.Request(
+            f"{self.url}/api/v1/convert", data=body,
+            headers={'Content-Type': f"multipart/form-data; boundary={boundary}"}
+        )
+        try:
+            with urllib.request.urlopen(request) as response:
+                if response.status != 202:
+                    raise RuntimeError(f"Convert returned {response.status}: {response.read(200).decode()}")
+                return json.load(response)['job_id']
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Convert returned {e.code}: {e.read(200).decode()}") from e
+
+    def status(self, job_id):
+        with urllib.request.urlopen(f"{self.url}/api/v1/jobs/{job_id}/status") as response:
+            return json.load(response)
+
+    def events(self, job_id):
+        with urllib.request.urlopen(f"{self.url}/progress/{job_id}") as response:
+            for raw in response:
+                line = raw.decode().strip()
+                if line.startswith('data: '):
+                    yield json.loads(line[6:])
+
+    def persistence_report(self):
+        return None, {}
+
+def run_job(client, device_profile, results, lock):
+    """
+    Submit one conversion and follow it to the end.
+    
+    Args:
+        client: InProcessClient or HttpClient
+        device_profile (str): Device profile to request
+        results (dict): Shared result lists
+        lock (threading.Lock): Guards results
+    """
+    epub = make_epub()
+    started = time.perf_counter()
+    try:
+        job_id = client.convert(epub, device_profile)
+        convert_latency = time.perf_counter() - started
+        
+        stream_started = time.perf_counter()
+        first_event = None
+        event_count = 0
+        final_status = None
+        for event in client.events(job_id):
+            event_count += 1
+            if first_event is None:
+                first_event = time.perf_counter() - stream_started
+            if event.get('status') in ['completed', 'failed']:
+                final_status = event['status']
+                break
+        stream_duration = time.perf_counter() - stream_started
+        
+        status_started = time.perf_counter()
+        client.status(job_id)
+        status_latency = time.perf_counter() - status_started
+    except Exception as e:
+        with lock:
+            results['errors'].append(str(e))
+        return
+    
+    with lock:
+        results['convert'].append(convert_latency)
+        results['status'].append(status_latency)
+        results['first_event'].append(first_event or 0)
+        results['stream'].append(stream_duration)
+        results['events'].append(event_count)
+        results['end_to_end'].append(time.perf_counter() - started)
+        results[final_status or 'incomplete'] += 1
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', help="Base URL of a running server (default: load the app in-process)")
+    parser.add_argument('--jobs', type=int, default=1000, help="Number of conversions to submit")
+    parser.add_argument('--concurrency', type=int, default=100, help="Number of jobs in flight at once")
+    parser.add_argument('--duration', type=float, default=1.0, help="Fake conversion runtime in seconds (in-process)")
+    parser.add_argument('--slots', type=int, default=32, help="MAX_CONCURRENT_CONVERSIONS for the in-process app")
+    parser.add_argument('--profile', default='reMarkable', help="Device profile to request")
+    args = parser.parse_args()
+    
+    client = HttpClient(args) if args.url else InProcessClient(args)
+    results = {key: [] for key in ['convert', 'status', 'first_event', 'stream', 'events', 'end_to_end', 'errors']}
+    results.update({'completed': 0, 'failed': 0, 'incomplete': 0})
+    lock = threading.Lock()
+    
+    usage_before = resource.getrusage(resource.RUSAGE_SELF)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        for _ in range(args.jobs):
+            executor.submit(run_job, client, args.profile, results, lock)
+    elapsed = time.perf_counter() - started
+    usage_after = resource.getrusage(resource.RUSAGE_SELF)
+    cpu_seconds = (usage_after.ru_utime - usage_before.ru_utime) + (usage_after.ru_stime - usage_before.ru_stime)
+    
+    total_events = sum(results['events'])
+    print(f"Jobs: {args.jobs} submitted, {results['completed']} completed, {results['failed']} failed, "
+          f"{results['incomplete']} incomplete, {len(results['errors'])} errors")
+    print(f"Wall time: {elapsed:.1f}s, throughput {len(results['end_to_end']) / elapsed:.1f} jobs/s")
+    print(f"POST /api/v1/convert: {percentiles(results['convert'])}")
+    print(f"GET /api/v1/jobs/<id>/status: {percentiles(results['status'])}")
+    print(f"SSE time to first event: {percentiles(results['first_event'])}")
+    print(f"SSE stream duration: {percentiles(results['stream'])}")
+    print(f"End to end: {percentiles(results['end_to_end'])}")
+    print(f"SSE fan-out: {total_events} events, {total_events / max(1, len(results['events'])):.1f} per job, "
+          f"{args.concurrency} concurrent streams")
+    
+    persistence, sizes = client.persistence_report()
+    if persistence is not None:
+        print(f"Process CPU: {cpu_seconds:.1f}s, {cpu_seconds * 1000 / max(1, total_events):.2f} ms per SSE event")
+        mean = persistence['seconds'] / max(1, persistence['calls'])
+        print(f"Persistence: {persistence['calls']} saves, {persistence['seconds']:.2f}s total, "
+              f"mean {mean * 1000:.2f} ms, max {persistence['max'] * 1000:.1f} ms")
+        for name, size in sizes.items():
+            print(f"  {name}: {size / 1024:.1f} KiB")
+    
+    if results['errors']:
+        print(f"First error: {results['errors'][0]}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for a webhook receiver.
+
+Prints every notification it receives, checks the X-Webhook-Signature header
+against --secret (the server's WEBHOOK_SECRET) and can answer the first
+requests with an error to exercise the retries. Start the server with
+WEBHOOK_ALLOW_PRIVATE=true, since callbacks to local addresses are refused
+otherwise, and pass callback_url=http://localhost:8080/ with the upload.
+
+Usage:
+    python tools/webhook_receiver.py --port 8080 --secret changeme
+    python tools/webhook_receiver.py --fail 2 --fail-status 503
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def make_handler(args):
+    state = {'received': 0}
+
+    class WebhookHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            state['received'] += 1
+
+            signature = self.headers.get('X-Webhook-Signature')
+            if args.secret:
+                expected = hmac.new(args.secret.encode(),
+                                    self.headers.get('X-Webhook-Timestamp', '').encode() + b'.' + body,
+                                    hashlib.sha256).hexdigest()
+                verified = signature == f"sha256={expected}"
+            else:
+                verified = None
+
+            failing = state['received'] <= args.fail
+            print(f"[{time.strftime('%H:%M:%S')}] #{state['received']} {self.headers.get('X-Webhook-Event')} "
+                  f"for {self.headers.get('X-Webhook-Id')}, signature "
+                  f"{'valid' if verified else 'INVALID' if verified is False else 'not checked'}, "
+                  f"answering {args.fail_status if failing else 200}")
+            print(json.dumps(json.loads(body), indent=2))
+
+            self.send_response(args.fail_status if failing else 200)
+            self.end_headers()
+
+        def log_message(self, format, *log_args):
+            pass
+
+    return WebhookHandler
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1', help="Address to listen on")
+    parser.add_argument('--port', type=int, default=8080, help="Port to listen on")
+    parser.add_argument('--secret', help="WEBHOOK_SECRET of the server, enables signature checks")
+    parser.add_argument('--fail', type=int, default=0, help="Answer the first N requests with --fail-status")
+    parser.add_argument('--fail-status', type=int, default=503, help="Status code for failed requests")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args))
+    print(f"Listening on http://{args.host}:{args.port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()